@@ -1,19 +1,30 @@
-from flask import Flask, send_from_directory, request
+from flask import Flask, request
 from flask_restx import Api
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from config import Config
-from .routes.auth import api as auth_ns, blacklisted_tokens
+from .routes.auth import api as auth_ns
 from .routes.member import api as member_ns
 from .routes.event import api as event_ns
 from .routes.project import api as project_ns
 from .routes.contact import api as contact_ns
 from .routes.banner import api as banner_ns
+from .routes.job import api as job_ns
+from .storage import get_revocation_store
+from .utils.compression import init_compression
+from .utils.images import send_image
+from .utils.jobs import init_job_workers
+from .utils.log import setup_logging
+from .utils.metrics import init_metrics
+from .utils.server_timing import init_server_timing, timed_view
+from .utils.uploads import UploadRequest
 import os
 
 def create_app():
     app = Flask(__name__)
+    app.request_class = UploadRequest
     app.config.from_object(Config)
+    setup_logging(app)
     
     # Thêm config cho upload
     app.config['UPLOAD_FOLDER_MEMBERS'] = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static', 'images', 'members')
@@ -24,14 +35,21 @@ def create_app():
     os.makedirs(app.config['UPLOAD_FOLDER_MEMBERS'], exist_ok=True)
     os.makedirs(app.config['UPLOAD_FOLDER_EVENTS'], exist_ok=True)
 
+    @app.before_request
+    def parse_uploads():
+        # Đọc body multipart trước handler: file sai định dạng hoặc quá lớn
+        # bị từ chối (415/413) ngay khi đọc, thay vì lỗi 500 trong try/except của route
+        if request.mimetype == 'multipart/form-data':
+            request.files
+
     # Route để serve static files
     @app.route('/static/images/members/<path:filename>')
     def serve_member_image(filename):
-        return send_from_directory(app.config['UPLOAD_FOLDER_MEMBERS'], filename)
+        return send_image(app.config['UPLOAD_FOLDER_MEMBERS'], filename)
 
     @app.route('/static/images/events/<path:filename>')
     def serve_event_image(filename):
-        return send_from_directory(app.config['UPLOAD_FOLDER_EVENTS'], filename)
+        return send_image(app.config['UPLOAD_FOLDER_EVENTS'], filename)
 
     # Thêm config cho upload banner
     app.config['UPLOAD_FOLDER_BANNERS'] = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static', 'images', 'banners')
@@ -40,7 +58,7 @@ def create_app():
     # Thêm route để serve banner images
     @app.route('/static/images/banners/<path:filename>')
     def serve_banner_image(filename):
-        return send_from_directory(app.config['UPLOAD_FOLDER_BANNERS'], filename)
+        return send_image(app.config['UPLOAD_FOLDER_BANNERS'], filename)
 
     # Thêm cấu hình này để tắt tự động thêm dấu / vào cuối URL
     app.url_map.strict_slashes = False
@@ -51,7 +69,7 @@ def create_app():
     @jwt.token_in_blocklist_loader
     def check_if_token_in_blacklist(jwt_header, jwt_payload):
         jti = jwt_payload['jti']
-        return jti in blacklisted_tokens
+        return get_revocation_store().is_revoked(jti)
     
     @jwt.expired_token_loader
     def expired_token_callback(jwt_header, jwt_payload):
@@ -84,7 +102,7 @@ def create_app():
             ],
             "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
             "allow_headers": ["Content-Type", "Authorization", "Access-Control-Allow-Origin"],
-            "expose_headers": ["Content-Type"],
+            "expose_headers": ["Content-Type", "ETag", "Last-Modified", "X-Total-Count", "X-Next-Cursor", "Server-Timing"],
             "supports_credentials": True
         }
     })
@@ -118,7 +136,8 @@ def create_app():
                 'description': "Type in the *'Value'* input box below: **'Bearer &lt;JWT&gt;'**, where JWT is the token"
             }
         },
-        security='Bearer'
+        security='Bearer',
+        decorators=[timed_view]
     )
     
     api.add_namespace(auth_ns)
@@ -127,5 +146,16 @@ def create_app():
     api.add_namespace(project_ns, path='/projects')
     api.add_namespace(contact_ns, path='/contacts')
     api.add_namespace(banner_ns, path='/banners')
+    api.add_namespace(job_ns, path='/jobs')
+
+    # Đo thời gian request (/metrics, Server-Timing) rồi nén response: hook đăng ký
+    # sau chạy trước, nên thời gian đo được gồm cả bước nén
+    init_metrics(app, api)
+    init_server_timing(app, api)
+    # Nén gzip/br các response JSON
+    init_compression(app)
+
+    # Thread xử lý hàng đợi công việc nền của worker này (khởi động ở request đầu tiên)
+    init_job_workers(app)
     
     return app 
\ No newline at end of file
@@ -1,9 +1,22 @@
-import json
-import os
-from typing import List, Optional, Dict
-from datetime import datetime
+from typing import List, Optional, Dict, Tuple, Union
+from ..storage import (
+    JsonCollection,
+    SqliteCollection,
+    data_file_path,
+    get_collection,
+    get_registration_store
+)
+from ..storage.query import Filter, SortKey
+from ..storage.timing import timed_construction
+from ..utils.image_gc import release_images
+from datetime import date as Date, datetime
+from functools import lru_cache
 
+@timed_construction
 class Event:
+    # Đã chuyển registered_ips của các tài liệu cũ sang kho đăng ký hay chưa
+    _registrations_migrated = False
+
     def __init__(
         self,
         id: int,
@@ -18,7 +31,7 @@ class Event:
         currentParticipants: int = 0,
         organizer: str = "DSC UTE",
         googleFormUrl: str = "",
-        registered_ips: List[str] = None
+        registered_ips: List[str] = None  # Dữ liệu cũ, IP đăng ký nằm trong RegistrationStore
     ):
         self.id = id
         self.title = title
@@ -26,114 +39,181 @@ class Event:
         self.date = date
         self.time = time
         self.location = location
-        self.status = status
+        # Trạng thái luôn tính từ ngày diễn ra, giá trị lưu trong file chỉ dùng khi ngày không hợp lệ
+        self.status = self.status_for(date) or status
         self.image = image
         self.maxParticipants = maxParticipants
         self.currentParticipants = currentParticipants
         self.organizer = organizer
         self.googleFormUrl = googleFormUrl
-        self.registered_ips = registered_ips or []
 
     @staticmethod
     def get_data_file_path() -> str:
-        return os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data', 'events.json')
+        return data_file_path('events')
+
+    @classmethod
+    def _collection(cls) -> Union[JsonCollection, SqliteCollection]:
+        return get_collection('events')
+
+    @classmethod
+    def _migrate_registrations(cls) -> None:
+        """Chuyển registered_ips còn nằm trong tài liệu sự kiện sang kho đăng ký (chạy một lần)"""
+        collection = cls._collection()
+        with collection.lock():
+            records = collection.all()
+            if any('registered_ips' in record for record in records):
+                registrations = get_registration_store()
+                for record in records:
+                    registrations.seed(
+                        record['id'],
+                        record['maxParticipants'],
+                        record.get('currentParticipants', 0),
+                        record.get('registered_ips') or []
+                    )
+                collection.save_all([
+                    {key: value for key, value in record.items() if key != 'registered_ips'}
+                    for record in records
+                ])
+        cls._registrations_migrated = True
 
     @classmethod
     def get_all(cls) -> List['Event']:
-        try:
-            with open(cls.get_data_file_path(), 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return [cls(**event) for event in data.get('events', [])]
-        except FileNotFoundError:
-            return []
+        return cls.query()[0]
+
+    @classmethod
+    def query(
+        cls,
+        filters: List[Filter] = (),
+        sort: List[SortKey] = (),
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> Tuple[List['Event'], int]:
+        """Lọc, sắp xếp, phân trang; trả về (events của trang, tổng số)"""
+        if not cls._registrations_migrated:
+            cls._migrate_registrations()
+
+        # status được tính theo ngày nên lọc theo khoảng ngày thay vì giá trị đã lưu
+        today = datetime.now().date().isoformat()
+        date_operators = {'past': '<', 'ongoing': '=', 'upcoming': '>'}
+        translated = []
+        for field, op, value in filters:
+            if field == 'status':
+                if value not in date_operators:
+                    raise ValueError(f'Trạng thái không hợp lệ: {value}')
+                translated.append(('date', date_operators[value], today))
+            else:
+                translated.append((field, op, value))
+        sort = [('date', descending) if field == 'status' else (field, descending) for field, descending in sort]
+
+        records, total = cls._collection().query(translated, sort, limit, offset)
+        events = [cls(**record) for record in records]
+
+        # Số người đăng ký lấy từ kho đăng ký nếu sự kiện đã có ở đó
+        counts = get_registration_store().participant_counts([event.id for event in events])
+        for event in events:
+            if event.id in counts:
+                event.currentParticipants = counts[event.id]
+        return events, total
+
+    def _apply_registration(self) -> 'Event':
+        participants = get_registration_store().participants(self.id)
+        if participants is not None:
+            self.currentParticipants = participants
+        return self
 
     @classmethod
     def save_all(cls, events: List['Event']) -> None:
-        data = {
-            'events': [event.__dict__ for event in events]
-        }
-        with open(cls.get_data_file_path(), 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        cls._collection().save_all([event.__dict__ for event in events])
 
     @classmethod
     def create(cls, event_data: dict) -> 'Event':
-        events = cls.get_all()
-        new_id = max([e.id for e in events], default=0) + 1
-        event_data['id'] = new_id
-        
         # Validate date format
         try:
             datetime.strptime(event_data['date'], '%Y-%m-%d')
         except ValueError:
             raise ValueError('Invalid date format. Use YYYY-MM-DD')
 
-        new_event = cls(**event_data)
-        events.append(new_event)
-        cls.save_all(events)
+        collection = cls._collection()
+        with collection.lock():
+            event_data['id'] = collection.next_id()
+            new_event = cls(**event_data)
+            collection.insert(new_event.__dict__)
         return new_event
 
     @classmethod
     def update(cls, id: int, event_data: dict) -> Optional['Event']:
-        events = cls.get_all()
-        for i, event in enumerate(events):
-            if event.id == id:
-                event_data['id'] = id
-                updated_event = cls(**event_data)
-                events[i] = updated_event
-                cls.save_all(events)
-                return updated_event
-        return None
+        collection = cls._collection()
+        old_event = collection.get(id)
+        if old_event is None:
+            return None
+        event_data['id'] = id
+        updated_event = cls(**event_data)
+        collection.replace(id, updated_event.__dict__)
+        get_registration_store().set_capacity(id, updated_event.maxParticipants)
+        release_images(old_event, updated_event.__dict__)
+        return updated_event._apply_registration()
 
     @classmethod
     def delete(cls, id: int) -> bool:
-        events = cls.get_all()
-        initial_length = len(events)
-        events = [e for e in events if e.id != id]
-        if len(events) < initial_length:
-            cls.save_all(events)
-            return True
-        return False
+        collection = cls._collection()
+        old_event = collection.get(id)
+        if not collection.remove(id):
+            return False
+        get_registration_store().remove_event(id)
+        release_images(old_event)
+        return True
 
     @classmethod
     def get_by_id(cls, id: int) -> Optional['Event']:
-        events = cls.get_all()
-        return next((e for e in events if e.id == id), None)
+        if not cls._registrations_migrated:
+            cls._migrate_registrations()
+        event = cls._collection().get(id)
+        return cls(**event)._apply_registration() if event else None
+
+    @staticmethod
+    def status_for(date: str) -> Optional[str]:
+        """Trạng thái của sự kiện vào ngày ``date`` so với hôm nay"""
+        return Event._status_on(date, datetime.now().date())
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _status_on(date: str, today: Date) -> Optional[str]:
+        # Kết quả được cache theo (ngày, hôm nay) nên tự hết hạn sau nửa đêm
+        try:
+            event_date = datetime.strptime(date, '%Y-%m-%d').date()
+        except (TypeError, ValueError):
+            return None
+        if event_date < today:
+            return 'past'
+        elif event_date == today:
+            return 'ongoing'
+        return 'upcoming'
 
     @classmethod
     def update_status(cls) -> None:
-        """Cập nhật trạng thái sự kiện dựa trên ngày"""
-        events = cls.get_all()
-        today = datetime.now().date()
-        
-        for event in events:
-            event_date = datetime.strptime(event.date, '%Y-%m-%d').date()
-            if event_date < today:
-                event.status = 'past'
-            elif event_date == today:
-                event.status = 'ongoing'
-            else:
-                event.status = 'upcoming'
-        
-        cls.save_all(events) 
+        """Ghi trạng thái hiện tại vào file, chỉ ghi khi có sự kiện đổi trạng thái"""
+        collection = cls._collection()
+        with collection.lock():
+            records = collection.all()
+            if any(record.get('status') != cls.status_for(record['date']) for record in records):
+                cls.save_all(cls.get_all())
 
     @classmethod
     def increment_participants(cls, id: int, ip_address: str) -> tuple[Optional['Event'], str]:
         """Tăng số người tham gia và kiểm tra IP"""
-        events = cls.get_all()
-        for i, event in enumerate(events):
-            if event.id == id:
-                # Kiểm tra IP đã đăng ký chưa
-                if ip_address in event.registered_ips:
-                    return None, "IP_ALREADY_REGISTERED"
-                
-                # Kiểm tra số lượng
-                if event.currentParticipants >= event.maxParticipants:
-                    return None, "FULL_CAPACITY"
-                
-                # Tăng số người tham gia và thêm IP
-                event.currentParticipants += 1
-                event.registered_ips.append(ip_address)
-                cls.save_all(events)
-                return event, "SUCCESS"
-                
-        return None, "NOT_FOUND" 
\ No newline at end of file
+        if not cls._registrations_migrated:
+            cls._migrate_registrations()
+        record = cls._collection().get(id)
+        if record is None:
+            return None, "NOT_FOUND"
+
+        # Giữ chỗ trong kho đăng ký, không ghi lại events.json
+        event = cls(**record)
+        registrations = get_registration_store()
+        status = registrations.register(id, ip_address)
+        if status == registrations.NOT_SEEDED:
+            registrations.seed(event.id, event.maxParticipants, event.currentParticipants, [])
+            status = registrations.register(id, ip_address)
+        if status != registrations.SUCCESS:
+            return None, status
+        return event._apply_registration(), status
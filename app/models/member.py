@@ -1,7 +1,13 @@
-import json
-import os
-from typing import List, Optional, Dict
+import logging
+from typing import List, Optional, Dict, Tuple, Union
+from ..storage import JsonCollection, SqliteCollection, data_file_path, get_collection
+from ..storage.query import Filter, SortKey
+from ..storage.timing import timed_construction
+from ..utils.image_gc import pin_image, release_images
 
+logger = logging.getLogger(__name__)
+
+@timed_construction
 class Member:
     DEFAULT_AVATAR = '/static/images/members/default-avatar.png'
     
@@ -33,99 +39,96 @@ class Member:
 
     @staticmethod
     def get_data_file_path() -> str:
-        return os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data', 'members.json')
+        return data_file_path('members')
+
+    @classmethod
+    def _collection(cls) -> Union[JsonCollection, SqliteCollection]:
+        return get_collection('members')
 
     @classmethod
     def get_all(cls) -> List['Member']:
-        try:
-            with open(cls.get_data_file_path(), 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return [cls(**member) for member in data.get('members', [])]
-        except FileNotFoundError:
-            return []
+        return [cls(**member) for member in cls._collection().all()]
+
+    @classmethod
+    def query(
+        cls,
+        filters: List[Filter] = (),
+        sort: List[SortKey] = (),
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> Tuple[List['Member'], int]:
+        """Lọc, sắp xếp, phân trang; trả về (members của trang, tổng số)"""
+        records, total = cls._collection().query(filters, sort, limit, offset)
+        return [cls(**record) for record in records], total
 
     @classmethod
     def save_all(cls, members: List['Member']) -> None:
-        data = {
-            'members': [member.__dict__ for member in members]
-        }
-        with open(cls.get_data_file_path(), 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        cls._collection().save_all([member.__dict__ for member in members])
 
     @classmethod
     def create(cls, member_data: dict) -> 'Member':
-        members = cls.get_all()
-        # Tạo ID mới
-        new_id = max([m.id for m in members], default=0) + 1
-        member_data['id'] = new_id
-        
-        new_member = cls(**member_data)
-        members.append(new_member)
-        cls.save_all(members)
+        collection = cls._collection()
+        with collection.lock():
+            # Tạo ID mới
+            member_data['id'] = collection.next_id()
+            
+            new_member = cls(**member_data)
+            collection.insert(new_member.__dict__)
         return new_member
 
     @classmethod
     def update(cls, id: int, member_data: dict) -> Optional['Member']:
         try:
-            print(f"Updating member with ID: {id}")
-            print(f"Update data: {member_data}")
+            # Chỉ ghi tên các trường, không ghi nguyên payload
+            logger.debug('Updating member', extra={'member_id': id, 'fields': sorted(member_data)})
             
-            members = cls.get_all()
-            for i, member in enumerate(members):
-                if member.id == id:
-                    # Giữ nguyên ID
-                    member_data['id'] = id
-                    
-                    # Tạo member mới với dữ liệu cập nhật
-                    try:
-                        updated_member = cls(**member_data)
-                        print(f"Created updated member object: {updated_member.__dict__}")
-                    except Exception as e:
-                        print(f"Error creating updated member object: {str(e)}")
-                        raise
-                    
-                    # Cập nhật trong danh sách
-                    members[i] = updated_member
-                    
-                    try:
-                        # Lưu vào file
-                        cls.save_all(members)
-                        print(f"Successfully saved updated member with ID: {id}")
-                    except Exception as e:
-                        print(f"Error saving member data: {str(e)}")
-                        raise
-                    
-                    return updated_member
-                    
-            print(f"No member found with ID: {id}")
-            return None
+            collection = cls._collection()
+            old_member = collection.get(id)
+            if old_member is None:
+                logger.debug('Member not found', extra={'member_id': id})
+                return None
+
+            # Giữ nguyên ID
+            member_data['id'] = id
+            
+            # Tạo member mới với dữ liệu cập nhật
+            updated_member = cls(**member_data)
+            
+            # Thay đúng bản ghi theo ID và lưu vào file
+            collection.replace(id, updated_member.__dict__)
+            logger.info('Member updated', extra={'member_id': id})
+
+            # Dọn avatar cũ nếu đã đổi (xử lý ở job nền)
+            release_images(old_member, updated_member.__dict__)
+            
+            return updated_member
             
         except Exception as e:
-            print(f"Error in update operation: {str(e)}")
+            logger.error(f'Error updating member {id}: {str(e)}')
             raise
 
     @classmethod
     def delete(cls, id: int) -> bool:
         try:
-            print(f"Deleting member with ID: {id}")  # Thêm log
-            members = cls.get_all()
-            initial_length = len(members)
-            members = [m for m in members if m.id != id]
-            
-            if len(members) < initial_length:
-                print(f"Member found and filtered out, saving changes...")  # Thêm log
-                cls.save_all(members)
-                print(f"Successfully deleted member with ID: {id}")  # Thêm log
+            collection = cls._collection()
+            old_member = collection.get(id)
+            if collection.remove(id):
+                logger.info('Member deleted', extra={'member_id': id})
+                release_images(old_member)
                 return True
                 
-            print(f"No member found with ID: {id}")  # Thêm log
+            logger.debug('Member not found', extra={'member_id': id})
             return False
             
         except Exception as e:
-            print(f"Error in delete operation: {str(e)}")  # Thêm log
+            logger.error(f'Error deleting member {id}: {str(e)}')
             raise e
 
     @classmethod
     def get_by_id(cls, id: int) -> Optional['Member']:
-        members = cls.get_all()
-        return next((m for m in members if m.id == id), None) 
\ No newline at end of file
+        member = cls._collection().get(id)
+        return cls(**member) if member else None 
+
+
+# Avatar mặc định không nằm trong bản ghi nào nhưng luôn phải giữ lại
+pin_image(Member.DEFAULT_AVATAR)
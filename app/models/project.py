@@ -1,7 +1,10 @@
-import json
-import os
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple, Union
+from ..storage import JsonCollection, SqliteCollection, data_file_path, get_collection
+from ..storage.query import Filter, SortKey
+from ..storage.timing import timed_construction
+from ..utils.image_gc import release_images
 
+@timed_construction
 class Project:
     def __init__(
         self,
@@ -31,58 +34,64 @@ class Project:
 
     @staticmethod
     def get_data_file_path() -> str:
-        return os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data', 'projects.json')
+        return data_file_path('projects')
+
+    @classmethod
+    def _collection(cls) -> Union[JsonCollection, SqliteCollection]:
+        return get_collection('projects')
 
     @classmethod
     def get_all(cls) -> List['Project']:
-        try:
-            with open(cls.get_data_file_path(), 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return [cls(**project) for project in data.get('projects', [])]
-        except FileNotFoundError:
-            return []
+        return [cls(**project) for project in cls._collection().all()]
+
+    @classmethod
+    def query(
+        cls,
+        filters: List[Filter] = (),
+        sort: List[SortKey] = (),
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> Tuple[List['Project'], int]:
+        """Lọc, sắp xếp, phân trang; trả về (projects của trang, tổng số)"""
+        records, total = cls._collection().query(filters, sort, limit, offset)
+        return [cls(**record) for record in records], total
 
     @classmethod
     def save_all(cls, projects: List['Project']) -> None:
-        data = {
-            'projects': [project.__dict__ for project in projects]
-        }
-        with open(cls.get_data_file_path(), 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        cls._collection().save_all([project.__dict__ for project in projects])
 
     @classmethod
     def create(cls, project_data: dict) -> 'Project':
-        projects = cls.get_all()
-        new_id = max([p.id for p in projects], default=0) + 1
-        project_data['id'] = new_id
-        new_project = cls(**project_data)
-        projects.append(new_project)
-        cls.save_all(projects)
+        collection = cls._collection()
+        with collection.lock():
+            project_data['id'] = collection.next_id()
+            new_project = cls(**project_data)
+            collection.insert(new_project.__dict__)
         return new_project
 
     @classmethod
     def get_by_id(cls, id: int) -> Optional['Project']:
-        projects = cls.get_all()
-        return next((p for p in projects if p.id == id), None)
+        project = cls._collection().get(id)
+        return cls(**project) if project else None
 
     @classmethod
     def update(cls, id: int, project_data: dict) -> Optional['Project']:
-        projects = cls.get_all()
-        for i, project in enumerate(projects):
-            if project.id == id:
-                project_data['id'] = id
-                updated_project = cls(**project_data)
-                projects[i] = updated_project
-                cls.save_all(projects)
-                return updated_project
-        return None
+        collection = cls._collection()
+        old_project = collection.get(id)
+        if old_project is None:
+            return None
+        project_data['id'] = id
+        updated_project = cls(**project_data)
+        collection.replace(id, updated_project.__dict__)
+        # Dọn ảnh không còn dùng (ảnh dự án, avatar thành viên) ở job nền
+        release_images(old_project, updated_project.__dict__)
+        return updated_project
 
     @classmethod
     def delete(cls, id: int) -> bool:
-        projects = cls.get_all()
-        initial_length = len(projects)
-        projects = [p for p in projects if p.id != id]
-        if len(projects) < initial_length:
-            cls.save_all(projects)
-            return True
-        return False 
\ No newline at end of file
+        collection = cls._collection()
+        old_project = collection.get(id)
+        if not collection.remove(id):
+            return False
+        release_images(old_project)
+        return True 
\ No newline at end of file
@@ -1,11 +1,13 @@
-import json
-import os
 import bcrypt
 import jwt
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Union
 from config import Config
+from ..storage import JsonCollection, SqliteCollection, data_file_path, get_collection
+from ..storage.timing import timed_construction
+from ..utils.passwords import check_password
 
+@timed_construction
 class User:
     def __init__(self, id: int, username: str, password_hash: str, role: str = 'user', **kwargs):
         self.id = id
@@ -15,37 +17,34 @@ class User:
 
     @staticmethod
     def get_db_path() -> str:
-        return os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
-                           'data', 'db.json')
+        return data_file_path('users')
+
+    @classmethod
+    def _collection(cls) -> Union[JsonCollection, SqliteCollection]:
+        return get_collection('users')
 
     @classmethod
     def load_all(cls) -> list['User']:
-        try:
-            with open(cls.get_db_path(), 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return [cls(**user) for user in data.get('users', [])]
-        except FileNotFoundError:
-            return []
+        return [cls(**user) for user in cls._collection().all()]
 
     @classmethod
     def save_all(cls, users: list['User']) -> None:
-        with open(cls.get_db_path(), 'w', encoding='utf-8') as f:
-            json.dump({
-                'users': [
-                    {
-                        'id': user.id,
-                        'username': user.username,
-                        'password_hash': user.password_hash,
-                        'role': user.role
-                    }
-                    for user in users
-                ]
-            }, f, ensure_ascii=False, indent=2)
+        cls._collection().save_all([
+            {
+                'id': user.id,
+                'username': user.username,
+                'password_hash': user.password_hash,
+                'role': user.role
+            }
+            for user in users
+        ])
 
     @classmethod
     def get_by_username(cls, username: str) -> Optional['User']:
-        users = cls.load_all()
-        return next((u for u in users if u.username == username), None)
+        # Tra đúng chuỗi qua index username (index phụ ở backend JSON, cột UNIQUE ở SQLite);
+        # không dùng ``query`` vì bộ lọc query string coi '12345' và 12345 là như nhau
+        user = cls._collection().find('username', username)
+        return cls(**user) if user else None
 
     def set_password(self, password: str) -> None:
         self.password_hash = bcrypt.hashpw(
@@ -54,10 +53,8 @@ class User:
         ).decode('utf-8')
 
     def check_password(self, password: str) -> bool:
-        return bcrypt.checkpw(
-            password.encode('utf-8'),
-            self.password_hash.encode('utf-8')
-        )
+        """So khớp trong pool bcrypt, báo ``PasswordCheckBusy`` khi pool đầy"""
+        return check_password(password, self.password_hash)
 
     def generate_token(self) -> str:
         expires = datetime.utcnow() + timedelta(hours=24)
@@ -5,8 +5,7 @@ import logging
 import time
 from flask_cors import CORS
 
-# Cấu hình logging
-logging.basicConfig(level=logging.DEBUG)
+# Cấu hình logging (mức log và handler do setup_logging của app quyết định)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
@@ -45,8 +44,8 @@ def upload_file():
         folder = request.form.get('folder', 'others')
         
         logger.info(f'Processing upload for file: {file.filename} to folder: {folder}')
-        logger.debug(f'File details: size={len(file.read())} bytes, type={file.content_type}')
-        file.seek(0)  # Reset file pointer after reading
+        # Không đọc cả file chỉ để log kích thước: dùng số byte đã nhận khi parse body
+        logger.debug(f'File details: size={getattr(file.stream, "size", request.content_length)} bytes, type={file.content_type}')
         
         if file.filename == '':
             logger.error('No selected file')
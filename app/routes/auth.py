@@ -1,4 +1,4 @@
-from flask import request
+from flask import current_app, request
 from flask_restx import Namespace, Resource
 from flask_jwt_extended import (
     create_access_token,
@@ -8,12 +8,28 @@ from flask_jwt_extended import (
     get_jwt
 )
 from ..models.user import User
+from ..storage import get_rate_limit_store, get_revocation_store
+from ..utils.client_ip import client_ip
+from ..utils.passwords import PasswordCheckBusy
 from http import HTTPStatus
+import math
+import time
 
 api = Namespace('auth', description='Xác thực người dùng')
 
-# Lưu trữ các token đã bị vô hiệu hóa
-blacklisted_tokens = set()
+def revoke_current_token():
+    """Thu hồi token của request hiện tại cho tới khi nó tự hết hạn"""
+    claims = get_jwt()
+    expires_at = claims.get('exp')
+    if expires_at is None:
+        expires_at = time.time() + current_app.config['JWT_REFRESH_TOKEN_EXPIRES'].total_seconds()
+    get_revocation_store().revoke(claims['jti'], expires_at)
+
+def too_many_attempts(retry_after):
+    return {
+        'message': 'Đăng nhập sai quá nhiều lần, vui lòng thử lại sau',
+        'error': 'TOO_MANY_ATTEMPTS'
+    }, HTTPStatus.TOO_MANY_REQUESTS, {'Retry-After': str(max(1, math.ceil(retry_after)))}
 
 @api.route('/login')
 class Login(Resource):
@@ -30,12 +46,32 @@ class Login(Resource):
                     'error': 'MISSING_CREDENTIALS'
                 }, HTTPStatus.BAD_REQUEST
 
+            # Giới hạn trước khi chạy bcrypt: mọi lần thử theo IP, lần sai theo username
+            config = current_app.config
+            limits = get_rate_limit_store()
+            window = config['LOGIN_RATE_LIMIT_WINDOW']
+            username_key = f'login:user:{username.lower()}'
+            retry_after = limits.hit(f'login:ip:{client_ip()}', config['LOGIN_RATE_LIMIT_IP'], window)
+            if not retry_after:
+                retry_after = limits.blocked(username_key, config['LOGIN_RATE_LIMIT_USERNAME'], window)
+            if retry_after:
+                return too_many_attempts(retry_after)
+
             user = User.get_by_username(username)
-            if not user or not user.check_password(password):
+            try:
+                valid = user is not None and user.check_password(password)
+            except PasswordCheckBusy:
+                return {
+                    'message': 'Máy chủ đang bận, vui lòng thử lại sau',
+                    'error': 'SERVER_BUSY'
+                }, HTTPStatus.SERVICE_UNAVAILABLE, {'Retry-After': '1'}
+            if not valid:
+                limits.hit(username_key, config['LOGIN_RATE_LIMIT_USERNAME'], window)
                 return {
                     'message': 'Tên đăng nhập hoặc mật khẩu không đúng',
                     'error': 'INVALID_CREDENTIALS'
                 }, HTTPStatus.UNAUTHORIZED
+            limits.reset(username_key)
 
             # Tạo identity cho token
             identity = {
@@ -75,8 +111,8 @@ class TokenRefresh(Resource):
             current_user = get_jwt_identity()
             jti = get_jwt()['jti']
             
-            # Kiểm tra xem refresh token có trong blacklist không
-            if jti in blacklisted_tokens:
+            # Kiểm tra xem refresh token đã bị thu hồi chưa
+            if get_revocation_store().is_revoked(jti):
                 return {
                     'message': 'Refresh token đã hết hạn hoặc bị vô hiệu hóa',
                     'error': 'INVALID_REFRESH_TOKEN'
@@ -88,8 +124,8 @@ class TokenRefresh(Resource):
             # Tạo refresh token mới (rotate refresh token)
             new_refresh_token = create_refresh_token(identity=current_user)
             
-            # Thêm refresh token cũ vào blacklist
-            blacklisted_tokens.add(jti)
+            # Thu hồi refresh token cũ
+            revoke_current_token()
             
             return {
                 'message': 'Token đã được làm mới',
@@ -110,8 +146,7 @@ class Logout(Resource):
     def post(self):
         """Đăng xuất và vô hiệu hóa token"""
         try:
-            jti = get_jwt()['jti']
-            blacklisted_tokens.add(jti)
+            revoke_current_token()
             return {
                 'message': 'Đăng xuất thành công'
             }, HTTPStatus.OK
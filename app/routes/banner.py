@@ -6,13 +6,19 @@ from datetime import datetime
 import logging
 from werkzeug.utils import secure_filename
 import time
+from ..storage import data_file_path, get_collection
+from ..utils.http_cache import conditional
+from ..utils.image_gc import release_images
+from ..utils.images import accept_image_upload, job_reference, process_image_variants
+from ..utils.jobs import enqueue, task
+from ..utils.listing import parse_list_query
 
 api = Namespace('banners', description='Quản lý banner')
 
 # Cấu hình logger
 logger = logging.getLogger(__name__)
 
-BANNERS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data', 'banners.json')
+BANNERS_FILE = data_file_path('banners')
 UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'static', 'images', 'banners')
 
 # Tạo thư mục nếu chưa tồn tại
@@ -28,25 +34,57 @@ ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def load_banners():
-    try:
-        with open(BANNERS_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except:
-        return []
-
-def save_banners(banners):
-    with open(BANNERS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(banners, f, ensure_ascii=False, indent=2)
+def save_banner_image(file):
+    """Lưu file ảnh banner, trả về (các trường ảnh của banner, payload job tạo biến thể hoặc None)"""
+    data, payload = accept_image_upload(
+        file.stream, UPLOAD_FOLDER, file.filename.rsplit('.', 1)[1], lambda name: f'/static/images/banners/{name}'
+    )
+    images = {'image': data['url'], 'images': data['images'], 'srcset': data['srcset']}
+    if payload is not None:
+        payload['image'] = data['url']
+    return images, payload
+
+def queue_banner_image(payload):
+    """Xếp job tạo biến thể sau khi banner đã được lưu, để job cập nhật được bản ghi"""
+    if payload is None:
+        return None
+    return job_reference(enqueue('banner_image', payload))
+
+@task('banner_image')
+def process_banner_image(payload):
+    """Job nền: tạo biến thể rồi cập nhật mọi banner đang dùng ảnh tạm"""
+    urls = process_image_variants(payload)
+    banners = get_collection('banners')
+    with banners.lock():
+        for banner in banners.all():
+            if banner['image'] == payload['image']:
+                banners.replace(banner['id'], {**banner, 'images': urls['images'], 'srcset': urls['srcset']})
+    return urls
 
 @api.route('')
 class BannerList(Resource):
+    @api.doc(params={
+        'active': 'Lọc theo trạng thái hiển thị (true/false)',
+        'sort': 'Trường sắp xếp, mặc định order,created_at',
+        'limit': 'Số banner mỗi trang',
+        'cursor': 'Cursor của trang tiếp theo'
+    })
+    @conditional('banners')
     def get(self):
         """Lấy danh sách banner"""
         try:
-            banners = load_banners()
-            banners.sort(key=lambda x: (x['order'], x['created_at']))
-            return {'data': banners}, 200
+            query = parse_list_query(
+                filters=('active',),
+                sorts=('id', 'order', 'created_at', 'title'),
+                default_sort='order,created_at'
+            )
+            banners, total = get_collection('banners').query(query.filters, query.sort, query.limit, query.offset)
+            response = {'data': banners}
+            if query.paginated:
+                response['pagination'] = query.pagination(total)
+            return response, 200
+        except ValueError as ve:
+            return {'error': str(ve)}, 400
         except Exception as e:
             logger.error(f'Error getting banners: {str(e)}')
             return {'error': 'Internal server error'}, 500
@@ -62,34 +100,37 @@ class BannerList(Resource):
                 return {'error': 'No selected file'}, 400
 
             if file and allowed_file(file.filename):
-                filename = f"banner_{int(time.time())}_{secure_filename(file.filename)}"
-                filepath = os.path.join(UPLOAD_FOLDER, filename)
-                
                 try:
-                    file.save(filepath)
+                    images, job = save_banner_image(file)
+                except ValueError as ve:
+                    return {'error': str(ve)}, 400
                 except Exception as e:
                     logger.error(f'Error saving file: {str(e)}')
                     return {'error': 'Could not save file'}, 500
 
                 try:
-                    banners = load_banners()
-                    new_banner = {
-                        'id': len(banners) + 1,
-                        'title': request.form.get('title', ''),
-                        'description': request.form.get('description', ''),
-                        'image': f'/static/images/banners/{filename}',
-                        'order': int(request.form.get('order', len(banners) + 1)),
-                        'active': request.form.get('active', 'true').lower() == 'true',
-                        'created_at': datetime.now().isoformat()
-                    }
-
-                    banners.append(new_banner)
-                    save_banners(banners)
-                    return {'data': new_banner}, 201
+                    banners = get_collection('banners')
+                    with banners.lock():
+                        new_id = banners.next_id()
+                        new_banner = {
+                            'id': new_id,
+                            'title': request.form.get('title', ''),
+                            'description': request.form.get('description', ''),
+                            **images,
+                            'order': int(request.form.get('order', new_id)),
+                            'active': request.form.get('active', 'true').lower() == 'true',
+                            'created_at': datetime.now().isoformat()
+                        }
+                        banners.insert(new_banner)
+
+                    response = {'data': new_banner}
+                    job = queue_banner_image(job)
+                    if job:
+                        response['job'] = job
+                    return response, 201
                 except Exception as e:
                     logger.error(f'Error saving banner data: {str(e)}')
-                    if os.path.exists(filepath):
-                        os.remove(filepath)
+                    release_images(images)
                     return {'error': 'Could not save banner data'}, 500
             
             return {'error': 'File type not allowed'}, 400
@@ -103,35 +144,48 @@ class BannerDetail(Resource):
     def put(self, id):
         """Cập nhật banner"""
         try:
-            banners = load_banners()
-            banner = next((b for b in banners if b['id'] == id), None)
-            
-            if not banner:
+            banners = get_collection('banners')
+            if not banners.get(id):
                 return {'error': 'Banner not found'}, 404
 
+            images, job = None, None
             if 'image' in request.files:
                 file = request.files['image']
                 if file.filename != '' and allowed_file(file.filename):
-                    # Xóa ảnh cũ nếu tồn tại
-                    old_image = banner['image'].split('/')[-1]
-                    old_path = os.path.join(UPLOAD_FOLDER, old_image)
-                    if os.path.exists(old_path):
-                        os.remove(old_path)
-
-                    # Lưu ảnh mới
-                    filename = f"banner_{int(time.time())}_{secure_filename(file.filename)}"
-                    filepath = os.path.join(UPLOAD_FOLDER, filename)
-                    file.save(filepath)
-                    banner['image'] = f'/static/images/banners/{filename}'
-
-            # Cập nhật các trường khác
-            banner['title'] = request.form.get('title', banner['title'])
-            banner['description'] = request.form.get('description', banner['description'])
-            banner['order'] = int(request.form.get('order', banner['order']))
-            banner['active'] = request.form.get('active', str(banner['active'])).lower() == 'true'
-
-            save_banners(banners)
-            return {'data': banner}, 200
+                    # Lưu ảnh mới trước, chỉ xóa ảnh cũ khi ảnh mới hợp lệ
+                    try:
+                        images, job = save_banner_image(file)
+                    except ValueError as ve:
+                        return {'error': str(ve)}, 400
+
+            # Đọc và ghi trong cùng khóa: lần xóa đồng thời không thể dọn ảnh
+            # mà bản ghi vừa ghi lại vẫn đang dùng
+            with banners.lock():
+                old_banner = banners.get(id)
+                if not old_banner:
+                    release_images(images)
+                    return {'error': 'Banner not found'}, 404
+
+                # Sửa trên bản sao để không làm hỏng cache nếu lưu thất bại
+                banner = dict(old_banner)
+                if images:
+                    banner.update(images)
+
+                # Cập nhật các trường khác
+                banner['title'] = request.form.get('title', banner['title'])
+                banner['description'] = request.form.get('description', banner['description'])
+                banner['order'] = int(request.form.get('order', banner['order']))
+                banner['active'] = request.form.get('active', str(banner['active'])).lower() == 'true'
+
+                banners.replace(id, banner)
+
+            response = {'data': banner}
+            job = queue_banner_image(job)
+            if job:
+                response['job'] = job
+            # Ảnh cũ chỉ bị dọn sau khi banner đã trỏ sang ảnh mới
+            release_images(old_banner, banner)
+            return response, 200
 
         except Exception as e:
             logger.error(f'Error updating banner: {str(e)}')
@@ -140,20 +194,15 @@ class BannerDetail(Resource):
     def delete(self, id):
         """Xóa banner"""
         try:
-            banners = load_banners()
-            banner = next((b for b in banners if b['id'] == id), None)
-            
-            if not banner:
-                return {'error': 'Banner not found'}, 404
-
-            # Xóa file ảnh
-            image_path = os.path.join(UPLOAD_FOLDER, banner['image'].split('/')[-1])
-            if os.path.exists(image_path):
-                os.remove(image_path)
-
-            # Xóa banner khỏi danh sách
-            banners = [b for b in banners if b['id'] != id]
-            save_banners(banners)
+            banners = get_collection('banners')
+            with banners.lock():
+                banner = banners.get(id)
+                if not banner:
+                    return {'error': 'Banner not found'}, 404
+                banners.remove(id)
+
+            # Xóa banner khỏi danh sách rồi xếp job dọn file ảnh cùng các biến thể
+            release_images(banner)
 
             return '', 204
 
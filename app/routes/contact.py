@@ -4,10 +4,13 @@ import json
 import os
 from datetime import datetime
 import logging
+from ..storage import data_file_path, get_collection
+from ..utils.http_cache import conditional
+from ..utils.listing import parse_list_query
 
 api = Namespace('contacts', description='Quản lý thông tin liên hệ')
 
-CONTACTS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data', 'contacts.json')
+CONTACTS_FILE = data_file_path('contacts')
 
 # Đảm bảo thư mục data tồn tại
 os.makedirs(os.path.dirname(CONTACTS_FILE), exist_ok=True)
@@ -17,82 +20,96 @@ if not os.path.exists(CONTACTS_FILE):
     with open(CONTACTS_FILE, 'w', encoding='utf-8') as f:
         json.dump([], f)
 
-def load_contacts():
-    try:
-        with open(CONTACTS_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except:
-        return []
-
-def save_contacts(contacts):
+def save_contact(contact):
+    # Chỉ ghi thêm liên hệ mới, không ghi lại toàn bộ danh sách
     try:
         # Kiểm tra quyền ghi
         if not os.access(os.path.dirname(CONTACTS_FILE), os.W_OK):
             raise PermissionError(f'No write permission for {CONTACTS_FILE}')
             
-        with open(CONTACTS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(contacts, f, ensure_ascii=False, indent=2)
+        get_collection('contacts').insert(contact)
     except Exception as e:
         logger.error(f'Error saving contacts: {str(e)}', exc_info=True)
         raise
 
-# Cấu hình logger
+# Cấu hình logger (mức log và handler do setup_logging của app quyết định)
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.DEBUG)
 
 @api.route('')
 class ContactList(Resource):
+    @api.doc(params={
+        'email': 'Lọc theo email người gửi',
+        'subject': 'Lọc theo chủ đề',
+        'sort': 'Trường sắp xếp, mặc định -created_at',
+        'limit': 'Số liên hệ mỗi trang',
+        'cursor': 'Cursor của trang tiếp theo (trang sau trả về trong header X-Next-Cursor)'
+    })
+    @conditional('contacts')
     def get(self):
         """Lấy danh sách liên hệ"""
         try:
-            contacts = load_contacts()
-            # Sắp xếp theo thời gian tạo giảm dần
-            contacts.sort(key=lambda x: x['created_at'], reverse=True)
-            return contacts
+            # Mặc định sắp xếp theo thời gian tạo giảm dần
+            query = parse_list_query(
+                filters=('email', 'subject'),
+                sorts=('id', 'created_at', 'name'),
+                default_sort='-created_at'
+            )
+            contacts, total = get_collection('contacts').query(query.filters, query.sort, query.limit, query.offset)
+            if not query.paginated:
+                return contacts
+            # Giữ nguyên dạng danh sách, thông tin phân trang nằm trong header
+            pagination = query.pagination(total)
+            headers = {'X-Total-Count': str(total)}
+            if pagination['next_cursor']:
+                headers['X-Next-Cursor'] = pagination['next_cursor']
+            return contacts, 200, headers
+        except ValueError as ve:
+            return {'error': str(ve)}, 400
         except Exception as e:
             return [], 200
 
     def post(self):
         """Thêm liên hệ mới"""
         try:
-            logger.debug('Receiving contact form data')
             data = request.get_json()
             if not data:
-                logger.error('No JSON data received')
+                logger.info('No JSON data received')
                 return {'error': 'Invalid request data'}, 400
                 
-            logger.debug(f'Received data: {data}')
+            # Chỉ ghi tên các trường: nội dung liên hệ có email và thông tin cá nhân
+            logger.debug('Received contact form', extra={'fields': sorted(data)})
             
             # Validate dữ liệu trước khi load contacts
             required_fields = ['name', 'email', 'subject', 'message']
             for field in required_fields:
                 if not data.get(field):
-                    logger.error(f'Missing field: {field}')
+                    logger.info(f'Missing field: {field}')
                     return {'error': f'Thiếu trường {field}'}, 400
 
-            try:
-                contacts = load_contacts()
-            except Exception as e:
-                logger.error(f'Error loading contacts: {str(e)}')
-                contacts = []
+            contacts = get_collection('contacts')
+            with contacts.lock():
+                try:
+                    new_id = contacts.next_id()
+                except Exception as e:
+                    logger.error(f'Error loading contacts: {str(e)}')
+                    new_id = 1
 
-            new_contact = {
-                'id': len(contacts) + 1,
-                'name': data['name'],
-                'email': data['email'],
-                'subject': data['subject'],
-                'message': data['message'],
-                'created_at': datetime.now().isoformat()
-            }
-            
-            try:
-                contacts.append(new_contact)
-                save_contacts(contacts)
-                logger.info('Contact saved successfully')
-                return new_contact, 201
-            except Exception as e:
-                logger.error(f'Error saving contact: {str(e)}')
-                return {'error': 'Could not save contact'}, 500
+                new_contact = {
+                    'id': new_id,
+                    'name': data['name'],
+                    'email': data['email'],
+                    'subject': data['subject'],
+                    'message': data['message'],
+                    'created_at': datetime.now().isoformat()
+                }
+                
+                try:
+                    save_contact(new_contact)
+                    logger.info('Contact saved successfully', extra={'contact_id': new_id})
+                    return new_contact, 201
+                except Exception as e:
+                    logger.error(f'Error saving contact: {str(e)}')
+                    return {'error': 'Could not save contact'}, 500
                 
         except Exception as e:
             logger.error(f'Unexpected error: {str(e)}', exc_info=True)
@@ -103,9 +120,7 @@ class ContactDetail(Resource):
     def delete(self, id):
         """Xóa một liên hệ"""
         try:
-            contacts = load_contacts()
-            contacts = [c for c in contacts if c['id'] != id]
-            save_contacts(contacts)
+            get_collection('contacts').remove(id)
             return '', 204
         except Exception as e:
             return {'error': str(e)}, 500 
\ No newline at end of file
@@ -2,14 +2,21 @@ from flask import request, jsonify, make_response, current_app, url_for
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required
 from ..models.event import Event
+from ..utils.client_ip import client_ip
+from ..utils.http_cache import conditional
+from ..utils.images import queue_image_upload
+from ..utils.listing import parse_list_query
+from ..utils.response_cache import cached_response
 from http import HTTPStatus
-import traceback
+import logging
 import os
 from werkzeug.utils import secure_filename
 import time
 
 api = Namespace('events', description='Quản lý sự kiện')
 
+logger = logging.getLogger(__name__)
+
 event_model = api.model('Event', {
     'title': fields.String(required=True),
     'description': fields.String(required=True),
@@ -25,19 +32,38 @@ event_model = api.model('Event', {
 
 @api.route('/')
 class EventList(Resource):
-    @api.doc('list_events')
+    @api.doc('list_events', params={
+        'status': 'Lọc theo trạng thái (past, ongoing, upcoming)',
+        'organizer': 'Lọc theo đơn vị tổ chức',
+        'sort': 'Trường sắp xếp, thêm - để giảm dần (id, date, title)',
+        'limit': 'Số sự kiện mỗi trang',
+        'cursor': 'Cursor của trang tiếp theo'
+    })
+    @conditional('events', registrations=True, daily=True)
+    @cached_response('events', registrations=True, daily=True)
     def get(self):
         """Lấy danh sách tất cả sự kiện"""
         try:
-            Event.update_status()  # Cập nhật trạng thái trước khi trả về
-            events = Event.get_all()
-            return {
+            # Trạng thái được tính theo ngày khi tạo đối tượng, không cần ghi lại file
+            query = parse_list_query(
+                filters=('status', 'organizer'),
+                sorts=('id', 'date', 'title')
+            )
+            events, total = Event.query(query.filters, query.sort, query.limit, query.offset)
+            response = {
                 'message': 'Lấy danh sách sự kiện thành công',
                 'data': [event.__dict__ for event in events]
-            }, HTTPStatus.OK
+            }
+            if query.paginated:
+                response['pagination'] = query.pagination(total)
+            return response, HTTPStatus.OK
+        except ValueError as ve:
+            return {
+                'message': str(ve),
+                'error': 'INVALID_QUERY'
+            }, HTTPStatus.BAD_REQUEST
         except Exception as e:
-            print(f"Error getting events: {str(e)}")
-            print(traceback.format_exc())
+            logger.exception(f'Error getting events: {str(e)}')
             return {
                 'message': 'Lỗi khi lấy danh sách sự kiện',
                 'error': str(e)
@@ -61,8 +87,7 @@ class EventList(Resource):
                 'error': 'VALIDATION_ERROR'
             }, HTTPStatus.BAD_REQUEST
         except Exception as e:
-            print(f"Error creating event: {str(e)}")
-            print(traceback.format_exc())
+            logger.exception(f'Error creating event: {str(e)}')
             return {
                 'message': 'Lỗi khi tạo sự kiện mới',
                 'error': str(e)
@@ -71,6 +96,7 @@ class EventList(Resource):
 @api.route('/<int:id>')
 class EventResource(Resource):
     @api.doc('get_event')
+    @conditional('events', registrations=True, daily=True)
     def get(self, id):
         """Lấy thông tin một sự kiện"""
         try:
@@ -161,29 +187,36 @@ class EventImageUpload(Resource):
                     'error': 'INVALID_FILE_TYPE'
                 }, HTTPStatus.BAD_REQUEST
 
-            # Tạo tên file an toàn với timestamp
-            event_title = request.form.get('title', 'event')
-            timestamp = int(time.time())
             file_extension = file.filename.rsplit('.', 1)[1].lower()
-            filename = secure_filename(f"{event_title}_{timestamp}.{file_extension}")
             
-            # Lưu file
-            file_path = os.path.join(current_app.config['UPLOAD_FOLDER_EVENTS'], filename)
-            file.save(file_path)
+            # Lưu file gốc theo mã băm nội dung, các biến thể thumb/card/full được tạo ở job nền
+            try:
+                data = queue_image_upload(
+                    file.stream,
+                    current_app.config['UPLOAD_FOLDER_EVENTS'],
+                    file_extension,
+                    lambda name: url_for('serve_event_image', filename=name, _external=True)
+                )
+            except ValueError as ve:
+                return {
+                    'message': str(ve),
+                    'error': 'INVALID_IMAGE'
+                }, HTTPStatus.BAD_REQUEST
 
-            # Trả về URL của ảnh
-            image_url = url_for('serve_event_image', filename=filename, _external=True)
+            # Ảnh mới: trả về ngay URL tạm cùng job để theo dõi, ảnh đã có: trả về srcset đầy đủ
+            if 'job' in data:
+                return {
+                    'message': 'Đã nhận ảnh, đang xử lý',
+                    'data': data
+                }, HTTPStatus.ACCEPTED
             
             return {
                 'message': 'Upload ảnh thành công',
-                'data': {
-                    'url': image_url
-                }
+                'data': data
             }, HTTPStatus.OK
 
         except Exception as e:
-            print("Error uploading event image:", str(e))
-            print(traceback.format_exc())
+            logger.exception(f'Error uploading event image: {str(e)}')
             return {
                 'message': 'Lỗi khi upload ảnh',
                 'error': str(e)
@@ -195,12 +228,8 @@ class EventRegistration(Resource):
     def post(self, id):
         """Xác nhận tham gia sự kiện"""
         try:
-            # Lấy IP của người dùng
-            ip_address = request.remote_addr
-            if request.headers.getlist("X-Forwarded-For"):
-                ip_address = request.headers.getlist("X-Forwarded-For")[0]
-
-            event, status = Event.increment_participants(id, ip_address)
+            # Lấy IP của người dùng (header proxy chỉ được tin khi đi qua tunnel)
+            event, status = Event.increment_participants(id, client_ip())
             
             if status == "SUCCESS":
                 return {
@@ -224,8 +253,7 @@ class EventRegistration(Resource):
                 }, HTTPStatus.NOT_FOUND
 
         except Exception as e:
-            print("Error registering for event:", str(e))
-            print(traceback.format_exc())
+            logger.exception(f'Error registering for event: {str(e)}')
             return {
                 'message': 'Lỗi khi đăng ký tham gia',
                 'error': str(e)
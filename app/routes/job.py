@@ -0,0 +1,31 @@
+from flask_restx import Namespace, Resource
+from http import HTTPStatus
+from ..storage import get_job_store
+
+api = Namespace('jobs', description='Trạng thái công việc nền')
+
+@api.route('/<string:id>')
+class JobResource(Resource):
+    @api.doc('get_job')
+    def get(self, id):
+        """Lấy trạng thái job (xử lý ảnh sau upload, dọn file)"""
+        job = get_job_store().get(id)
+        if not job:
+            return {
+                'message': 'Không tìm thấy job',
+                'error': 'JOB_NOT_FOUND'
+            }, HTTPStatus.NOT_FOUND
+
+        return {
+            'message': 'Lấy trạng thái job thành công',
+            'data': {
+                'id': job['id'],
+                'kind': job['kind'],
+                'status': job['status'],
+                'attempts': job['attempts'],
+                'result': job['result'],
+                'error': job['error'],
+                'created_at': job['created_at'],
+                'updated_at': job['updated_at']
+            }
+        }, HTTPStatus.OK
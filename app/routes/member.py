@@ -2,15 +2,21 @@ from flask import request, jsonify, make_response
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from ..models.member import Member
+from ..utils.http_cache import conditional
+from ..utils.images import queue_image_upload
+from ..utils.listing import parse_list_query
+from ..utils.response_cache import cached_response
 from http import HTTPStatus
 import os
 from werkzeug.utils import secure_filename
 from flask import current_app, url_for
+import logging
 import time
-import traceback
 
 api = Namespace('members', description='Quản lý thành viên')
 
+logger = logging.getLogger(__name__)
+
 # Định nghĩa model cho API documentation
 links_model = api.model('Links', {
     'facebook': fields.String(required=True),
@@ -31,15 +37,36 @@ member_model = api.model('Member', {
 
 @api.route('/')
 class MemberList(Resource):
-    @api.doc('list_members')
+    @api.doc('list_members', params={
+        'team': 'Lọc theo team',
+        'department': 'Lọc theo phòng ban',
+        'year': 'Lọc theo năm hoạt động',
+        'sort': 'Trường sắp xếp, thêm - để giảm dần (id, name, team, department, year)',
+        'limit': 'Số thành viên mỗi trang',
+        'cursor': 'Cursor của trang tiếp theo'
+    })
+    @conditional('members')
+    @cached_response('members')
     def get(self):
         """Lấy danh sách tất cả thành viên"""
         try:
-            members = Member.get_all()
-            return {
+            query = parse_list_query(
+                filters=('team', 'department', 'year'),
+                sorts=('id', 'name', 'team', 'department', 'year')
+            )
+            members, total = Member.query(query.filters, query.sort, query.limit, query.offset)
+            response = {
                 'message': 'Lấy danh sách thành viên thành công',
                 'data': [member.__dict__ for member in members]
-            }, HTTPStatus.OK
+            }
+            if query.paginated:
+                response['pagination'] = query.pagination(total)
+            return response, HTTPStatus.OK
+        except ValueError as ve:
+            return {
+                'message': str(ve),
+                'error': 'INVALID_QUERY'
+            }, HTTPStatus.BAD_REQUEST
         except Exception as e:
             return {
                 'message': 'Lỗi khi lấy danh sách thành viên',
@@ -53,7 +80,7 @@ class MemberList(Resource):
         """Tạo thành viên mới"""
         try:
             data = request.get_json()
-            print("Received data:", data)
+            logger.debug('Creating member', extra={'fields': sorted(data or {})})
             
             if not data:
                 return make_response(jsonify({
@@ -77,15 +104,16 @@ class MemberList(Resource):
             }), HTTPStatus.CREATED)
             
         except Exception as e:
-            print("Error:", str(e))
+            logger.exception(f'Error creating member: {str(e)}')
             return make_response(jsonify({
                 'message': 'Lỗi khi tạo thành viên mới',
                 'error': str(e)
             }), HTTPStatus.INTERNAL_SERVER_ERROR)
 
-@api.route('/', '/<string:id>')
+@api.route('/', '/<int:id>')
 class MemberResource(Resource):
     @api.doc('get_member')
+    @conditional('members')
     def get(self, id):
         """Lấy thông tin một thành viên theo ID"""
         try:
@@ -111,13 +139,11 @@ class MemberResource(Resource):
     def put(self, id):
         """Cập nhật thông tin thành viên"""
         try:
-            print(f"Attempting to update member with ID: {id}")
             member_id = int(id)
             
             # Kiểm tra member có tồn tại không
             existing_member = Member.get_by_id(member_id)
             if not existing_member:
-                print(f"Member with ID {member_id} not found")
                 return make_response(jsonify({
                     'message': 'Không tìm thấy thành viên',
                     'error': 'NOT_FOUND'
@@ -125,10 +151,8 @@ class MemberResource(Resource):
 
             # Lấy và kiểm tra dữ liệu gửi lên
             data = request.get_json()
-            print(f"Received update data:", data)
             
             if not data:
-                print("No data received in update request")
                 return make_response(jsonify({
                     'message': 'Không có dữ liệu được gửi lên',
                     'error': 'NO_DATA'
@@ -139,7 +163,7 @@ class MemberResource(Resource):
             missing_fields = [field for field in required_fields if field not in data]
             
             if missing_fields:
-                print(f"Missing required fields: {missing_fields}")
+                logger.info('Member update rejected', extra={'member_id': member_id, 'missing_fields': missing_fields})
                 return make_response(jsonify({
                     'message': f'Thiếu các trường bắt buộc: {", ".join(missing_fields)}',
                     'error': 'MISSING_FIELDS'
@@ -148,20 +172,18 @@ class MemberResource(Resource):
             # Thực hiện cập nhật
             updated_member = Member.update(member_id, data)
             if updated_member:
-                print(f"Successfully updated member with ID {member_id}")
                 return make_response(jsonify({
                     'message': 'Cập nhật thành viên thành công',
                     'data': updated_member.__dict__
                 }), HTTPStatus.OK)
             
-            print(f"Failed to update member with ID {member_id}")
+            logger.error(f'Failed to update member {member_id}')
             return make_response(jsonify({
                 'message': 'Không thể cập nhật thành viên',
                 'error': 'UPDATE_FAILED'
             }), HTTPStatus.INTERNAL_SERVER_ERROR)
 
         except ValueError as ve:
-            print(f"Invalid ID format: {id}")
             return make_response(jsonify({
                 'message': 'ID không hợp lệ',
                 'error': 'INVALID_ID',
@@ -169,7 +191,7 @@ class MemberResource(Resource):
             }), HTTPStatus.BAD_REQUEST)
             
         except Exception as e:
-            print(f"Error updating member: {str(e)}")
+            logger.exception(f'Error updating member: {str(e)}')
             return make_response(jsonify({
                 'message': 'Lỗi khi cập nhật thành viên',
                 'error': 'INTERNAL_ERROR',
@@ -181,31 +203,27 @@ class MemberResource(Resource):
     def delete(self, id):
         """Xóa thành viên"""
         try:
-            print(f"Attempting to delete member with ID: {id}")
             member_id = int(id)
             
             member = Member.get_by_id(member_id)
             if not member:
-                print(f"Member with ID {member_id} not found")
                 return make_response(jsonify({
                     'message': 'Không tìm thấy thành viên',
                     'error': 'NOT_FOUND'
                 }), HTTPStatus.NOT_FOUND)
             
             if Member.delete(member_id):
-                print(f"Successfully deleted member with ID {member_id}")
                 return make_response(jsonify({
                     'message': 'Xóa thành viên thành công'
                 }), HTTPStatus.OK)
             
-            print(f"Failed to delete member with ID {member_id}")
+            logger.error(f'Failed to delete member {member_id}')
             return make_response(jsonify({
                 'message': 'Không thể xóa thành viên',
                 'error': 'DELETE_FAILED'
             }), HTTPStatus.INTERNAL_SERVER_ERROR)
             
         except ValueError as ve:
-            print(f"Invalid ID format: {id}")
             return make_response(jsonify({
                 'message': 'ID không hợp lệ',
                 'error': 'INVALID_ID',
@@ -213,7 +231,7 @@ class MemberResource(Resource):
             }), HTTPStatus.BAD_REQUEST)
             
         except Exception as e:
-            print(f"Error deleting member: {str(e)}")
+            logger.exception(f'Error deleting member: {str(e)}')
             return make_response(jsonify({
                 'message': 'Lỗi khi xóa thành viên',
                 'error': 'INTERNAL_ERROR',
@@ -252,30 +270,37 @@ class MemberAvatarUpload(Resource):
                     'error': 'INVALID_FILE_TYPE'
                 }, HTTPStatus.BAD_REQUEST
 
-            # Tạo tên file an toàn với timestamp
-            member_name = request.form.get('name', 'member')
-            timestamp = int(time.time())
             file_extension = file.filename.rsplit('.', 1)[1].lower()
-            filename = secure_filename(f"{member_name}_{timestamp}.{file_extension}")
             
-            # Lưu file
+            # Lưu file gốc theo mã băm nội dung, các biến thể thumb/card/full được tạo ở job nền
             # Thay đổi từ UPLOAD_FOLDER thành UPLOAD_FOLDER_MEMBERS
-            file_path = os.path.join(current_app.config['UPLOAD_FOLDER_MEMBERS'], filename)
-            file.save(file_path)
+            try:
+                data = queue_image_upload(
+                    file.stream,
+                    current_app.config['UPLOAD_FOLDER_MEMBERS'],
+                    file_extension,
+                    lambda name: url_for('serve_member_image', filename=name, _external=True)
+                )
+            except ValueError as ve:
+                return {
+                    'message': str(ve),
+                    'error': 'INVALID_IMAGE'
+                }, HTTPStatus.BAD_REQUEST
 
-            # Trả về URL của ảnh
-            image_url = url_for('serve_member_image', filename=filename, _external=True)
+            # Ảnh mới: trả về ngay URL tạm cùng job để theo dõi, ảnh đã có: trả về srcset đầy đủ
+            if 'job' in data:
+                return {
+                    'message': 'Đã nhận ảnh, đang xử lý',
+                    'data': data
+                }, HTTPStatus.ACCEPTED
             
             return {
                 'message': 'Upload avatar thành công',
-                'data': {
-                    'url': image_url
-                }
+                'data': data
             }, HTTPStatus.OK
 
         except Exception as e:
-            print("Error uploading member avatar:", str(e))
-            print(traceback.format_exc())
+            logger.exception(f'Error uploading member avatar: {str(e)}')
             return {
                 'message': 'Lỗi khi upload avatar',
                 'error': str(e)
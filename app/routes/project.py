@@ -2,14 +2,19 @@ from flask import request, jsonify, make_response, current_app, url_for
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required
 from ..models.project import Project
+from ..utils.http_cache import conditional
+from ..utils.listing import parse_list_query
+from ..utils.response_cache import cached_response
 from http import HTTPStatus
-import traceback
+import logging
 import os
 from werkzeug.utils import secure_filename
 import time
 
 api = Namespace('projects', description='Quản lý dự án')
 
+logger = logging.getLogger(__name__)
+
 project_model = api.model('Project', {
     'title': fields.String(required=True),
     'description': fields.String(required=True),
@@ -25,18 +30,36 @@ project_model = api.model('Project', {
 
 @api.route('/')
 class ProjectList(Resource):
-    @api.doc('list_projects')
+    @api.doc('list_projects', params={
+        'category': 'Lọc theo loại dự án',
+        'sort': 'Trường sắp xếp, thêm - để giảm dần (id, title, progress, teamSize)',
+        'limit': 'Số dự án mỗi trang',
+        'cursor': 'Cursor của trang tiếp theo'
+    })
+    @conditional('projects')
+    @cached_response('projects')
     def get(self):
         """Lấy danh sách tất cả dự án"""
         try:
-            projects = Project.get_all()
-            return {
+            query = parse_list_query(
+                filters=('category',),
+                sorts=('id', 'title', 'progress', 'teamSize')
+            )
+            projects, total = Project.query(query.filters, query.sort, query.limit, query.offset)
+            response = {
                 'message': 'Lấy danh sách dự án thành công',
                 'data': [project.__dict__ for project in projects]
-            }, HTTPStatus.OK
+            }
+            if query.paginated:
+                response['pagination'] = query.pagination(total)
+            return response, HTTPStatus.OK
+        except ValueError as ve:
+            return {
+                'message': str(ve),
+                'error': 'INVALID_QUERY'
+            }, HTTPStatus.BAD_REQUEST
         except Exception as e:
-            print(f"Error getting projects: {str(e)}")
-            print(traceback.format_exc())
+            logger.exception(f'Error getting projects: {str(e)}')
             return {
                 'message': 'Lỗi khi lấy danh sách dự án',
                 'error': str(e)
@@ -55,8 +78,7 @@ class ProjectList(Resource):
                 'data': new_project.__dict__
             }, HTTPStatus.CREATED
         except Exception as e:
-            print(f"Error creating project: {str(e)}")
-            print(traceback.format_exc())
+            logger.exception(f'Error creating project: {str(e)}')
             return {
                 'message': 'Lỗi khi tạo dự án mới',
                 'error': str(e)
@@ -65,6 +87,7 @@ class ProjectList(Resource):
 @api.route('/<int:id>')
 class ProjectResource(Resource):
     @api.doc('get_project')
+    @conditional('projects')
     def get(self, id):
         """Lấy thông tin một dự án"""
         try:
@@ -0,0 +1,140 @@
+import os
+import threading
+from typing import Dict, Tuple, Union
+
+from config import Config
+from .jobs import JobStore
+from .journal import JournaledJsonCollection
+from .json_store import JsonCollection, JsonFileCache, cache
+from .metrics import MetricsStore
+from .ratelimits import RateLimitStore
+from .registrations import RegistrationStore
+from .revocations import TokenRevocationStore
+from .sqlite_store import SqliteCollection
+
+# Tên collection -> (file JSON, khóa chứa danh sách, cột cần index, cột unique)
+COLLECTIONS: Dict[str, Tuple[str, Union[str, None], Tuple[str, ...], Tuple[str, ...]]] = {
+    'members': ('members.json', 'members', ('team', 'department'), ()),
+    'events': ('events.json', 'events', ('date', 'status'), ()),
+    'projects': ('projects.json', 'projects', ('category',), ()),
+    'banners': ('banners.json', None, ('order', 'active', 'created_at'), ()),
+    'contacts': ('contacts.json', None, ('created_at', 'email'), ()),
+    'users': ('db.json', 'users', (), ('username',)),
+}
+
+# Collection chủ yếu được thêm mới (form liên hệ) dùng nhật ký append-only ở backend JSON
+JOURNALED_COLLECTIONS = {'contacts'}
+
+_collections: Dict[tuple, Union[JsonCollection, SqliteCollection]] = {}
+_collections_lock = threading.Lock()
+
+
+def data_file_path(name: str) -> str:
+    return os.path.join(Config.DATA_DIR, COLLECTIONS[name][0])
+
+
+def get_collection(name: str) -> Union[JsonCollection, SqliteCollection]:
+    """Trả về collection theo backend đang cấu hình (``STORAGE_BACKEND``)"""
+    backend = Config.STORAGE_BACKEND
+    path = data_file_path(name)
+    cache_key = (backend, name, path, Config.SQLITE_DATABASE)
+
+    collection = _collections.get(cache_key)
+    if collection is not None:
+        return collection
+
+    with _collections_lock:
+        collection = _collections.get(cache_key)
+        if collection is None:
+            _, key, indexes, unique = COLLECTIONS[name]
+            # Backend JSON dựng index phụ cho cả cột unique (vd. tra user theo username)
+            legacy = JsonCollection(path, key, indexes + unique)
+            if backend == 'json' and name in JOURNALED_COLLECTIONS:
+                collection = JournaledJsonCollection(path, key, indexes + unique, Config.JOURNAL_COMPACT_EVERY)
+            elif backend == 'json':
+                collection = legacy
+            elif backend == 'sqlite':
+                collection = SqliteCollection(
+                    Config.SQLITE_DATABASE, name, indexes, unique, legacy=legacy
+                )
+            else:
+                raise ValueError(f'Unknown STORAGE_BACKEND: {backend}')
+            _collections[cache_key] = collection
+        return collection
+
+
+_registration_stores: Dict[str, RegistrationStore] = {}
+
+
+def get_registration_store() -> RegistrationStore:
+    """Kho đăng ký sự kiện dùng chung giữa các worker (luôn là SQLite)"""
+    database = Config.SQLITE_DATABASE
+    store = _registration_stores.get(database)
+    if store is None:
+        with _collections_lock:
+            store = _registration_stores.setdefault(database, RegistrationStore(database))
+    return store
+
+
+_job_stores: Dict[str, JobStore] = {}
+
+
+def get_job_store() -> JobStore:
+    """Hàng đợi công việc nền dùng chung giữa các worker (luôn là SQLite)"""
+    database = Config.JOBS_DATABASE
+    store = _job_stores.get(database)
+    if store is None:
+        with _collections_lock:
+            store = _job_stores.setdefault(database, JobStore(database))
+    return store
+
+
+_revocation_stores: Dict[str, TokenRevocationStore] = {}
+
+
+def get_revocation_store() -> TokenRevocationStore:
+    """Danh sách token bị thu hồi dùng chung giữa các worker (luôn là SQLite)"""
+    database = Config.REVOCATIONS_DATABASE
+    store = _revocation_stores.get(database)
+    if store is None:
+        with _collections_lock:
+            store = _revocation_stores.setdefault(database, TokenRevocationStore(database))
+    return store
+
+
+
+_rate_limit_stores: Dict[str, RateLimitStore] = {}
+
+
+def get_rate_limit_store() -> RateLimitStore:
+    """Bộ đếm giới hạn tần suất dùng chung giữa các worker (luôn là SQLite)"""
+    database = Config.RATE_LIMITS_DATABASE
+    store = _rate_limit_stores.get(database)
+    if store is None:
+        with _collections_lock:
+            store = _rate_limit_stores.setdefault(database, RateLimitStore(database))
+    return store
+
+
+
+_metrics_stores: Dict[str, MetricsStore] = {}
+
+
+def get_metrics_store() -> MetricsStore:
+    """Số liệu request/lưu trữ của mọi worker (luôn là SQLite)"""
+    database = Config.METRICS_DATABASE
+    store = _metrics_stores.get(database)
+    if store is None:
+        with _collections_lock:
+            store = _metrics_stores.setdefault(database, MetricsStore(database))
+    return store
+
+
+__all__ = [
+    'COLLECTIONS', 'JOURNALED_COLLECTIONS', 'JournaledJsonCollection',
+    'JobStore', 'JsonCollection', 'JsonFileCache', 'MetricsStore',
+    'RateLimitStore', 'RegistrationStore', 'SqliteCollection',
+    'TokenRevocationStore', 'cache', 'data_file_path', 'get_collection',
+    'get_job_store', 'get_metrics_store', 'get_rate_limit_store',
+    'get_registration_store', 'get_revocation_store'
+]
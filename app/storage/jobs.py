@@ -0,0 +1,167 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from .sqlite_store import connect
+
+
+class JobStore:
+    """Hàng đợi công việc nền bền vững, lưu trong SQLite.
+
+    Mỗi job đi qua các trạng thái ``queued`` -> ``running`` -> ``done`` hoặc
+    ``failed``. Việc nhận job là một ``UPDATE`` có điều kiện trong
+    transaction ``BEGIN IMMEDIATE`` nên nhiều worker (thread lẫn process) lấy
+    chung một hàng đợi mà không job nào chạy hai lần. Job đang chạy mà quá
+    hạn ``lease`` (worker chết giữa chừng) được đưa lại vào hàng đợi.
+    """
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    def __init__(self, database: str, lease: float = 600, max_attempts: int = 3):
+        self.database = database
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self._ready = False
+        self._ready_lock = threading.Lock()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = connect(self.database)
+        if not self._ready:
+            with self._ready_lock:
+                if not self._ready:
+                    with conn:
+                        conn.execute(
+                            'CREATE TABLE IF NOT EXISTS jobs ('
+                            'id TEXT PRIMARY KEY, '
+                            'kind TEXT NOT NULL, '
+                            'payload TEXT NOT NULL, '
+                            'status TEXT NOT NULL, '
+                            'attempts INTEGER NOT NULL DEFAULT 0, '
+                            'result TEXT, '
+                            'error TEXT, '
+                            'created_at REAL NOT NULL, '
+                            'updated_at REAL NOT NULL, '
+                            'lease_until REAL)'
+                        )
+                        conn.execute('CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)')
+                        conn.execute('CREATE INDEX IF NOT EXISTS jobs_kind ON jobs (kind, created_at)')
+                    self._ready = True
+        return conn
+
+    @staticmethod
+    def _row(row: sqlite3.Row) -> Dict[str, Any]:
+        id, kind, payload, status, attempts, result, error, created_at, updated_at = row
+        return {
+            'id': id,
+            'kind': kind,
+            'payload': json.loads(payload),
+            'status': status,
+            'attempts': attempts,
+            'result': json.loads(result) if result is not None else None,
+            'error': error,
+            'created_at': created_at,
+            'updated_at': updated_at
+        }
+
+    def enqueue(self, kind: str, payload: Dict[str, Any]) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                'INSERT INTO jobs (id, kind, payload, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (job_id, kind, json.dumps(payload, ensure_ascii=False), self.QUEUED, now, now)
+            )
+        return job_id
+
+    def enqueue_periodic(self, kind: str, payload: Dict[str, Any], interval: float) -> Optional[str]:
+        """Xếp job nếu ``interval`` giây qua chưa có job cùng loại được xếp.
+
+        Mọi worker đều gọi theo chu kỳ của mình; kiểm tra và thêm nằm trong
+        một transaction ``BEGIN IMMEDIATE`` nên mỗi chu kỳ chỉ có một job.
+        """
+        now = time.time()
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            recent = conn.execute(
+                'SELECT 1 FROM jobs WHERE kind = ? AND created_at > ? LIMIT 1', (kind, now - interval)
+            ).fetchone()
+            if recent is not None:
+                conn.rollback()
+                return None
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                'INSERT INTO jobs (id, kind, payload, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (job_id, kind, json.dumps(payload, ensure_ascii=False), self.QUEUED, now, now)
+            )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        return job_id
+
+    def claim(self) -> Optional[Dict[str, Any]]:
+        """Nhận job cũ nhất đang chờ (hoặc job quá hạn lease), None nếu hàng đợi trống"""
+        now = time.time()
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT id FROM jobs WHERE status = ? OR (status = ? AND lease_until < ?) '
+                'ORDER BY created_at LIMIT 1',
+                (self.QUEUED, self.RUNNING, now)
+            ).fetchone()
+            if row is None:
+                conn.rollback()
+                return None
+            conn.execute(
+                'UPDATE jobs SET status = ?, attempts = attempts + 1, updated_at = ?, lease_until = ? WHERE id = ?',
+                (self.RUNNING, now, now + self.lease, row[0])
+            )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        return self.get(row[0])
+
+    def complete(self, job_id: str, result: Any = None) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                'UPDATE jobs SET status = ?, result = ?, error = NULL, updated_at = ?, lease_until = NULL WHERE id = ?',
+                (self.DONE, json.dumps(result, ensure_ascii=False), time.time(), job_id)
+            )
+
+    def fail(self, job_id: str, error: str) -> None:
+        """Ghi lỗi; job được xếp hàng lại cho tới khi hết ``max_attempts`` lượt"""
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                'UPDATE jobs SET status = CASE WHEN attempts < ? THEN ? ELSE ? END, '
+                'error = ?, updated_at = ?, lease_until = NULL WHERE id = ?',
+                (self.max_attempts, self.QUEUED, self.FAILED, error, time.time(), job_id)
+            )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(
+            'SELECT id, kind, payload, status, attempts, result, error, created_at, updated_at '
+            'FROM jobs WHERE id = ?',
+            (job_id,)
+        ).fetchone()
+        return self._row(row) if row else None
+
+    def purge(self, older_than: float) -> int:
+        """Xóa job đã xong hoặc thất bại cũ hơn ``older_than`` giây"""
+        conn = self._conn()
+        with conn:
+            return conn.execute(
+                'DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?',
+                (self.DONE, self.FAILED, time.time() - older_than)
+            ).rowcount
@@ -0,0 +1,192 @@
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .json_store import JsonCollection
+from .query import RecordIndex
+from .timing import timed
+
+
+class JournaledJsonCollection(JsonCollection):
+    """``JsonCollection`` ghi thay đổi vào một nhật ký append-only.
+
+    Mỗi ``insert``/``replace``/``remove`` chỉ thêm một dòng JSON vào file
+    ``<tên>.log.jsonl`` nên chi phí không phụ thuộc vào số bản ghi. Khi đọc,
+    snapshot (file JSON gốc) được ghép với các dòng nhật ký; phần nhật ký
+    chỉ đọc thêm từ vị trí lần trước và các dòng mới được áp dụng thẳng lên
+    chỉ mục đã ghép, nên ``next_id``/``get`` sau mỗi lần ghi không phải dựng
+    lại chỉ mục. Khi nhật ký đủ ``compact_every`` dòng, một thread nền gộp nó
+    vào snapshot.
+
+    Các thao tác trong nhật ký đều idempotent (áp dụng theo id), nên nếu
+    tiến trình dừng giữa lúc gộp thì đọc lại vẫn cho kết quả đúng.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        key: Optional[str] = None,
+        indexes: Sequence[str] = (),
+        compact_every: int = 200
+    ):
+        super().__init__(path, key, indexes)
+        self.log_path = os.path.splitext(path)[0] + '.log.jsonl'
+        self.compact_every = compact_every
+        self._lock = threading.RLock()
+        self._log_inode: Optional[int] = None
+        self._log_offset = 0
+        self._log_entries: List[dict] = []
+        # Snapshot mà ``_merged`` được ghép từ đó
+        self._merged_from: Optional[List[dict]] = None
+        self._merged = RecordIndex([], self.indexes)
+        self._compacting = False
+
+    def _read_log(self) -> Optional[List[dict]]:
+        """Đọc các dòng mới được thêm vào nhật ký kể từ lần đọc trước.
+
+        Trả về các dòng mới, hoặc ``None`` nếu nhật ký đã bị xóa/tạo lại
+        (khi đó ``_log_entries`` là toàn bộ nhật ký hiện tại).
+        """
+        try:
+            st = os.stat(self.log_path)
+        except FileNotFoundError:
+            reset = self._log_inode is not None
+            self._log_inode, self._log_offset, self._log_entries = None, 0, []
+            return None if reset else []
+
+        reset = False
+        if st.st_ino != self._log_inode or st.st_size < self._log_offset:
+            # Nhật ký mới được tạo, hoặc đã được gộp và tạo lại
+            reset = self._log_inode is not None
+            self._log_inode, self._log_offset, self._log_entries = st.st_ino, 0, []
+        if st.st_size == self._log_offset:
+            return None if reset else []
+
+        with timed('io'):
+            with open(self.log_path, 'rb') as f:
+                f.seek(self._log_offset)
+                chunk = f.read(st.st_size - self._log_offset)
+        # Bỏ qua dòng cuối nếu đang ghi dở
+        end = chunk.rfind(b'\n') + 1
+        with timed('parse'):
+            entries = [json.loads(line) for line in chunk[:end].splitlines() if line.strip()]
+        self._log_entries.extend(entries)
+        self._log_offset += end
+        return None if reset else entries
+
+    def _replay(self, snapshot: List[dict], entries: List[dict]) -> RecordIndex:
+        merged: Dict[int, dict] = {record['id']: record for record in snapshot}
+        for entry in entries:
+            if entry['op'] == 'remove':
+                merged.pop(entry['id'], None)
+            else:
+                record = entry['record']
+                merged[record['id']] = record
+        return RecordIndex(list(merged.values()), self.indexes)
+
+    def _fresh(self, snapshot: List[dict]) -> bool:
+        """Chỉ mục đã ghép còn khớp với snapshot và nhật ký trên đĩa hay không (chỉ stat)"""
+        if self._merged_from is not snapshot:
+            return False
+        try:
+            st = os.stat(self.log_path)
+        except FileNotFoundError:
+            return self._log_inode is None
+        return (st.st_ino, st.st_size) == (self._log_inode, self._log_offset)
+
+    def _index(self) -> RecordIndex:
+        if self._fresh(super()._index().records):
+            return self._merged
+        # Đọc snapshot và nhật ký khi giữ khóa ghi: không thể ghép snapshot cũ
+        # với nhật ký đã bị worker khác gộp và xóa
+        with self.lock(), self._lock:
+            snapshot = super()._index().records
+            if self._merged_from is not snapshot:
+                # Snapshot mới (lần đầu, hoặc vừa được gộp): dựng lại từ đầu
+                self._log_inode, self._log_offset, self._log_entries = None, 0, []
+                self._read_log()
+                self._merged = self._replay(snapshot, self._log_entries)
+                self._merged_from = snapshot
+                return self._merged
+
+            entries = self._read_log()
+            if entries is None or any(entry['op'] == 'remove' for entry in entries):
+                # Nhật ký bị tạo lại, hoặc có bản ghi bị xóa (hiếm): dựng lại
+                self._merged = self._replay(snapshot, self._log_entries)
+            else:
+                # Chỉ áp dụng các dòng mới lên chỉ mục đã ghép
+                for entry in entries:
+                    self._merged.insert(entry['record'])
+            return self._merged
+
+    def version(self) -> Tuple[str, Optional[float]]:
+        snapshot_version, snapshot_modified = super().version()
+        try:
+            st = os.stat(self.log_path)
+        except FileNotFoundError:
+            return snapshot_version, snapshot_modified
+        modified = max(snapshot_modified or 0, st.st_mtime_ns / 1e9)
+        return f'{snapshot_version}+{st.st_ino:x}-{st.st_size:x}', modified
+
+    def _append(self, entry: dict) -> None:
+        with timed('dump'):
+            line = json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n'
+        with self.lock(), timed('io'):
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+            pending = len(self._log_entries) + 1
+        if pending >= self.compact_every:
+            self.compact_in_background()
+
+    def insert(self, record: dict) -> None:
+        self._append({'op': 'insert', 'record': record})
+
+    def replace(self, id: int, record: dict) -> bool:
+        with self.lock():
+            if self.get(id) is None:
+                return False
+            self._append({'op': 'replace', 'record': dict(record, id=id)})
+            return True
+
+    def remove(self, id: int) -> bool:
+        with self.lock():
+            if self.get(id) is None:
+                return False
+            self._append({'op': 'remove', 'id': id})
+            return True
+
+    def save_all(self, records: List[dict]) -> None:
+        with self.lock():
+            super().save_all(records)
+            self._remove_log()
+
+    def _remove_log(self) -> None:
+        try:
+            os.remove(self.log_path)
+        except FileNotFoundError:
+            pass
+
+    def compact(self) -> None:
+        """Gộp nhật ký vào snapshot rồi xóa nhật ký"""
+        with self.lock():
+            records = self._index().records
+            if self._log_inode is None:
+                return
+            JsonCollection.save_all(self, list(records))
+            self._remove_log()
+
+    def compact_in_background(self) -> None:
+        with self._lock:
+            if self._compacting:
+                return
+            self._compacting = True
+
+        def run():
+            try:
+                self.compact()
+            finally:
+                self._compacting = False
+
+        threading.Thread(target=run, name=f'compact-{os.path.basename(self.path)}', daemon=True).start()
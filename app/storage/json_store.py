@@ -0,0 +1,192 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .locks import SharedLock, atomic_write, file_lock
+from .metrics import metrics
+from .timing import timed
+from .query import Filter, RecordIndex, SortKey
+
+
+class _CacheEntry:
+    __slots__ = ('signature', 'data', 'derived')
+
+    def __init__(self, signature: Tuple[int, int, int], data: Any):
+        self.signature = signature
+        self.data = data
+        self.derived: Dict[str, Any] = {}
+
+
+class JsonFileCache:
+    """Giữ dữ liệu JSON đã parse trong bộ nhớ, chỉ đọc lại khi file thay đổi.
+
+    Một file được coi là thay đổi khi inode, mtime hoặc kích thước khác với
+    lần đọc trước. Dữ liệu trả về được dùng chung giữa các request nên
+    không được sửa trực tiếp - mọi thay đổi phải đi qua ``save``.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, _CacheEntry] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def signature(path: str) -> Tuple[int, int, int]:
+        st = os.stat(path)
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _entry(self, path: str) -> _CacheEntry:
+        signature = self.signature(path)
+        entry = self._entries.get(path)
+        if entry is not None and entry.signature == signature:
+            return entry
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.signature == signature:
+                return entry
+            started = time.perf_counter()
+            with timed('io'):
+                with open(path, 'rb') as f:
+                    raw = f.read()
+            with timed('parse'):
+                data = json.loads(raw)
+            labels = {'file': os.path.basename(path)}
+            metrics.observe('dsc_json_load_seconds', labels, time.perf_counter() - started)
+            metrics.inc('dsc_json_load_bytes_total', labels, signature[2])
+            entry = _CacheEntry(signature, data)
+            self._entries[path] = entry
+            return entry
+
+    def load(self, path: str) -> Any:
+        """Đọc file JSON (có cache). Ném FileNotFoundError nếu file không tồn tại"""
+        return self._entry(path).data
+
+    def derive(self, path: str, name: str, builder: Callable[[Any], Any]) -> Any:
+        """Trả về giá trị tính từ dữ liệu file, chỉ tính lại khi file thay đổi"""
+        entry = self._entry(path)
+        try:
+            return entry.derived[name]
+        except KeyError:
+            value = builder(entry.data)
+            entry.derived[name] = value
+            return value
+
+    def save(self, path: str, data: Any) -> None:
+        """Ghi nguyên tử (file tạm + rename); nên gọi khi đang giữ ``file_lock(path)``"""
+        started = time.perf_counter()
+        try:
+            with timed('dump'):
+                body = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+            with timed('io'):
+                atomic_write(path, body)
+            labels = {'file': os.path.basename(path)}
+            metrics.observe('dsc_json_save_seconds', labels, time.perf_counter() - started)
+            metrics.inc('dsc_json_save_bytes_total', labels, len(body))
+        finally:
+            self.invalidate(path)
+
+    def invalidate(self, path: str) -> None:
+        with self._lock:
+            self._entries.pop(path, None)
+
+
+cache = JsonFileCache()
+
+
+class JsonCollection:
+    """Một danh sách bản ghi trong file JSON.
+
+    ``key`` là tên khóa chứa danh sách (vd. ``{"members": [...]}``); để
+    ``None`` nếu cả file là một danh sách như banners.json và contacts.json.
+    ``indexes`` là các trường được dựng index phụ để lọc nhanh.
+    """
+
+    def __init__(self, path: str, key: Optional[str] = None, indexes: Sequence[str] = ()):
+        self.path = path
+        self.key = key
+        self.indexes = tuple(indexes)
+
+    def lock(self) -> SharedLock:
+        """Khóa ghi của collection, dùng để gộp nhiều thao tác (vd. ``next_id`` + ``insert``)"""
+        return file_lock(self.path)
+
+    def _records(self, data: Any) -> List[dict]:
+        if self.key is None:
+            return data
+        return data.get(self.key, [])
+
+    def _build_index(self, data: Any) -> RecordIndex:
+        return RecordIndex(self._records(data), self.indexes)
+
+    def _index(self) -> RecordIndex:
+        """Chỉ mục của phiên bản dữ liệu hiện tại - dựng lại khi file đổi"""
+        try:
+            return cache.derive(self.path, 'index', self._build_index)
+        except FileNotFoundError:
+            return RecordIndex([], self.indexes)
+
+    def version(self) -> Tuple[str, Optional[float]]:
+        """(mã phiên bản, thời điểm sửa cuối) lấy từ stat của file, không đọc nội dung"""
+        try:
+            inode, mtime_ns, size = cache.signature(self.path)
+        except FileNotFoundError:
+            return '0', None
+        return f'{inode:x}-{mtime_ns:x}-{size:x}', mtime_ns / 1e9
+
+    def all(self) -> List[dict]:
+        """Danh sách bản ghi dùng chung với cache, chỉ được đọc"""
+        return self._index().records
+
+    def get(self, id: int) -> Optional[dict]:
+        return self._index().get(id)
+
+    def find(self, field: str, value: Any) -> Optional[dict]:
+        return self._index().find(field, value)
+
+    def next_id(self) -> int:
+        return self._index().max_id + 1
+
+    def query(
+        self,
+        filters: Sequence[Filter] = (),
+        sort: Sequence[SortKey] = (),
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> Tuple[List[dict], int]:
+        """Lọc, sắp xếp và phân trang; trả về (bản ghi của trang, tổng số bản ghi khớp)"""
+        return self._index().query(filters, sort, limit, offset)
+
+    # Các thao tác ghi đọc lại chỉ mục khi đã giữ khóa, nên thấy được
+    # thay đổi của worker khác trước khi ghi đè
+
+    def insert(self, record: dict) -> None:
+        with self.lock():
+            records = self._index().records
+            self.save_all(records + [record])
+
+    def replace(self, id: int, record: dict) -> bool:
+        with self.lock():
+            index = self._index()
+            position = index.positions.get(id)
+            if position is None:
+                return False
+            records = list(index.records)
+            records[position] = record
+            self.save_all(records)
+            return True
+
+    def remove(self, id: int) -> bool:
+        with self.lock():
+            index = self._index()
+            position = index.positions.get(id)
+            if position is None:
+                return False
+            self.save_all(index.records[:position] + index.records[position + 1:])
+            return True
+
+    def save_all(self, records: List[dict]) -> None:
+        data = records if self.key is None else {self.key: records}
+        with self.lock():
+            cache.save(self.path, data)
@@ -0,0 +1,140 @@
+import hashlib
+import os
+import shutil
+import threading
+from typing import IO, Dict, Union
+
+from config import Config
+
+try:
+    import fcntl
+except ImportError:  # Windows: chỉ khóa được giữa các thread
+    fcntl = None
+
+
+class FileLock:
+    """Khóa độc quyền dùng chung giữa các thread và các worker process.
+
+    Dựa trên ``fcntl.flock`` trên một file ``.lock`` riêng, nên không ảnh
+    hưởng tới file dữ liệu được thay thế bằng ``os.replace``. Có thể lồng
+    nhau trong cùng một thread.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def __enter__(self) -> 'FileLock':
+        self._thread_lock.acquire()
+        if self._depth == 0 and fcntl is not None:
+            try:
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o666)
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            except BaseException:
+                self._thread_lock.release()
+                raise
+            self._fd = fd
+        self._depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._depth -= 1
+        if self._depth == 0 and self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self._thread_lock.release()
+
+
+COPY_CHUNK_SIZE = 64 * 1024
+
+# Khóa đang được dùng (giữ hoặc chờ) trong process: file .lock -> (khóa, số thread đang dùng)
+_locks: Dict[str, list] = {}
+_locks_lock = threading.Lock()
+
+
+class SharedLock:
+    """Khóa của một file dữ liệu, trả về bởi ``file_lock``.
+
+    Đối tượng ``FileLock`` thật được lấy từ bảng dùng chung khi vào ``with``
+    và bỏ khỏi bảng khi không còn thread nào giữ hay chờ, nên bảng chỉ chứa
+    các khóa đang dùng dù có bao nhiêu file từng được khóa.
+    """
+
+    def __init__(self, lock_path: str):
+        self.lock_path = lock_path
+
+    def __enter__(self) -> 'SharedLock':
+        with _locks_lock:
+            entry = _locks.get(self.lock_path)
+            if entry is None:
+                entry = _locks[self.lock_path] = [FileLock(self.lock_path), 0]
+            entry[1] += 1
+        try:
+            entry[0].__enter__()
+        except BaseException:
+            self._release_entry()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        # Thread đang giữ khóa nên mục trong bảng chưa thể bị bỏ
+        _locks[self.lock_path][0].__exit__(exc_type, exc, tb)
+        self._release_entry()
+
+    def _release_entry(self) -> None:
+        with _locks_lock:
+            entry = _locks[self.lock_path]
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _locks[self.lock_path]
+
+
+def lock_path_for(path: str) -> str:
+    """File .lock của ``path``, nằm trong ``LOCKS_DIR`` (không nằm cạnh file dữ liệu hay ảnh công khai)"""
+    path = os.path.abspath(path)
+    digest = hashlib.sha1(path.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(Config.LOCKS_DIR, f'{os.path.basename(path)}.{digest}.lock')
+
+
+_lock_dirs = set()
+
+
+def file_lock(path: str) -> SharedLock:
+    """Khóa ứng với file ``path``, dùng chung giữa các thread và các worker"""
+    lock_path = lock_path_for(path)
+    directory = os.path.dirname(lock_path)
+    if directory not in _lock_dirs:
+        os.makedirs(directory, exist_ok=True)
+        _lock_dirs.add(directory)
+    return SharedLock(lock_path)
+
+
+def atomic_write(path: str, data: Union[bytes, IO[bytes]]) -> None:
+    """Ghi ra file tạm cùng thư mục rồi đổi tên, người đọc không bao giờ thấy file ghi dở.
+
+    ``data`` có thể là bytes hoặc file đang mở (được chép theo chunk).
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    tmp_path = os.path.join(directory, f'.{os.path.basename(path)}.{os.getpid()}.{threading.get_ident()}.tmp')
+    try:
+        with open(tmp_path, 'wb') as f:
+            if isinstance(data, bytes):
+                f.write(data)
+            else:
+                shutil.copyfileobj(data, f, COPY_CHUNK_SIZE)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o777)
+        except FileNotFoundError:
+            pass
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
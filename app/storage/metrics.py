@@ -0,0 +1,195 @@
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .sqlite_store import connect
+
+logger = logging.getLogger(__name__)
+
+# Giây, cho thời gian xử lý request
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Giây, cho thao tác đọc/ghi file JSON
+STORAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+Sample = Tuple[str, Labels, float]
+
+
+class Metrics:
+    """Counter và histogram của process hiện tại, giữ trong bộ nhớ.
+
+    Histogram được lưu sẵn ở dạng các mẫu Prometheus (``_bucket`` cộng dồn
+    theo ``le``, ``_sum``, ``_count``) nên việc gộp giữa các worker chỉ là
+    cộng các mẫu cùng tên và nhãn.
+    """
+
+    def __init__(self):
+        self.families: Dict[str, Tuple[str, str]] = {}
+        self._buckets: Dict[str, Sequence[float]] = {}
+        self._values: Dict[Tuple[str, Labels], float] = {}
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help: str) -> None:
+        self.families[name] = ('counter', help)
+
+    def histogram(self, name: str, help: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.families[name] = ('histogram', help)
+        self._buckets[name] = tuple(sorted(buckets))
+
+    def _check_fork(self) -> None:
+        # Process con (gunicorn --preload) không mang theo số liệu của process cha
+        if self._pid != os.getpid():
+            self._values.clear()
+            self._pid = os.getpid()
+
+    def inc(self, name: str, labels: Dict[str, str], amount: float = 1) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._check_fork()
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def observe(self, name: str, labels: Dict[str, str], value: float) -> None:
+        base = tuple(sorted(labels.items()))
+        with self._lock:
+            self._check_fork()
+            values = self._values
+            for bound in self._buckets[name]:
+                if value <= bound:
+                    key = (f'{name}_bucket', base + (('le', repr(bound)),))
+                    values[key] = values.get(key, 0) + 1
+            for key, amount in (
+                ((f'{name}_bucket', base + (('le', '+Inf'),)), 1),
+                ((f'{name}_sum', base), value),
+                ((f'{name}_count', base), 1)
+            ):
+                values[key] = values.get(key, 0) + amount
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            self._check_fork()
+            return [(name, labels, value) for (name, labels), value in self._values.items()]
+
+
+class MetricsStore:
+    """Số liệu của mọi worker, lưu trong SQLite để ``/metrics`` ở worker nào cũng đúng.
+
+    Mỗi worker ghi đè các mẫu của chính mình (khóa theo tên worker) định
+    kỳ; khi đọc, mẫu cùng tên và nhãn của các worker được cộng lại. Mẫu của
+    worker đã dừng vẫn được giữ để counter không bị giảm, và sau
+    ``RETIRE_AFTER`` giây không cập nhật thì được cộng dồn vào một dòng
+    ``retired`` chung để bảng không phình theo số lần khởi động lại.
+    """
+
+    RETIRED = 'retired'
+    RETIRE_AFTER = 24 * 3600
+    RETIRE_INTERVAL = 3600
+
+    def __init__(self, database: str):
+        self.database = database
+        self._ready = False
+        self._ready_lock = threading.Lock()
+        self._next_retire = 0.0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = connect(self.database)
+        if not self._ready:
+            with self._ready_lock:
+                if not self._ready:
+                    with conn:
+                        conn.execute(
+                            'CREATE TABLE IF NOT EXISTS metric_samples ('
+                            'worker TEXT NOT NULL, name TEXT NOT NULL, labels TEXT NOT NULL, '
+                            'value REAL NOT NULL, PRIMARY KEY (worker, name, labels))'
+                        )
+                        conn.execute(
+                            'CREATE TABLE IF NOT EXISTS metric_workers ('
+                            'worker TEXT PRIMARY KEY, updated_at REAL NOT NULL)'
+                        )
+                    self._ready = True
+        return conn
+
+    def flush(self, worker: str, samples: Iterable[Sample]) -> None:
+        conn = self._conn()
+        now = time.time()
+        with conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO metric_samples (worker, name, labels, value) VALUES (?, ?, ?, ?)',
+                [(worker, name, json.dumps(labels), value) for name, labels, value in samples]
+            )
+            conn.execute(
+                'INSERT OR REPLACE INTO metric_workers (worker, updated_at) VALUES (?, ?)', (worker, now)
+            )
+        if now >= self._next_retire:
+            self._next_retire = now + self.RETIRE_INTERVAL
+            self._retire(conn, now - self.RETIRE_AFTER)
+
+    def _retire(self, conn: sqlite3.Connection, before: float) -> None:
+        with conn:
+            workers = [row[0] for row in conn.execute(
+                'SELECT worker FROM metric_workers WHERE updated_at < ? AND worker != ?', (before, self.RETIRED)
+            )]
+            for worker in workers:
+                conn.execute(
+                    'INSERT INTO metric_samples (worker, name, labels, value) '
+                    'SELECT ?, name, labels, value FROM metric_samples WHERE worker = ? '
+                    'ON CONFLICT (worker, name, labels) DO UPDATE SET value = value + excluded.value',
+                    (self.RETIRED, worker)
+                )
+                conn.execute('DELETE FROM metric_samples WHERE worker = ?', (worker,))
+                conn.execute('DELETE FROM metric_workers WHERE worker = ?', (worker,))
+
+    def collect(self) -> List[Sample]:
+        rows = self._conn().execute(
+            'SELECT name, labels, SUM(value) FROM metric_samples GROUP BY name, labels ORDER BY name, labels'
+        )
+        return [(name, tuple(tuple(pair) for pair in json.loads(labels)), value) for name, labels, value in rows]
+
+
+class MetricsFlusher:
+    """Thread nền ghi số liệu của process vào ``MetricsStore`` mỗi ``interval`` giây"""
+
+    def __init__(self, metrics: Metrics, interval: float):
+        self.metrics = metrics
+        self.interval = interval
+        self.store: Optional[MetricsStore] = None
+        self.worker: Optional[str] = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def start(self, store: MetricsStore) -> None:
+        # Thread không sống sót qua fork: khởi động lại khi chạy trong process mới.
+        # Cùng process mà app mới dùng database khác (test, benchmark) thì chỉ đổi store
+        if self._pid == os.getpid() and self.store is store:
+            return
+        with self._lock:
+            self.store = store
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self.worker = f'{socket.gethostname()}:{os.getpid()}:{time.time():.0f}'
+            threading.Thread(target=self._loop, name='metrics-flusher', daemon=True).start()
+
+    def flush(self) -> None:
+        if self.store is not None and self._pid == os.getpid():
+            self.store.flush(self.worker, self.metrics.samples())
+
+    def _loop(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Không ghi được số liệu của worker')
+
+
+metrics = Metrics()
+metrics.histogram('dsc_json_load_seconds', 'Thời gian đọc và parse một file JSON', STORAGE_BUCKETS)
+metrics.histogram('dsc_json_save_seconds', 'Thời gian encode và ghi nguyên tử một file JSON', STORAGE_BUCKETS)
+metrics.counter('dsc_json_load_bytes_total', 'Số byte JSON đã đọc từ đĩa')
+metrics.counter('dsc_json_save_bytes_total', 'Số byte JSON đã ghi xuống đĩa')
@@ -0,0 +1,173 @@
+import threading
+from bisect import insort
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# (trường, toán tử, giá trị) - toán tử là '=', '<' hoặc '>'
+Filter = Tuple[str, str, Any]
+# (trường, giảm dần)
+SortKey = Tuple[str, bool]
+
+OPERATORS = ('=', '<', '>')
+
+
+def index_key(value: Any) -> Any:
+    """Chuẩn hóa giá trị để so sánh với tham số query string (luôn là chuỗi)"""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if value is None:
+        return None
+    return str(value)
+
+
+def sort_value(value: Any) -> tuple:
+    """Khóa sắp xếp so sánh được giữa các kiểu khác nhau, ``None`` xếp cuối"""
+    if value is None:
+        return (2, 0, '')
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return (0, value, '')
+    return (1, 0, str(value))
+
+
+def _matches(record: dict, field: str, op: str, value: Any) -> bool:
+    current = record.get(field)
+    if op == '=':
+        return index_key(current) == index_key(value)
+    if current is None:
+        return False
+    try:
+        return current < value if op == '<' else current > value
+    except TypeError:
+        return False
+
+
+class RecordIndex:
+    """Chỉ mục cho một phiên bản dữ liệu của collection.
+
+    Gồm id -> vị trí và các index phụ (giá trị -> danh sách vị trí) cho các
+    trường trong ``indexes``, dựng một lần khi dữ liệu được nạp. Kết quả lọc
+    và sắp xếp của mỗi tổ hợp (filters, sort) được tính một lần rồi giữ lại,
+    nên các trang tiếp theo chỉ tốn chi phí theo kích thước trang.
+    """
+
+    MAX_CACHED_QUERIES = 256
+
+    def __init__(self, records: List[dict], indexes: Sequence[str] = ()):
+        self.records = records
+        self.positions = {record['id']: i for i, record in enumerate(records)}
+        self.max_id = max(self.positions, default=0)
+        self.buckets: Dict[str, Dict[Any, List[int]]] = {field: {} for field in indexes}
+        for i, record in enumerate(records):
+            for field, bucket in self.buckets.items():
+                bucket.setdefault(index_key(record.get(field)), []).append(i)
+        self._results: Dict[tuple, List[int]] = {}
+        self._results_lock = threading.Lock()
+        self._generation = 0
+
+    # Cập nhật tại chỗ, dùng cho collection có nhật ký (chỉ phần thay đổi được
+    # áp dụng thay vì dựng lại cả chỉ mục). Người đọc đang giữ ``records`` vẫn
+    # thấy một danh sách hợp lệ; kết quả lọc/sắp xếp đã cache bị bỏ.
+
+    def insert(self, record: dict) -> None:
+        if record['id'] in self.positions:
+            self.replace(record)
+            return
+        position = len(self.records)
+        self.records.append(record)
+        self.positions[record['id']] = position
+        self.max_id = max(self.max_id, record['id'])
+        for field, bucket in self.buckets.items():
+            bucket.setdefault(index_key(record.get(field)), []).append(position)
+        self._invalidate()
+
+    def replace(self, record: dict) -> None:
+        position = self.positions.get(record['id'])
+        if position is None:
+            self.insert(record)
+            return
+        old = self.records[position]
+        for field, bucket in self.buckets.items():
+            old_key, new_key = index_key(old.get(field)), index_key(record.get(field))
+            if old_key != new_key:
+                bucket[old_key].remove(position)
+                if not bucket[old_key]:
+                    del bucket[old_key]
+                insort(bucket.setdefault(new_key, []), position)
+        self.records[position] = record
+        self._invalidate()
+
+    def _invalidate(self) -> None:
+        with self._results_lock:
+            self._generation += 1
+            self._results.clear()
+
+    def get(self, id: int) -> Optional[dict]:
+        position = self.positions.get(id)
+        return self.records[position] if position is not None else None
+
+    def find(self, field: str, value: Any) -> Optional[dict]:
+        """Bản ghi đầu tiên có ``field`` đúng bằng ``value`` (so sánh cả kiểu, không qua chuỗi)"""
+        bucket = self.buckets.get(field)
+        positions = bucket.get(index_key(value), ()) if bucket is not None else range(len(self.records))
+        for position in positions:
+            current = self.records[position].get(field)
+            if type(current) is type(value) and current == value:
+                return self.records[position]
+        return None
+
+    def _select(self, filters: Sequence[Filter], sort: Sequence[SortKey]) -> List[int]:
+        # Bắt đầu từ index phụ nhỏ nhất khớp với một điều kiện '=',
+        # các điều kiện còn lại được kiểm tra trên tập ứng viên đó
+        positions = range(len(self.records))
+        remaining = list(filters)
+        indexed = [
+            (len(self.buckets[field].get(index_key(value), ())), i)
+            for i, (field, op, value) in enumerate(filters)
+            if op == '=' and field in self.buckets
+        ]
+        if indexed:
+            _, best = min(indexed)
+            field, _, value = remaining.pop(best)
+            positions = self.buckets[field].get(index_key(value), [])
+
+        records = self.records
+        selected = [
+            p for p in positions
+            if all(_matches(records[p], field, op, value) for field, op, value in remaining)
+        ]
+        for field, descending in reversed(sort):
+            selected.sort(key=lambda p: sort_value(records[p].get(field)), reverse=descending)
+            if descending:
+                # reverse đưa None lên đầu; sắp xếp ổn định lần nữa để None vẫn ở cuối
+                selected.sort(key=lambda p: records[p].get(field) is None)
+        return selected
+
+    def select(self, filters: Sequence[Filter] = (), sort: Sequence[SortKey] = ()) -> List[int]:
+        """Vị trí các bản ghi khớp ``filters`` theo thứ tự ``sort`` (có cache)"""
+        key = (tuple(filters), tuple(sort))
+        result = self._results.get(key)
+        if result is None:
+            generation = self._generation
+            result = self._select(filters, sort)
+            with self._results_lock:
+                if generation != self._generation:
+                    # Chỉ mục vừa được cập nhật trong lúc tính, không giữ kết quả cũ
+                    return result
+                if len(self._results) >= self.MAX_CACHED_QUERIES:
+                    self._results.clear()
+                self._results[key] = result
+        return result
+
+    def query(
+        self,
+        filters: Sequence[Filter] = (),
+        sort: Sequence[SortKey] = (),
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> Tuple[List[dict], int]:
+        """(bản ghi của trang, tổng số bản ghi khớp)"""
+        if not filters and not sort:
+            selected = range(len(self.records))
+        else:
+            selected = self.select(filters, sort)
+        end = None if limit is None else offset + limit
+        return [self.records[p] for p in selected[offset:end]], len(selected)
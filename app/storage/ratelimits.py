@@ -0,0 +1,92 @@
+import sqlite3
+import threading
+import time
+
+from .sqlite_store import connect
+
+
+class RateLimitStore:
+    """Bộ đếm theo cửa sổ thời gian cố định, lưu trong SQLite dùng chung cho mọi worker.
+
+    Mỗi khóa (vd. ``login:ip:1.2.3.4``) có một dòng gồm thời điểm bắt đầu
+    cửa sổ và số lần đã đếm. Đọc và tăng bộ đếm nằm trong cùng một
+    transaction ``BEGIN IMMEDIATE`` nên giới hạn đúng cho cả hệ thống, không
+    bị nhân lên theo số worker gunicorn.
+    """
+
+    PURGE_INTERVAL = 3600
+
+    def __init__(self, database: str):
+        self.database = database
+        self._ready = False
+        self._ready_lock = threading.Lock()
+        self._next_purge = 0.0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = connect(self.database)
+        if not self._ready:
+            with self._ready_lock:
+                if not self._ready:
+                    with conn:
+                        conn.execute(
+                            'CREATE TABLE IF NOT EXISTS rate_limits ('
+                            'key TEXT PRIMARY KEY, '
+                            'window_start REAL NOT NULL, '
+                            'count INTEGER NOT NULL)'
+                        )
+                    self._ready = True
+        return conn
+
+    def hit(self, key: str, limit: int, window: float) -> float:
+        """Đếm thêm một lần cho ``key``.
+
+        Trả về 0 nếu vẫn trong giới hạn, ngược lại là số giây cần chờ tới
+        cửa sổ tiếp theo (lần vượt giới hạn không được đếm).
+        """
+        conn = self._conn()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT window_start, count FROM rate_limits WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None or row[0] + window <= now:
+                conn.execute(
+                    'INSERT OR REPLACE INTO rate_limits (key, window_start, count) VALUES (?, ?, 1)',
+                    (key, now)
+                )
+                retry_after = 0.0
+            elif row[1] >= limit:
+                retry_after = row[0] + window - now
+            else:
+                conn.execute('UPDATE rate_limits SET count = count + 1 WHERE key = ?', (key,))
+                retry_after = 0.0
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        self._purge_expired(conn, window)
+        return retry_after
+
+    def blocked(self, key: str, limit: int, window: float) -> float:
+        """Như ``hit`` nhưng chỉ kiểm tra, không đếm"""
+        row = self._conn().execute(
+            'SELECT window_start, count FROM rate_limits WHERE key = ?', (key,)
+        ).fetchone()
+        now = time.time()
+        if row is None or row[0] + window <= now or row[1] < limit:
+            return 0.0
+        return row[0] + window - now
+
+    def reset(self, key: str) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute('DELETE FROM rate_limits WHERE key = ?', (key,))
+
+    def _purge_expired(self, conn: sqlite3.Connection, window: float) -> None:
+        now = time.time()
+        if now < self._next_purge:
+            return
+        self._next_purge = now + self.PURGE_INTERVAL
+        with conn:
+            conn.execute('DELETE FROM rate_limits WHERE window_start < ?', (now - window,))
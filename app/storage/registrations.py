@@ -0,0 +1,158 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .sqlite_store import bump_version, connect, create_versions_table, read_version
+
+
+class RegistrationStore:
+    """Số chỗ và danh sách IP đăng ký của từng sự kiện, lưu trong SQLite.
+
+    Việc giữ chỗ là một transaction ``BEGIN IMMEDIATE``: thêm cặp
+    (sự kiện, IP) - khóa UNIQUE đảm bảo mỗi IP chỉ đăng ký một lần - rồi
+    tăng bộ đếm với điều kiện ``participants < max_participants``. Hai bước
+    cùng thành công hoặc cùng bị hủy, nên nhiều worker đăng ký cùng lúc cũng
+    không thể vượt quá số chỗ hay mất lượt đăng ký.
+
+    Sự kiện chưa có trong bảng được khởi tạo từ dữ liệu trong events.json
+    ở lần đăng ký đầu tiên; từ đó bảng này là nguồn dữ liệu chính cho
+    ``currentParticipants``. Danh sách IP chỉ nằm ở đây, không bao giờ được
+    trả về cùng danh sách sự kiện.
+    """
+
+    SUCCESS = 'SUCCESS'
+    IP_ALREADY_REGISTERED = 'IP_ALREADY_REGISTERED'
+    FULL_CAPACITY = 'FULL_CAPACITY'
+    NOT_SEEDED = 'NOT_SEEDED'
+
+    VERSION_NAME = 'event_registrations'
+
+    def __init__(self, database: str):
+        self.database = database
+        self._ready = False
+        self._ready_lock = threading.Lock()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = connect(self.database)
+        if not self._ready:
+            with self._ready_lock:
+                if not self._ready:
+                    with conn:
+                        conn.execute(
+                            'CREATE TABLE IF NOT EXISTS event_capacity ('
+                            'event_id INTEGER PRIMARY KEY, '
+                            'max_participants INTEGER NOT NULL, '
+                            'participants INTEGER NOT NULL DEFAULT 0)'
+                        )
+                        conn.execute(
+                            'CREATE TABLE IF NOT EXISTS event_registrations ('
+                            'id INTEGER PRIMARY KEY, '
+                            'event_id INTEGER NOT NULL, '
+                            'ip TEXT NOT NULL, '
+                            'created_at TEXT NOT NULL, '
+                            'UNIQUE (event_id, ip))'
+                        )
+                        create_versions_table(conn)
+                    self._ready = True
+        return conn
+
+    def seed(self, event_id: int, max_participants: int, participants: int, ips: Iterable[str]) -> None:
+        """Khởi tạo sự kiện nếu chưa có; không làm gì nếu đã khởi tạo trước đó"""
+        conn = self._conn()
+        with conn:
+            created = conn.execute(
+                'INSERT OR IGNORE INTO event_capacity (event_id, max_participants, participants) '
+                'VALUES (?, ?, ?)',
+                (event_id, max_participants, participants)
+            ).rowcount
+            if created:
+                now = datetime.now().isoformat()
+                conn.executemany(
+                    'INSERT OR IGNORE INTO event_registrations (event_id, ip, created_at) VALUES (?, ?, ?)',
+                    [(event_id, ip, now) for ip in ips]
+                )
+                bump_version(conn, self.VERSION_NAME)
+
+    def register(self, event_id: int, ip_address: str) -> str:
+        """Giữ một chỗ cho ``ip_address``; trả về ``NOT_SEEDED`` nếu sự kiện chưa được ``seed``"""
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            inserted = conn.execute(
+                'INSERT OR IGNORE INTO event_registrations (event_id, ip, created_at) VALUES (?, ?, ?)',
+                (event_id, ip_address, datetime.now().isoformat())
+            ).rowcount
+            if not inserted:
+                conn.rollback()
+                return self.IP_ALREADY_REGISTERED
+
+            reserved = conn.execute(
+                'UPDATE event_capacity SET participants = participants + 1 '
+                'WHERE event_id = ? AND participants < max_participants',
+                (event_id,)
+            ).rowcount
+            if not reserved:
+                seeded = conn.execute(
+                    'SELECT 1 FROM event_capacity WHERE event_id = ?', (event_id,)
+                ).fetchone()
+                conn.rollback()
+                return self.FULL_CAPACITY if seeded else self.NOT_SEEDED
+
+            bump_version(conn, self.VERSION_NAME)
+            conn.commit()
+            return self.SUCCESS
+        except BaseException:
+            conn.rollback()
+            raise
+
+    def set_capacity(self, event_id: int, max_participants: int) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                'UPDATE event_capacity SET max_participants = ? WHERE event_id = ?',
+                (max_participants, event_id)
+            )
+            bump_version(conn, self.VERSION_NAME)
+
+    def remove_event(self, event_id: int) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute('DELETE FROM event_registrations WHERE event_id = ?', (event_id,))
+            conn.execute('DELETE FROM event_capacity WHERE event_id = ?', (event_id,))
+            bump_version(conn, self.VERSION_NAME)
+
+    def version(self) -> Tuple[str, Optional[float]]:
+        """(mã phiên bản, thời điểm sửa cuối) của toàn bộ dữ liệu đăng ký"""
+        return read_version(self._conn(), self.VERSION_NAME)
+
+    def participants(self, event_id: int) -> Optional[int]:
+        """Số người đã đăng ký, ``None`` nếu sự kiện chưa được khởi tạo"""
+        row = self._conn().execute(
+            'SELECT participants FROM event_capacity WHERE event_id = ?', (event_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def participant_counts(self, event_ids: Iterable[int]) -> Dict[int, int]:
+        """Số người đã đăng ký của các sự kiện trong ``event_ids`` đã được khởi tạo"""
+        # Truyền danh sách id dưới dạng một mảng JSON: một câu lệnh, không giới hạn số tham số
+        rows = self._conn().execute(
+            'SELECT event_id, participants FROM event_capacity '
+            'WHERE event_id IN (SELECT value FROM json_each(?))',
+            (json.dumps(list(event_ids)),)
+        )
+        return dict(rows.fetchall())
+
+    def is_registered(self, event_id: int, ip_address: str) -> bool:
+        row = self._conn().execute(
+            'SELECT 1 FROM event_registrations WHERE event_id = ? AND ip = ?', (event_id, ip_address)
+        ).fetchone()
+        return row is not None
+
+    def registered_ips(self, event_id: int) -> List[str]:
+        """Danh sách IP đã đăng ký một sự kiện, theo thứ tự đăng ký"""
+        rows = self._conn().execute(
+            'SELECT ip FROM event_registrations WHERE event_id = ? ORDER BY id', (event_id,)
+        )
+        return [ip for ip, in rows]
@@ -0,0 +1,97 @@
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from .sqlite_store import connect
+
+
+class TokenRevocationStore:
+    """Danh sách JTI của token đã bị thu hồi (đăng xuất, refresh token đã xoay vòng).
+
+    Nguồn dữ liệu chính là bảng SQLite dùng chung cho mọi worker; mỗi dòng có
+    ``expires_at`` bằng hạn của chính token đó, quá hạn thì bị dọn vì JWT hết
+    hạn đã bị từ chối trước khi tới bước kiểm tra thu hồi.
+
+    Mỗi process giữ thêm một dict JTI -> hạn trong bộ nhớ nên
+    ``is_revoked`` là tra cứu O(1). Dict được đồng bộ tăng dần: ``PRAGMA
+    data_version`` (không đọc bảng) cho biết process khác vừa ghi, khi đó
+    chỉ đọc các dòng có id lớn hơn dòng cuối đã thấy.
+    """
+
+    PURGE_INTERVAL = 3600
+
+    def __init__(self, database: str):
+        self.database = database
+        self._ready = False
+        self._ready_lock = threading.Lock()
+        self._revoked: Dict[str, float] = {}
+        self._last_id = 0
+        self._next_evict = 0.0
+        self._next_purge = 0.0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = connect(self.database)
+        if not self._ready:
+            with self._ready_lock:
+                if not self._ready:
+                    with conn:
+                        conn.execute(
+                            'CREATE TABLE IF NOT EXISTS revoked_tokens ('
+                            'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                            'jti TEXT NOT NULL UNIQUE, '
+                            'expires_at REAL NOT NULL)'
+                        )
+                        conn.execute(
+                            'CREATE INDEX IF NOT EXISTS revoked_tokens_expires_at ON revoked_tokens (expires_at)'
+                        )
+                    self._ready = True
+        return conn
+
+    def revoke(self, jti: str, expires_at: float) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                'INSERT OR IGNORE INTO revoked_tokens (jti, expires_at) VALUES (?, ?)',
+                (jti, expires_at)
+            )
+        with self._lock:
+            self._revoked[jti] = expires_at
+        self._purge_expired(conn)
+
+    def is_revoked(self, jti: str) -> bool:
+        self._sync()
+        return jti in self._revoked
+
+    def _sync(self) -> None:
+        conn = self._conn()
+        data_version = conn.execute('PRAGMA data_version').fetchone()[0]
+        if getattr(self._local, 'data_version', None) == data_version and time.time() < self._next_evict:
+            return
+        with self._lock:
+            now = time.time()
+            rows = conn.execute(
+                'SELECT id, jti, expires_at FROM revoked_tokens WHERE id > ? ORDER BY id',
+                (self._last_id,)
+            ).fetchall()
+            for id, jti, expires_at in rows:
+                self._revoked[jti] = expires_at
+                self._last_id = id
+            if now >= self._next_evict:
+                # Bỏ các JTI đã hết hạn để dict không phình mãi
+                self._revoked = {j: e for j, e in self._revoked.items() if e > now}
+                self._next_evict = now + 60
+            self._local.data_version = data_version
+
+    def _purge_expired(self, conn: sqlite3.Connection) -> None:
+        now = time.time()
+        if now < self._next_purge:
+            return
+        self._next_purge = now + self.PURGE_INTERVAL
+        with conn:
+            conn.execute('DELETE FROM revoked_tokens WHERE expires_at < ?', (now,))
+
+    def count(self) -> int:
+        return self._conn().execute('SELECT COUNT(*) FROM revoked_tokens').fetchone()[0]
@@ -0,0 +1,274 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .locks import SharedLock, file_lock
+from .query import OPERATORS, Filter, SortKey
+from .timing import timed
+
+_local = threading.local()
+
+
+def connect(database: str) -> sqlite3.Connection:
+    """Mỗi thread giữ một kết nối riêng tới từng file database"""
+    connections: Dict[str, sqlite3.Connection] = getattr(_local, 'connections', None)
+    if connections is None or _local.pid != os.getpid():
+        # Không dùng lại kết nối được kế thừa qua fork (gunicorn --preload, multiprocessing)
+        connections = _local.connections = {}
+        _local.pid = os.getpid()
+
+    conn = connections.get(database)
+    if conn is None:
+        os.makedirs(os.path.dirname(os.path.abspath(database)), exist_ok=True)
+        conn = sqlite3.connect(database, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA foreign_keys=ON')
+        connections[database] = conn
+    return conn
+
+
+def create_versions_table(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        'CREATE TABLE IF NOT EXISTS store_versions ('
+        'name TEXT PRIMARY KEY, version INTEGER NOT NULL, updated_at REAL NOT NULL)'
+    )
+
+
+def bump_version(conn: sqlite3.Connection, name: str) -> None:
+    """Tăng số phiên bản của ``name``; gọi trong cùng transaction với thao tác ghi"""
+    conn.execute(
+        'INSERT INTO store_versions (name, version, updated_at) VALUES (?, 1, ?) '
+        'ON CONFLICT (name) DO UPDATE SET version = version + 1, updated_at = excluded.updated_at',
+        (name, time.time())
+    )
+
+
+def read_version(conn: sqlite3.Connection, name: str) -> Tuple[str, Optional[float]]:
+    row = conn.execute(
+        'SELECT version, updated_at FROM store_versions WHERE name = ?', (name,)
+    ).fetchone()
+    return (str(row[0]), row[1]) if row else ('0', None)
+
+
+def _dumps(record: dict) -> str:
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+
+
+def _query_values(value: Any) -> tuple:
+    """Các giá trị trong cột được coi là bằng tham số query string ``value``.
+
+    Backend JSON so sánh theo dạng chuỗi (``index_key``) nên '2024' khớp cả
+    số 2024 lẫn chuỗi '2024', 'true' khớp True (lưu trong cột là 1). Chuỗi
+    gốc luôn nằm trong danh sách để cột chứa văn bản vẫn khớp.
+    """
+    if not isinstance(value, str):
+        return (_column_value(value),)
+    if value in ('true', 'false'):
+        return value, int(value == 'true')
+    try:
+        number = int(value)
+    except ValueError:
+        return (value,)
+    # '007' hay '+7' không khớp 7 ở backend JSON
+    return (value, number) if str(number) == value else (value,)
+
+
+def _column_value(value: Any) -> Any:
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float, str)) or value is None:
+        return value
+    return _dumps(value)
+
+
+class SqliteCollection:
+    """Một bảng SQLite có cùng giao diện với ``JsonCollection``.
+
+    Mỗi bản ghi được lưu nguyên dạng JSON trong cột ``data``; các trường
+    trong ``indexes`` và ``unique`` được tách ra thành cột riêng có index để
+    lọc và tìm kiếm. Lần đầu mở bảng, dữ liệu cũ được nhập từ file JSON
+    ``legacy`` (nếu có) để chuyển từ backend JSON sang không mất dữ liệu.
+    """
+
+    def __init__(
+        self,
+        database: str,
+        table: str,
+        indexes: Sequence[str] = (),
+        unique: Sequence[str] = (),
+        legacy=None
+    ):
+        self.database = database
+        self.table = table
+        self.columns = tuple(unique) + tuple(indexes)
+        self.unique = tuple(unique)
+        self.legacy = legacy
+        self._ready = False
+        self._ready_lock = threading.Lock()
+
+    def lock(self) -> SharedLock:
+        """Khóa để gộp nhiều thao tác (vd. ``next_id`` + ``insert``); mỗi câu lệnh ghi đã là một transaction"""
+        return file_lock(f'{self.database}.{self.table}')
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = connect(self.database)
+        if not self._ready:
+            with self._ready_lock:
+                if not self._ready:
+                    self._create_schema(conn)
+                    self._ready = True
+        return conn
+
+    def _create_schema(self, conn: sqlite3.Connection) -> None:
+        columns = ''.join(f', "{column}"' for column in self.columns)
+        with conn:
+            conn.execute(
+                f'CREATE TABLE IF NOT EXISTS "{self.table}" '
+                f'(id INTEGER PRIMARY KEY, data TEXT NOT NULL{columns})'
+            )
+            # Bảng tạo từ phiên bản cũ có thể thiếu cột index mới
+            existing = {row[1] for row in conn.execute(f'PRAGMA table_info("{self.table}")')}
+            for column in self.columns:
+                if column not in existing:
+                    conn.execute(f'ALTER TABLE "{self.table}" ADD COLUMN "{column}"')
+                    conn.execute(
+                        f'UPDATE "{self.table}" SET "{column}" = json_extract(data, ?)',
+                        (f'$.{column}',)
+                    )
+            for column in self.columns:
+                unique = 'UNIQUE ' if column in self.unique else ''
+                conn.execute(
+                    f'CREATE {unique}INDEX IF NOT EXISTS "idx_{self.table}_{column}" '
+                    f'ON "{self.table}" ("{column}")'
+                )
+            conn.execute('CREATE TABLE IF NOT EXISTS imported_collections (name TEXT PRIMARY KEY)')
+            create_versions_table(conn)
+            imported = conn.execute(
+                'INSERT OR IGNORE INTO imported_collections (name) VALUES (?)', (self.table,)
+            ).rowcount
+            if imported and self.legacy is not None:
+                self._insert_many(conn, self.legacy.all())
+                bump_version(conn, self.table)
+
+    def _row(self, record: dict) -> tuple:
+        return (record['id'], _dumps(record)) + tuple(
+            _column_value(record.get(column)) for column in self.columns
+        )
+
+    def _insert_many(self, conn: sqlite3.Connection, records: List[dict]) -> None:
+        columns = ''.join(f', "{column}"' for column in self.columns)
+        placeholders = ', ?' * len(self.columns)
+        conn.executemany(
+            f'INSERT INTO "{self.table}" (id, data{columns}) VALUES (?, ?{placeholders})',
+            [self._row(record) for record in records]
+        )
+
+    def version(self) -> Tuple[str, Optional[float]]:
+        """(mã phiên bản, thời điểm sửa cuối) - đổi sau mỗi thao tác ghi"""
+        return read_version(self._conn(), self.table)
+
+    def all(self) -> List[dict]:
+        with timed('io'):
+            rows = self._conn().execute(f'SELECT data FROM "{self.table}" ORDER BY id').fetchall()
+        with timed('parse'):
+            return [json.loads(data) for data, in rows]
+
+    def get(self, id: int) -> Optional[dict]:
+        row = self._conn().execute(
+            f'SELECT data FROM "{self.table}" WHERE id = ?', (id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def find(self, field: str, value: Any) -> Optional[dict]:
+        """Bản ghi đầu tiên có ``field`` đúng bằng ``value`` - không đổi kiểu như ``query``"""
+        expression, expression_params = self._expression(field)
+        row = self._conn().execute(
+            f'SELECT data FROM "{self.table}" WHERE {expression} = ? ORDER BY id LIMIT 1',
+            expression_params + (_column_value(value),)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _expression(self, field: str) -> Tuple[str, tuple]:
+        if field == 'id' or field in self.columns:
+            return f'"{field}"', ()
+        return 'json_extract(data, ?)', (f'$.{field}',)
+
+    def query(
+        self,
+        filters: Sequence[Filter] = (),
+        sort: Sequence[SortKey] = (),
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> Tuple[List[dict], int]:
+        """Lọc, sắp xếp và phân trang; trả về (bản ghi của trang, tổng số bản ghi khớp)"""
+        conditions, params = [], []
+        for field, op, value in filters:
+            if op not in OPERATORS:
+                raise ValueError(f'Unsupported operator: {op}')
+            expression, expression_params = self._expression(field)
+            if op == '=':
+                values = _query_values(value)
+                conditions.append(f'{expression} IN ({", ".join("?" * len(values))})')
+                params.extend(expression_params + values)
+            else:
+                conditions.append(f'{expression} {op} ?')
+                params.extend(expression_params + (_column_value(value),))
+        where = f' WHERE {" AND ".join(conditions)}' if conditions else ''
+
+        order, order_params = [], []
+        for field, descending in sort:
+            expression, expression_params = self._expression(field)
+            # NULL xếp cuối giống backend JSON
+            order.append(f'{expression} IS NULL, {expression}{" DESC" if descending else ""}')
+            order_params.extend(expression_params * 2)
+        order.append('id')
+
+        conn = self._conn()
+        with timed('io'):
+            total = conn.execute(f'SELECT COUNT(*) FROM "{self.table}"{where}', params).fetchone()[0]
+            rows = conn.execute(
+                f'SELECT data FROM "{self.table}"{where} ORDER BY {", ".join(order)} LIMIT ? OFFSET ?',
+                params + order_params + [-1 if limit is None else limit, offset]
+            ).fetchall()
+        with timed('parse'):
+            return [json.loads(data) for data, in rows], total
+
+    def next_id(self) -> int:
+        row = self._conn().execute(f'SELECT COALESCE(MAX(id), 0) FROM "{self.table}"').fetchone()
+        return row[0] + 1
+
+    def insert(self, record: dict) -> None:
+        conn = self._conn()
+        with conn:
+            self._insert_many(conn, [record])
+            bump_version(conn, self.table)
+
+    def replace(self, id: int, record: dict) -> bool:
+        record = dict(record, id=id)
+        assignments = ''.join(f', "{column}" = ?' for column in self.columns)
+        conn = self._conn()
+        with conn:
+            cursor = conn.execute(
+                f'UPDATE "{self.table}" SET data = ?{assignments} WHERE id = ?',
+                self._row(record)[1:] + (id,)
+            )
+            bump_version(conn, self.table)
+        return cursor.rowcount > 0
+
+    def remove(self, id: int) -> bool:
+        conn = self._conn()
+        with conn:
+            cursor = conn.execute(f'DELETE FROM "{self.table}" WHERE id = ?', (id,))
+            bump_version(conn, self.table)
+        return cursor.rowcount > 0
+
+    def save_all(self, records: List[dict]) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute(f'DELETE FROM "{self.table}"')
+            self._insert_many(conn, records)
+            bump_version(conn, self.table)
@@ -0,0 +1,56 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, Optional
+
+# Thời gian (giây) theo từng giai đoạn của request đang xử lý; None khi không đo
+# (ngoài request, thread job nền, hoặc tắt SERVER_TIMING)
+_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar('server_timings', default=None)
+
+
+def begin() -> None:
+    _timings.set({})
+
+
+def end() -> Optional[Dict[str, float]]:
+    timings = _timings.get()
+    _timings.set(None)
+    return timings
+
+
+def current() -> Optional[Dict[str, float]]:
+    return _timings.get()
+
+
+@contextmanager
+def timed(phase: str):
+    """Cộng thời gian chạy khối lệnh vào giai đoạn ``phase`` của request hiện tại"""
+    timings = _timings.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[phase] = timings.get(phase, 0.0) + time.perf_counter() - started
+
+
+def timed_construction(cls):
+    """Class decorator cho model: thời gian ``cls(**data)`` được tính vào giai đoạn ``construct``"""
+    init = cls.__init__
+
+    @wraps(init)
+    def __init__(self, *args, **kwargs):
+        timings = _timings.get()
+        if timings is None:
+            return init(self, *args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return init(self, *args, **kwargs)
+        finally:
+            timings['construct'] = timings.get('construct', 0.0) + time.perf_counter() - started
+
+    cls.__init__ = __init__
+    return cls
@@ -0,0 +1,52 @@
+import ipaddress
+from functools import lru_cache
+from typing import Iterable, Tuple
+
+from flask import current_app, request
+
+
+@lru_cache(maxsize=8)
+def _networks(proxies: Tuple[str, ...]) -> tuple:
+    return tuple(ipaddress.ip_network(proxy, strict=False) for proxy in proxies)
+
+
+def _trusted(address: str, networks: Iterable) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in networks)
+
+
+def ip_allowed(address: str, allowed: Iterable[str]) -> bool:
+    """``address`` có nằm trong danh sách IP/dải CIDR ``allowed`` hay không"""
+    return _trusted(address, _networks(tuple(allowed)))
+
+
+def client_ip() -> str:
+    """IP của client gửi request.
+
+    Chỉ tin header của proxy khi request đến từ một địa chỉ trong
+    ``TRUSTED_PROXIES`` (mặc định loopback, nơi cloudflared chạy): dùng
+    ``CF-Connecting-IP``, nếu không có thì lấy địa chỉ cuối cùng trong
+    ``X-Forwarded-For`` không phải proxy tin cậy. Request đến thẳng thì
+    header do client tự đặt nên bị bỏ qua.
+    """
+    remote = request.remote_addr or ''
+    networks = _networks(tuple(current_app.config['TRUSTED_PROXIES']))
+    if not _trusted(remote, networks):
+        return remote
+
+    connecting = request.headers.get('CF-Connecting-IP', '').strip()
+    if connecting:
+        return connecting
+    forwarded = [
+        address.strip()
+        for header in request.headers.getlist('X-Forwarded-For')
+        for address in header.split(',')
+        if address.strip()
+    ]
+    for address in reversed(forwarded):
+        if not _trusted(address, networks):
+            return address
+    return forwarded[0] if forwarded else remote
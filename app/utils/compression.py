@@ -0,0 +1,164 @@
+import gzip
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Iterable, Iterator, Tuple
+
+from flask import current_app, request
+
+from ..storage.timing import timed
+
+try:
+    import brotli
+except ImportError:  # brotli là tùy chọn, thiếu thì chỉ phục vụ gzip
+    brotli = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Body nhỏ hơn ngưỡng này nén không đáng: header gzip/br gần bằng phần tiết kiệm được
+DEFAULT_MIN_SIZE = 1024
+# Số body đã nén được giữ lại theo ETag
+MAX_ENTRIES = 256
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json', 'application/javascript', 'application/xml', 'image/svg+xml'
+}
+
+
+def preferred_encoding() -> str:
+    """Chọn encoding tốt nhất client chấp nhận: br, rồi gzip, rồi không nén"""
+    accepted = request.accept_encodings
+    candidates = ('br', 'gzip') if brotli is not None else ('gzip',)
+    best = max(candidates, key=lambda encoding: accepted[encoding])
+    return best if accepted[best] > 0 else 'identity'
+
+
+def _min_size() -> int:
+    return current_app.config.get('COMPRESS_MIN_SIZE', DEFAULT_MIN_SIZE)
+
+
+def encoding_for(size: int) -> str:
+    """Encoding cho body ``size`` byte đã biết trước: không nén nếu nhỏ hơn ``COMPRESS_MIN_SIZE``"""
+    return 'identity' if size < _min_size() else preferred_encoding()
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+def compress_stream(chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+    """Nén từng phần của response dạng stream, không gom cả body vào bộ nhớ"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        process, flush, finish = compressor.process, compressor.flush, compressor.finish
+    else:
+        # wbits = 16 + MAX_WBITS: định dạng gzip (có header và CRC)
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        process, finish = compressor.compress, compressor.flush
+        flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = process(chunk)
+            # Đẩy dữ liệu đã nén ra ngay để client nhận được từng phần của stream
+            data += flush()
+            if data:
+                yield data
+        yield finish()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+class CompressedBodies:
+    """Cache LRU các body đã nén, khóa theo (ETag, encoding).
+
+    ETag do ``conditional`` gắn đã đổi mỗi khi dữ liệu đổi, nên cùng ETag
+    là cùng body: các lần sau dùng lại bytes đã nén thay vì nén lại.
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Tuple[str, str], bytes]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str]):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def put(self, key: Tuple[str, str], body: bytes):
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+cache = CompressedBodies()
+
+
+def _compressible(response) -> bool:
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+    if request.method == 'HEAD' or response.direct_passthrough:
+        # File gửi bằng send_file/X-Accel-Redirect: để sendfile() và Range hoạt động
+        return False
+    if 'Content-Encoding' in response.headers or 'no-transform' in response.headers.get('Cache-Control', ''):
+        return False
+    mimetype = response.mimetype or ''
+    return mimetype.startswith('text/') or mimetype in COMPRESSIBLE_MIMETYPES
+
+
+def init_compression(app):
+    """Nén gzip/br response API theo Accept-Encoding (``COMPRESS_MIN_SIZE`` là ngưỡng tính bằng byte).
+
+    Response đã có Content-Encoding (body nén sẵn của ``cached_response``)
+    được giữ nguyên. Response dạng stream được nén theo từng phần; response
+    có ETag dùng lại body đã nén từ lần trước.
+    """
+    @app.after_request
+    def compress_response(response):
+        if not _compressible(response):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = preferred_encoding()
+        if encoding == 'identity':
+            return response
+        min_size = _min_size()
+
+        if response.is_streamed:
+            if response.content_length is not None and response.content_length < min_size:
+                return response
+            response.response = compress_stream(response.response, encoding)
+            response.headers.pop('Content-Length', None)
+        else:
+            body = response.get_data()
+            if len(body) < min_size:
+                return response
+            etag, weak = response.get_etag()
+            cacheable = etag is not None and 'no-store' not in response.headers.get('Cache-Control', '')
+            compressed = cache.get((etag, encoding)) if cacheable else None
+            if compressed is None:
+                with timed('encode'):
+                    compressed = compress(body, encoding)
+                if cacheable:
+                    cache.put((etag, encoding), compressed)
+            response.set_data(compressed)
+            if etag is not None and not weak:
+                # Bản nén khác từng byte với bản gốc nên ETag chỉ còn là ETag yếu
+                response.set_etag(etag, weak=True)
+
+        response.headers['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,87 @@
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+from http import HTTPStatus
+from typing import Optional, Sequence, Tuple
+
+from flask import Response, request
+from werkzeug.http import http_date
+
+from ..storage import get_collection, get_registration_store
+
+
+def store_version(
+    collections: Sequence[str],
+    registrations: bool = False,
+    daily: bool = False
+) -> Tuple[str, Optional[float]]:
+    """Gộp phiên bản của các collection thành (mã phiên bản, thời điểm sửa cuối).
+
+    Chỉ dùng metadata của kho lưu trữ (stat file / bảng store_versions), không
+    đọc hay serialize dữ liệu. ``daily`` dùng cho dữ liệu phụ thuộc ngày hiện
+    tại (trạng thái sự kiện): phiên bản đổi lúc nửa đêm.
+    """
+    tokens, modified = [], []
+    for name in collections:
+        token, updated_at = get_collection(name).version()
+        tokens.append(f'{name}:{token}')
+        modified.append(updated_at)
+    if registrations:
+        token, updated_at = get_registration_store().version()
+        tokens.append(f'registrations:{token}')
+        modified.append(updated_at)
+    if daily:
+        midnight = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        tokens.append(midnight.date().isoformat())
+        modified.append(midnight.timestamp())
+    modified = [m for m in modified if m is not None]
+    return '|'.join(tokens), max(modified) if modified else None
+
+
+def _is_not_modified(etag: str, last_modified: Optional[datetime]) -> bool:
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if last_modified is not None and request.if_modified_since is not None:
+        return last_modified <= request.if_modified_since
+    return False
+
+
+def _with_headers(rv, headers: dict):
+    """Thêm header vào giá trị trả về của Resource nếu là response 200"""
+    if isinstance(rv, Response):
+        if rv.status_code == HTTPStatus.OK:
+            rv.headers.update(headers)
+        return rv
+    if not isinstance(rv, tuple):
+        return rv, HTTPStatus.OK, headers
+    if int(rv[1]) != HTTPStatus.OK:
+        return rv
+    if len(rv) == 2:
+        return rv[0], rv[1], headers
+    return rv[0], rv[1], {**headers, **dict(rv[2])}
+
+
+def conditional(*collections: str, registrations: bool = False, daily: bool = False):
+    """Decorator cho ``Resource.get``: gắn ETag/Last-Modified và trả 304 nếu client đã có bản mới nhất.
+
+    ETag được tính từ phiên bản kho lưu trữ cùng đường dẫn và query string,
+    nên request 304 không phải đọc hay serialize dữ liệu.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            version, modified = store_version(collections, registrations, daily)
+            etag = hashlib.sha1(f'{version}|{request.full_path}'.encode('utf-8')).hexdigest()
+            last_modified = (
+                datetime.fromtimestamp(int(modified), timezone.utc) if modified is not None else None
+            )
+
+            headers = {'ETag': f'"{etag}"', 'Cache-Control': 'no-cache'}
+            if last_modified is not None:
+                headers['Last-Modified'] = http_date(last_modified)
+
+            if _is_not_modified(etag, last_modified):
+                return Response(status=HTTPStatus.NOT_MODIFIED, headers=headers)
+            return _with_headers(fn(*args, **kwargs), headers)
+        return wrapper
+    return decorator
@@ -0,0 +1,201 @@
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from flask import current_app
+
+from ..storage import get_collection
+from .http_cache import store_version
+from .images import (
+    FAILED_SUFFIX, FINGERPRINTED, FORMATS_DIR, HASH_LENGTH, ORIGINALS_DIR, image_files, image_lock,
+    remove_image_variants
+)
+from .jobs import enqueue, task
+
+# Collection có thể chứa URL ảnh (avatar, image, srcset, avatar của teamMembers...)
+IMAGE_COLLECTIONS = ('members', 'events', 'projects', 'banners')
+
+IMAGE_URL = re.compile(r'/static/images/([\w-]+)/([^/\s?#",]+)')
+
+# File mới upload chưa kịp gắn vào bản ghi nào được giữ lại trong khoảng này
+DEFAULT_MIN_AGE = 24 * 3600
+# Ảnh bị bản ghi bỏ nhưng vừa được upload lại (dùng lại cùng mã băm) trong khoảng này thì chưa xóa
+RELEASE_MIN_AGE = 10 * 60
+
+ImageKey = Tuple[str, str]
+
+_pinned: Set[ImageKey] = set()
+_index: Optional[Tuple[str, Dict[ImageKey, Set[Tuple[str, int]]]]] = None
+_index_lock = threading.Lock()
+
+
+def image_folders(config) -> Dict[str, str]:
+    """Tên thư mục trong URL -> đường dẫn thư mục upload"""
+    return {
+        'members': config['UPLOAD_FOLDER_MEMBERS'],
+        'events': config['UPLOAD_FOLDER_EVENTS'],
+        'banners': config['UPLOAD_FOLDER_BANNERS']
+    }
+
+
+def reference_key(filename: str) -> str:
+    """Khóa tham chiếu của một file: mọi biến thể và bản chuyển đổi của ảnh
+    đặt tên theo mã băm có chung khóa là mã băm; file cũ dùng nguyên tên"""
+    if FINGERPRINTED.match(filename) or FINGERPRINTED.match(filename.rsplit('.', 1)[0]):
+        return filename[:HASH_LENGTH]
+    return filename
+
+
+def image_urls(value) -> Set[ImageKey]:
+    """Các ảnh (thư mục, tên file) được nhắc tới trong một bản ghi, duyệt cả dict/list lồng nhau"""
+    found = set()
+    if isinstance(value, str):
+        found.update(IMAGE_URL.findall(value))
+    elif isinstance(value, dict):
+        for item in value.values():
+            found |= image_urls(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            found |= image_urls(item)
+    return found
+
+
+def pin_image(url: str):
+    """Đánh dấu ảnh luôn được giữ dù không bản ghi nào tham chiếu (vd. avatar mặc định)"""
+    for folder, filename in IMAGE_URL.findall(url):
+        _pinned.add((folder, reference_key(filename)))
+
+
+def reference_index() -> Dict[ImageKey, Set[Tuple[str, int]]]:
+    """Index (thư mục, khóa tham chiếu) -> các bản ghi (collection, id) đang dùng ảnh.
+
+    Dựng lại trong O(số bản ghi) chỉ khi một trong các collection đổi phiên bản.
+    """
+    global _index
+    version, _ = store_version(IMAGE_COLLECTIONS)
+    index = _index
+    if index is not None and index[0] == version:
+        return index[1]
+
+    with _index_lock:
+        if _index is not None and _index[0] == version:
+            return _index[1]
+        references: Dict[ImageKey, Set[Tuple[str, int]]] = {}
+        for name in IMAGE_COLLECTIONS:
+            for record in get_collection(name).all():
+                for folder, filename in image_urls(record):
+                    references.setdefault((folder, reference_key(filename)), set()).add((name, record.get('id')))
+        _index = (version, references)
+        return references
+
+
+def is_referenced(folder: str, filename: str, references: Optional[dict] = None) -> bool:
+    key = (folder, reference_key(filename))
+    if key in _pinned:
+        return True
+    return key in (reference_index() if references is None else references)
+
+
+def release_images(old_record: Optional[dict], new_record: Optional[dict] = None):
+    """Xếp job dọn các ảnh bản ghi cũ dùng mà bản ghi mới không còn dùng"""
+    released = image_urls(old_record or {}) - image_urls(new_record or {})
+    if released:
+        enqueue('release_images', {'images': sorted(released)})
+
+
+def _modified_since(paths: Iterable[str], cutoff: float) -> bool:
+    for path in paths:
+        try:
+            if os.stat(path).st_mtime > cutoff:
+                return True
+        except FileNotFoundError:
+            continue
+    return False
+
+
+@task('release_images')
+def process_release_images(payload: dict) -> dict:
+    """Job nền: xóa ảnh (cùng biến thể) nếu lúc chạy không còn bản ghi nào tham chiếu.
+
+    Kiểm tra tham chiếu và xóa cùng giữ khóa theo mã băm như lúc upload, nên
+    upload cùng nội dung không thể dùng lại file đang bị xóa. File vừa được
+    dùng lại (mới hơn ``min_age`` giây) được giữ vì bản ghi mới có thể chưa lưu.
+    """
+    folders = image_folders(current_app.config)
+    cutoff = time.time() - payload.get('min_age', RELEASE_MIN_AGE)
+    removed = []
+    for folder, filename in payload['images']:
+        if folder not in folders:
+            continue
+        with image_lock(folders[folder], reference_key(filename)):
+            if is_referenced(folder, filename):
+                continue
+            if _modified_since(image_files(folders[folder], filename), cutoff):
+                continue
+            remove_image_variants(folders[folder], filename)
+        removed.append(f'{folder}/{filename}')
+    return {'removed': removed}
+
+
+def _entries(path: str) -> Iterable[Tuple[os.DirEntry, str]]:
+    """(file, tên file ảnh mà nó thuộc về) cho ảnh, bản chuyển đổi và file chờ xử lý"""
+    for subdir, strip_extension in (('', False), (FORMATS_DIR, True), (ORIGINALS_DIR, False)):
+        try:
+            with os.scandir(os.path.join(path, subdir)) as entries:
+                for entry in entries:
+                    if entry.name.startswith('.') or not entry.is_file():
+                        continue
+                    name = entry.name
+                    if strip_extension:
+                        # <ảnh>.<định dạng> hoặc file đánh dấu <ảnh>.<định dạng>.failed
+                        if name.endswith(FAILED_SUFFIX):
+                            name = name[:-len(FAILED_SUFFIX)]
+                        name = name.rsplit('.', 1)[0]
+                    yield entry, name
+        except FileNotFoundError:
+            continue
+
+
+def sweep_orphaned_images(folders: Dict[str, str], min_age: float = DEFAULT_MIN_AGE, dry_run: bool = False) -> dict:
+    """Xóa file ảnh không bản ghi nào tham chiếu, trong O(số file).
+
+    Mỗi thư mục chỉ được liệt kê một lần và mỗi file chỉ tra một lần trong
+    index tham chiếu. File mới hơn ``min_age`` giây được giữ lại vì có thể
+    vừa upload mà bản ghi chưa được lưu.
+    """
+    references = reference_index()
+    cutoff = time.time() - min_age
+    stats = {'scanned': 0, 'removed': 0, 'freed_bytes': 0, 'files': []}
+    for folder, path in folders.items():
+        if not os.path.isdir(path):
+            continue
+        for entry, source in _entries(path):
+            stats['scanned'] += 1
+            if is_referenced(folder, source, references):
+                continue
+            stat = entry.stat()
+            if stat.st_mtime > cutoff:
+                continue
+            stats['removed'] += 1
+            stats['freed_bytes'] += stat.st_size
+            stats['files'].append(f'{folder}/{os.path.relpath(entry.path, path)}')
+            if not dry_run:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+    return stats
+
+
+@task('sweep_images')
+def process_sweep_images(payload: dict) -> dict:
+    """Job nền: quét toàn bộ thư mục ảnh, trả về thống kê (không kèm danh sách file)"""
+    stats = sweep_orphaned_images(
+        image_folders(current_app.config),
+        payload.get('min_age', DEFAULT_MIN_AGE),
+        payload.get('dry_run', False)
+    )
+    stats.pop('files')
+    return stats
@@ -0,0 +1,537 @@
+import hashlib
+import io
+import mimetypes
+import os
+import re
+import time
+from typing import Callable, Dict, IO, List, Optional, Tuple
+
+from flask import Response, current_app, request, send_from_directory, url_for
+from PIL import Image, ImageOps, UnidentifiedImageError
+from werkzeug.exceptions import NotFound
+from werkzeug.utils import safe_join
+
+from ..storage.locks import atomic_write, file_lock
+from .jobs import enqueue, task
+
+# Kích thước tối đa (cạnh dài, px) của từng biến thể, từ lớn đến nhỏ
+VARIANTS = (
+    ('full', 1920),
+    ('card', 800),
+    ('thumb', 320),
+)
+
+# Định dạng lưu theo phần mở rộng gốc: (định dạng Pillow, phần mở rộng đầu ra)
+OUTPUT_FORMATS = {
+    'jpg': ('JPEG', 'jpg'),
+    'jpeg': ('JPEG', 'jpg'),
+    'png': ('PNG', 'png'),
+    'webp': ('WEBP', 'webp'),
+    'gif': ('PNG', 'png'),
+}
+
+SAVE_OPTIONS = {
+    'JPEG': {'quality': 85, 'optimize': True, 'progressive': True},
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': 85, 'method': 4},
+    'AVIF': {'quality': 60, 'speed': 6},
+}
+
+# Định dạng hiện đại theo thứ tự ưu tiên: (phần mở rộng, định dạng Pillow, mimetype)
+MODERN_FORMATS = (
+    ('avif', 'AVIF', 'image/avif'),
+    ('webp', 'WEBP', 'image/webp'),
+)
+
+# Chỉ chuyển đổi ảnh tĩnh; GIF động và ảnh đã là WebP giữ nguyên
+TRANSCODABLE_EXTENSIONS = {'jpg', 'jpeg', 'png'}
+
+# Thư mục con chứa các bản chuyển đổi, cạnh ảnh gốc
+FORMATS_DIR = '.formats'
+# Thư mục con chứa file upload gốc đang chờ job tạo biến thể
+ORIGINALS_DIR = '.originals'
+# Hậu tố file đánh dấu trong .formats: ảnh không chuyển đổi được (GIF động, file hỏng)
+FAILED_SUFFIX = '.failed'
+
+# Tên file ảnh upload = 32 ký tự hex đầu của SHA-256 nội dung
+HASH_LENGTH = 32
+HASH_CHUNK_SIZE = 64 * 1024
+
+# File đặt tên theo mã băm (kể cả biến thể) không bao giờ đổi nội dung nên được cache vĩnh viễn
+FINGERPRINTED = re.compile(r'^[0-9a-f]{%d}(_[a-z]+)?\.[a-z0-9]+$' % HASH_LENGTH)
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+# Bản WebP/AVIF trả về dưới URL của ảnh gốc chỉ được cache ở trình duyệt: CDN
+# (Cloudflare) không phân biệt theo Accept nên có thể đưa AVIF cho client không đọc được
+NEGOTIATED_MAX_AGE = 24 * 3600
+# Ảnh gốc đang chờ job chuyển đổi: cache ngắn để sớm nhận bản nhỏ hơn
+PENDING_ALTERNATE_MAX_AGE = 60
+
+
+def _supported_formats():
+    # AVIF cần Pillow >= 11.3 (hoặc plugin pillow-avif); bản build thiếu encoder thì bỏ qua
+    Image.init()
+    return tuple(f for f in MODERN_FORMATS if f[1] in Image.SAVE)
+
+
+SUPPORTED_FORMATS = _supported_formats()
+
+
+def variant_filename(stem: str, variant: str, extension: str) -> str:
+    """Tên file của biến thể; bản full không có hậu tố"""
+    if variant == 'full':
+        return f'{stem}.{extension}'
+    return f'{stem}_{variant}.{extension}'
+
+
+def _open(stream: IO[bytes], load: bool = True) -> Image.Image:
+    try:
+        image = Image.open(stream)
+        if load:
+            image.load()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        raise ValueError('File ảnh không hợp lệ')
+    return image
+
+
+def _prepare(image: Image.Image, fmt: str) -> Image.Image:
+    # Xoay theo EXIF trước khi bỏ metadata, nếu không ảnh chụp điện thoại sẽ bị nghiêng
+    image = ImageOps.exif_transpose(image)
+    if fmt == 'JPEG' and image.mode != 'RGB':
+        return image.convert('RGB')
+    if fmt != 'JPEG' and image.mode not in ('RGB', 'RGBA'):
+        return image.convert('RGBA')
+    return image
+
+
+def content_hash(stream: IO[bytes]) -> str:
+    """Mã băm nội dung file upload, dùng làm tên file (đọc theo chunk rồi tua lại đầu)"""
+    digest = hashlib.sha256()
+    stream.seek(0)
+    for chunk in iter(lambda: stream.read(HASH_CHUNK_SIZE), b''):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def _existing_variants(folder: str, stem: str, extension: str) -> Optional[Dict[str, dict]]:
+    """Dựng lại map biến thể của một ảnh đã lưu trước đó, None nếu chưa có"""
+    variants = {}
+    previous = None
+    for name, _ in VARIANTS:
+        filename = variant_filename(stem, name, extension)
+        try:
+            with Image.open(os.path.join(folder, filename)) as image:
+                previous = {'filename': filename, 'width': image.width}
+        except FileNotFoundError:
+            if previous is None:
+                return None
+        variants[name] = dict(previous)
+    return variants
+
+
+def original_path(folder: str, stem: str, extension: str) -> str:
+    """File upload gốc chờ xử lý, nằm trong thư mục .originals"""
+    return os.path.join(folder, ORIGINALS_DIR, f'{stem}.{extension}')
+
+
+def image_lock(folder: str, key: str):
+    """Khóa của một ảnh cùng mọi biến thể của nó; ``key`` là mã băm (file cũ: tên file)"""
+    return file_lock(os.path.join(folder, key))
+
+
+def store_upload(stream: IO[bytes], folder: str, extension: str) -> Tuple[str, str, Optional[Dict[str, dict]]]:
+    """Lưu file upload theo mã băm nội dung để xử lý nền.
+
+    Chỉ đọc header ảnh (không giải mã) rồi chép file theo chunk vào
+    .originals. Trả về ``(stem, tên file bản full, variants)``; ``variants``
+    khác None khi cùng nội dung đã được xử lý trước đó, không cần tạo job.
+    """
+    extension = extension.lower()
+    if extension not in OUTPUT_FORMATS:
+        raise ValueError('Định dạng file không được hỗ trợ')
+
+    stem = content_hash(stream)
+    _, out_extension = OUTPUT_FORMATS[extension]
+    with image_lock(folder, stem):
+        existing = (
+            _existing_variants(folder, stem, out_extension)
+            or _existing_variants(folder, stem, extension)
+        )
+        if existing is not None:
+            # Dùng lại file đã có: đánh dấu vừa dùng để job dọn ảnh đang chờ
+            # (bản ghi cũ vừa bị xóa) bỏ qua trong thời gian ân hạn
+            for path in image_files(folder, existing['full']['filename']):
+                os.utime(path)
+            return stem, existing['full']['filename'], existing
+
+    image = _open(stream, load=False)
+    if getattr(image, 'is_animated', False):
+        out_extension = extension
+    stream.seek(0)
+    os.makedirs(os.path.join(folder, ORIGINALS_DIR), exist_ok=True)
+    atomic_write(original_path(folder, stem, extension), stream)
+    return stem, variant_filename(stem, 'full', out_extension), None
+
+
+def build_variants(folder: str, stem: str, extension: str) -> Dict[str, dict]:
+    """Tạo các biến thể thumb/card/full đã bỏ metadata từ file gốc trong .originals.
+
+    Tên file là mã băm nội dung upload nên file đã lưu không bao giờ bị ghi
+    đè; chạy lại với ảnh đã xử lý chỉ trả về các biến thể sẵn có. Trả về
+    ``{tên biến thể: {'filename': ..., 'width': ...}}``. Ảnh không bao giờ bị
+    phóng to; biến thể nhỏ được thu từ biến thể lớn hơn liền trước để không
+    phải resample lại ảnh gốc nhiều lần.
+    """
+    fmt, out_extension = OUTPUT_FORMATS[extension]
+    source = original_path(folder, stem, extension)
+    with image_lock(folder, stem):
+        existing = (
+            _existing_variants(folder, stem, out_extension)
+            or _existing_variants(folder, stem, extension)
+        )
+        if existing is not None:
+            if os.path.exists(source):
+                os.remove(source)
+            return existing
+
+        with open(source, 'rb') as f:
+            image = _open(f)
+        if getattr(image, 'is_animated', False):
+            # Ảnh động (GIF nhiều frame) được giữ nguyên, mọi biến thể trỏ về cùng một file
+            filename = variant_filename(stem, 'full', extension)
+            os.replace(source, os.path.join(folder, filename))
+            return {name: {'filename': filename, 'width': image.width} for name, _ in VARIANTS}
+
+        icc_profile = image.info.get('icc_profile')
+        current = _prepare(image, fmt)
+
+        variants = {}
+        written = []
+        try:
+            for name, max_size in VARIANTS:
+                if max(current.size) > max_size:
+                    current = current.copy()
+                    current.thumbnail((max_size, max_size), Image.LANCZOS, reducing_gap=3.0)
+                elif variants:
+                    # Ảnh đã nhỏ hơn kích thước này: dùng lại file của biến thể lớn hơn
+                    variants[name] = dict(variants[written_name])
+                    continue
+                filename = variant_filename(stem, name, out_extension)
+                path = os.path.join(folder, filename)
+                atomic_write(path, _encode(current, fmt, icc_profile=icc_profile))
+                written.append(path)
+                written.extend(_transcode(current, folder, filename, out_extension))
+                written_name = name
+                variants[name] = {'filename': filename, 'width': current.width}
+        except Exception:
+            for path in written:
+                if os.path.exists(path):
+                    os.remove(path)
+            raise
+        os.remove(source)
+        return variants
+
+
+def accept_image_upload(stream: IO[bytes], folder: str, extension: str,
+                        url_for: Callable[[str], str]) -> Tuple[dict, Optional[dict]]:
+    """Lưu file upload, trả về ``(dữ liệu ảnh cho response, payload job)``.
+
+    URL bản full đã biết trước nhờ đặt tên theo mã băm; trong lúc job chạy nó
+    phục vụ tạm file gốc. Payload là None nếu ảnh đã được xử lý trước đó,
+    khi ấy dữ liệu trả về đã có đủ ``images`` và ``srcset``.
+    """
+    stem, full_filename, variants = store_upload(stream, folder, extension)
+    if variants is not None:
+        urls = variant_urls(variants, url_for)
+        return {'url': urls['images']['full'], **urls}, None
+
+    full_url = url_for(full_filename)
+    payload = {
+        'folder': folder,
+        'stem': stem,
+        'extension': extension.lower(),
+        'url_prefix': full_url[:-len(full_filename)]
+    }
+    return {
+        'url': full_url,
+        'images': {name: full_url for name, _ in VARIANTS},
+        'srcset': full_url
+    }, payload
+
+
+def queue_image_upload(stream: IO[bytes], folder: str, extension: str, url_for: Callable[[str], str]) -> dict:
+    """Lưu file upload và xếp job tạo biến thể; ``job`` trong kết quả chứa id để hỏi trạng thái"""
+    data, payload = accept_image_upload(stream, folder, extension, url_for)
+    if payload is not None:
+        data['job'] = job_reference(enqueue('image_variants', payload))
+    return data
+
+
+def job_reference(job_id: str) -> dict:
+    """Thông tin job trả về cho client để hỏi trạng thái"""
+    return {
+        'id': job_id,
+        'status': 'queued',
+        'status_url': url_for('jobs_job_resource', id=job_id, _external=True)
+    }
+
+
+@task('image_variants')
+def process_image_variants(payload: dict) -> dict:
+    """Job nền: tạo biến thể cho ảnh đã upload, trả về map URL và srcset"""
+    variants = build_variants(payload['folder'], payload['stem'], payload['extension'])
+    return variant_urls(variants, lambda name: payload['url_prefix'] + name)
+
+
+def alternate_path(folder: str, filename: str, extension: str) -> str:
+    """Đường dẫn bản chuyển đổi của ``filename`` sang định dạng ``extension``"""
+    return os.path.join(folder, FORMATS_DIR, f'{filename}.{extension}')
+
+
+def failed_marker_path(folder: str, filename: str, extension: str) -> str:
+    """File rỗng đánh dấu ``filename`` không chuyển đổi được sang ``extension``"""
+    return alternate_path(folder, filename, extension) + FAILED_SUFFIX
+
+
+def _encode(image: Image.Image, fmt: str, icc_profile: Optional[bytes] = None) -> bytes:
+    if fmt != 'JPEG' and image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+    options = dict(SAVE_OPTIONS[fmt])
+    if icc_profile:
+        options['icc_profile'] = icc_profile
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, **options)
+    return buffer.getvalue()
+
+
+def _transcode(image: Image.Image, folder: str, filename: str, source_extension: str) -> list:
+    """Ghi các bản WebP/AVIF của một ảnh vào thư mục .formats, trả về danh sách file đã ghi"""
+    if source_extension not in TRANSCODABLE_EXTENSIONS:
+        return []
+    os.makedirs(os.path.join(folder, FORMATS_DIR), exist_ok=True)
+    written = []
+    for extension, fmt, _ in SUPPORTED_FORMATS:
+        path = alternate_path(folder, filename, extension)
+        atomic_write(path, _encode(image, fmt))
+        written.append(path)
+    return written
+
+
+def _fresh_stat(path: str, source: os.stat_result) -> Optional[os.stat_result]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat if stat.st_mtime_ns >= source.st_mtime_ns else None
+
+
+def _fresh_alternate(folder: str, filename: str, extension: str, source: os.stat_result) -> Optional[os.stat_result]:
+    """Stat của bản chuyển đổi nếu đã có và không cũ hơn ảnh gốc"""
+    return _fresh_stat(alternate_path(folder, filename, extension), source)
+
+
+def _transcode_failed(folder: str, filename: str, extension: str, source: os.stat_result) -> bool:
+    """Lần chuyển đổi trước đã thất bại với đúng file gốc này (ảnh gốc bị thay thì thử lại)"""
+    return _fresh_stat(failed_marker_path(folder, filename, extension), source) is not None
+
+
+def _ensure_alternate(folder: str, filename: str, extension: str, fmt: str, source: os.stat_result) -> Optional[os.stat_result]:
+    """Trả về stat của bản chuyển đổi, tạo nếu chưa có hoặc cũ hơn ảnh gốc.
+
+    Dùng cho ảnh upload trước khi có pipeline biến thể; kết quả được cache
+    trên đĩa nên mỗi ảnh chỉ chuyển đổi một lần cho mọi worker.
+    """
+    stat = _fresh_alternate(folder, filename, extension, source)
+    if stat is not None:
+        return stat
+
+    path = alternate_path(folder, filename, extension)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with file_lock(path):
+        stat = _fresh_alternate(folder, filename, extension, source)
+        if stat is not None or _transcode_failed(folder, filename, extension, source):
+            return stat
+        try:
+            with Image.open(os.path.join(folder, filename)) as image:
+                if getattr(image, 'is_animated', False):
+                    raise ValueError('Ảnh động không chuyển đổi')
+                image = ImageOps.exif_transpose(image)
+                data = _encode(image, fmt)
+        except (UnidentifiedImageError, Image.DecompressionBombError, OSError, ValueError):
+            # Ghi nhận để request sau không xếp lại job cho ảnh này
+            atomic_write(failed_marker_path(folder, filename, extension), b'')
+            return None
+        atomic_write(path, data)
+        return os.stat(path)
+
+
+@task('image_alternates')
+def process_image_alternates(payload: dict) -> dict:
+    """Job nền: tạo các bản WebP/AVIF còn thiếu của một ảnh đã lưu"""
+    folder, filename = payload['folder'], payload['filename']
+    path = safe_join(folder, filename)
+    try:
+        source = os.stat(path) if path is not None else None
+    except FileNotFoundError:
+        source = None
+    if source is None:
+        return {}
+    return {
+        extension: _ensure_alternate(folder, filename, extension, fmt, source) is not None
+        for extension, fmt, _ in SUPPORTED_FORMATS
+    }
+
+
+# Ảnh đã được xếp job chuyển đổi gần đây: không xếp lại với mỗi request tới ảnh đó
+ALTERNATE_REQUEUE_AFTER = 600
+MAX_QUEUED_ALTERNATES = 4096
+_queued_alternates: Dict[str, float] = {}
+
+
+def _queue_alternates(folder: str, path: str, filename: str) -> None:
+    now = time.monotonic()
+    queued_at = _queued_alternates.get(path)
+    if queued_at is not None and now - queued_at < ALTERNATE_REQUEUE_AFTER:
+        return
+    if len(_queued_alternates) >= MAX_QUEUED_ALTERNATES:
+        _queued_alternates.clear()
+    _queued_alternates[path] = now
+    enqueue('image_alternates', {'folder': folder, 'filename': filename})
+
+
+def _accepts(mimetype: str) -> bool:
+    # Không tính wildcard (*/* hay image/*): chỉ gửi định dạng mới khi client nêu rõ
+    return any(value == mimetype and quality > 0 for value, quality in request.accept_mimetypes)
+
+
+def send_image(folder: str, filename: str):
+    """Gửi ảnh ở định dạng nhỏ nhất mà header Accept của client hỗ trợ"""
+    # Kiểm tra tên file từ URL trước mọi thao tác trên đĩa (stat, chuyển đổi, ghi .formats):
+    # '..' hay đường dẫn tuyệt đối không được trỏ ra ngoài thư mục ảnh
+    path = safe_join(folder, filename)
+    if path is None:
+        raise NotFound()
+
+    pending = _pending_original(folder, filename)
+    if pending is not None:
+        # Ảnh đang chờ job tạo biến thể: tạm phục vụ file gốc, không cache lâu dài
+        return _send_file(os.path.join(folder, ORIGINALS_DIR), pending)
+
+    extension = filename.rsplit('.', 1)[-1].lower()
+    candidates = []
+    queued = False
+    if extension in TRANSCODABLE_EXTENSIONS and not filename.startswith(FORMATS_DIR):
+        try:
+            source = os.stat(path)
+        except (FileNotFoundError, NotADirectoryError):
+            source = None
+        if source is not None:
+            for alt_extension, fmt, mimetype in SUPPORTED_FORMATS:
+                if not _accepts(mimetype):
+                    continue
+                stat = _fresh_alternate(folder, filename, alt_extension, source)
+                if stat is None:
+                    # Chuyển đổi ở job nền, request này nhận ảnh gốc
+                    queued = queued or not _transcode_failed(folder, filename, alt_extension, source)
+                elif stat.st_size < source.st_size:
+                    candidates.append((stat.st_size, alt_extension, mimetype))
+            if queued:
+                _queue_alternates(folder, path, filename)
+
+    if not candidates:
+        response = _send_file(folder, filename)
+    else:
+        _, alt_extension, mimetype = min(candidates)
+        response = _send_file(os.path.join(folder, FORMATS_DIR), f'{filename}.{alt_extension}', mimetype)
+    if extension in TRANSCODABLE_EXTENSIONS:
+        response.vary.add('Accept')
+
+    cache_control = response.cache_control
+    if candidates:
+        # Nội dung phụ thuộc Accept: không để cache dùng chung giữ lại
+        cache_control.private = True
+        cache_control.max_age = PENDING_ALTERNATE_MAX_AGE if queued else NEGOTIATED_MAX_AGE
+    elif queued:
+        # Bản WebP/AVIF sắp có: không để client/CDN cache vĩnh viễn ảnh gốc
+        cache_control.max_age = PENDING_ALTERNATE_MAX_AGE
+    elif FINGERPRINTED.match(os.path.basename(filename)):
+        # Ảnh gốc đọc được với mọi client nên cache dùng chung giữ lâu dài cũng an toàn
+        cache_control.public = True
+        cache_control.max_age = IMMUTABLE_MAX_AGE
+        cache_control.immutable = True
+    else:
+        return response
+    # send_from_directory đặt sẵn no-cache, bỏ đi để không mâu thuẫn với max-age
+    cache_control.no_cache = None
+    return response
+
+
+def _pending_original(folder: str, filename: str) -> Optional[str]:
+    """Tên file gốc trong .originals nếu ``filename`` là ảnh chưa xử lý xong"""
+    if '/' in filename or not FINGERPRINTED.match(filename) or os.path.exists(os.path.join(folder, filename)):
+        return None
+    stem = filename[:HASH_LENGTH]
+    for extension in OUTPUT_FORMATS:
+        if os.path.exists(original_path(folder, stem, extension)):
+            return f'{stem}.{extension}'
+    return None
+
+
+def _send_file(directory: str, filename: str, mimetype: Optional[str] = None) -> Response:
+    """Gửi file mà không đọc nội dung qua Python.
+
+    Mặc định dùng ``send_from_directory``: hỗ trợ Range/If-None-Match và trả
+    file qua ``wsgi.file_wrapper`` nên gunicorn dùng sendfile() (zero-copy).
+    Nếu chạy sau nginx, đặt ``X_ACCEL_REDIRECT_PREFIX`` để nginx tự phục vụ file
+    (location internal trỏ tới thư mục static); ``USE_X_SENDFILE`` dùng cho
+    Apache/lighttpd.
+    """
+    prefix = current_app.config.get('X_ACCEL_REDIRECT_PREFIX')
+    if not prefix:
+        return send_from_directory(directory, filename, mimetype=mimetype)
+
+    path = safe_join(directory, filename)
+    if path is None or not os.path.isfile(path):
+        raise NotFound()
+    relative = os.path.relpath(path, current_app.config['STATIC_ROOT']).replace(os.sep, '/')
+    if relative.startswith('..'):
+        raise NotFound()
+    response = Response(mimetype=mimetype or mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+    response.headers['X-Accel-Redirect'] = f"{prefix.rstrip('/')}/{relative}"
+    return response
+
+
+def variant_urls(variants: Dict[str, dict], url_for: Callable[[str], str]) -> dict:
+    """Map URL theo biến thể kèm chuỗi ``srcset`` cho thẻ <img>"""
+    images = {name: url_for(variant['filename']) for name, variant in variants.items()}
+    seen = set()
+    candidates = []
+    for name, _ in reversed(VARIANTS):
+        variant = variants[name]
+        if variant['filename'] in seen:
+            continue
+        seen.add(variant['filename'])
+        candidates.append(f"{images[name]} {variant['width']}w")
+    return {'images': images, 'srcset': ', '.join(candidates)}
+
+
+def image_files(folder: str, filename: str) -> List[str]:
+    """Các file đang có của một ảnh: biến thể, bản chuyển đổi và file gốc chờ xử lý"""
+    stem, _, extension = filename.rpartition('.')
+    paths = [original_path(folder, stem, source_extension) for source_extension in OUTPUT_FORMATS]
+    for name, _ in VARIANTS:
+        variant = variant_filename(stem, name, extension)
+        paths.append(os.path.join(folder, variant))
+        for alt_extension, _, _ in MODERN_FORMATS:
+            paths.append(alternate_path(folder, variant, alt_extension))
+            paths.append(failed_marker_path(folder, variant, alt_extension))
+    return [path for path in dict.fromkeys(paths) if os.path.exists(path)]
+
+
+def remove_image_variants(folder: str, filename: str):
+    """Xóa file ảnh cùng các biến thể, bản chuyển đổi và file gốc chờ xử lý (nếu có)"""
+    for path in image_files(folder, filename):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,141 @@
+import logging
+import os
+import threading
+import time
+import traceback
+from typing import Any, Callable, Dict, List, Optional
+
+from ..storage import get_job_store
+
+logger = logging.getLogger(__name__)
+
+# Loại job -> hàm xử lý nhận payload, trả về kết quả (phải serialize được ra JSON)
+_handlers: Dict[str, Callable[[dict], Any]] = {}
+
+
+def task(kind: str):
+    """Đăng ký hàm xử lý cho một loại job"""
+    def decorator(fn):
+        _handlers[kind] = fn
+        return fn
+    return decorator
+
+
+class JobRunner:
+    """Các thread nền của một worker lấy job từ ``JobStore`` và chạy hàm xử lý.
+
+    Mỗi worker gunicorn có runner riêng nhưng dùng chung hàng đợi SQLite, nên
+    job xếp ở worker này có thể được worker khác chạy. Job mới trong cùng
+    process đánh thức runner ngay, còn lại runner hỏi hàng đợi mỗi
+    ``poll_interval`` giây. Job định kỳ (``schedule``) được xếp khi tới hạn,
+    hàng đợi bảo đảm mỗi chu kỳ chỉ một job dù nhiều worker cùng xếp.
+    """
+
+    def __init__(self, app, workers: int, poll_interval: float = 1.0):
+        self.app = app
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._pid = None
+        self._start_lock = threading.Lock()
+        # [loại job, payload, chu kỳ (giây), lần xếp kế tiếp (monotonic)]
+        self._periodic: List[list] = []
+        self._periodic_lock = threading.Lock()
+
+    def schedule(self, kind: str, interval: float, payload: Optional[dict] = None):
+        """Xếp job ``kind`` mỗi ``interval`` giây (``interval <= 0`` để tắt)"""
+        if interval > 0:
+            self._periodic.append([kind, payload or {}, interval, 0.0])
+
+    def _enqueue_due(self, store):
+        now = time.monotonic()
+        with self._periodic_lock:
+            due = [entry for entry in self._periodic if entry[3] <= now]
+            for entry in due:
+                entry[3] = now + entry[2]
+        for kind, payload, interval, _ in due:
+            try:
+                store.enqueue_periodic(kind, payload, interval)
+            except Exception:
+                logger.exception(f"Không xếp được job định kỳ '{kind}'")
+
+    def start(self):
+        # Thread không sống sót qua fork: khởi động lại khi chạy trong process mới
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            for i in range(self.workers):
+                threading.Thread(target=self._loop, name=f'job-worker-{i}', daemon=True).start()
+
+    def notify(self):
+        self._wakeup.set()
+
+    def _loop(self):
+        store = get_job_store()
+        while True:
+            # Xóa cờ trước khi hỏi hàng đợi: job xếp sau lúc này hoặc được claim
+            # ngay dưới đây, hoặc đặt lại cờ để lần chờ kế tiếp không bị lỡ
+            self._wakeup.clear()
+            self._enqueue_due(store)
+            try:
+                job = store.claim()
+            except Exception:
+                logger.exception('Không lấy được job từ hàng đợi')
+                job = None
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                continue
+            self.run(job)
+
+    def run(self, job: dict):
+        store = get_job_store()
+        handler = _handlers.get(job['kind'])
+        if handler is None:
+            store.fail(job['id'], f"Không có hàm xử lý cho job '{job['kind']}'")
+            return
+        try:
+            with self.app.app_context():
+                result = handler(job['payload'])
+        except Exception as e:
+            logger.error(f"Job {job['id']} ({job['kind']}) lỗi: {e}\n{traceback.format_exc()}")
+            store.fail(job['id'], str(e))
+        else:
+            store.complete(job['id'], result)
+
+
+runner: Optional[JobRunner] = None
+
+
+def init_job_workers(app):
+    """Tạo runner cho các worker phục vụ request (``JOB_WORKERS = 0`` để tắt).
+
+    Thread chỉ được khởi động ở request đầu tiên của mỗi process, nên các
+    lệnh CLI (``flask init-db``, ``gc-images``, ``benchmark``...) import app mà
+    không chạy job nền.
+    """
+    global runner
+    if app.config['JOB_WORKERS'] <= 0:
+        return
+    if runner is None:
+        runner = JobRunner(app, app.config['JOB_WORKERS'])
+        runner.schedule('purge_jobs', app.config['JOB_PURGE_INTERVAL'], {'older_than': app.config['JOB_RETENTION']})
+        runner.schedule('sweep_images', app.config['IMAGE_SWEEP_INTERVAL'])
+
+    @app.before_request
+    def start_job_workers():
+        runner.start()
+
+
+def enqueue(kind: str, payload: dict) -> str:
+    """Xếp một job vào hàng đợi bền vững, trả về id để theo dõi trạng thái"""
+    job_id = get_job_store().enqueue(kind, payload)
+    if runner is not None:
+        runner.notify()
+    return job_id
+
+
+@task('purge_jobs')
+def process_purge_jobs(payload: dict) -> dict:
+    """Job định kỳ: xóa job đã xong/thất bại cũ hơn ``older_than`` giây khỏi hàng đợi"""
+    return {'purged': get_job_store().purge(payload['older_than'])}
@@ -0,0 +1,82 @@
+import base64
+import binascii
+from typing import List, Optional, Sequence
+
+from flask import request
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(f'o:{offset}'.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        prefix, offset = raw.split(':', 1)
+        if prefix != 'o' or not offset.isdigit():
+            raise ValueError
+        return int(offset)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError('Cursor không hợp lệ')
+
+
+class ListQuery:
+    """Tham số lọc, sắp xếp và phân trang của một request lấy danh sách"""
+
+    def __init__(self, filters: List[tuple], sort: List[tuple], limit: Optional[int], offset: int):
+        self.filters = filters
+        self.sort = sort
+        self.limit = limit
+        self.offset = offset
+
+    @property
+    def paginated(self) -> bool:
+        return self.limit is not None
+
+    def pagination(self, total: int) -> dict:
+        next_offset = self.offset + (self.limit or 0)
+        return {
+            'total': total,
+            'limit': self.limit,
+            'next_cursor': encode_cursor(next_offset) if self.paginated and next_offset < total else None
+        }
+
+
+def parse_list_query(
+    filters: Sequence[str] = (),
+    sorts: Sequence[str] = (),
+    default_sort: str = ''
+) -> ListQuery:
+    """Đọc ``limit``, ``cursor``, ``sort`` và các trường lọc từ query string.
+
+    ``sort`` là danh sách trường cách nhau bởi dấu phẩy, thêm ``-`` phía
+    trước để sắp xếp giảm dần (vd. ``sort=-created_at``). Không có ``limit``
+    và ``cursor`` thì trả về toàn bộ danh sách như trước. Ném ValueError nếu
+    tham số không hợp lệ.
+    """
+    args = request.args
+
+    parsed_filters = [(field, '=', args[field]) for field in filters if field in args]
+
+    parsed_sort = []
+    for key in filter(None, args.get('sort', default_sort).split(',')):
+        field = key.lstrip('-')
+        if field not in sorts:
+            raise ValueError(f'Không hỗ trợ sắp xếp theo trường {field}')
+        parsed_sort.append((field, key.startswith('-')))
+
+    limit = None
+    if 'limit' in args:
+        try:
+            limit = int(args['limit'])
+        except ValueError:
+            raise ValueError('limit phải là số nguyên')
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+    elif 'cursor' in args:
+        limit = DEFAULT_PAGE_SIZE
+
+    offset = decode_cursor(args['cursor']) if args.get('cursor') else 0
+    return ListQuery(parsed_filters, parsed_sort, limit, offset)
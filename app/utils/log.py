@@ -0,0 +1,200 @@
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from flask import has_request_context, request
+from flask.logging import default_handler
+
+# Thuộc tính có sẵn của LogRecord; mọi thuộc tính khác (truyền qua ``extra``) là trường có cấu trúc
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """Mỗi bản ghi log là một dòng JSON: thời điểm, mức, logger, thông điệp và các trường ``extra``"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """Gắn method/path của request vào bản ghi ngay trên thread xử lý request
+    (thread ghi log chạy ngoài request context nên không tự lấy được)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if has_request_context():
+            record.method = request.method
+            record.path = request.path
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Chỉ giữ lại một phần bản ghi DEBUG/INFO của các logger ồn ào.
+
+    ``rates`` là tên logger (hoặc tiền tố, vd. ``app.routes``) -> tỉ lệ giữ
+    lại trong khoảng 0..1; tên dài nhất khớp được dùng. Bản ghi từ WARNING trở
+    lên luôn được giữ.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._cache: Dict[str, Optional[float]] = {}
+
+    def _rate(self, name: str) -> Optional[float]:
+        if name not in self._cache:
+            prefixes = [prefix for prefix in self.rates if name == prefix or name.startswith(prefix + '.')]
+            self._cache[name] = self.rates[max(prefixes, key=len)] if prefixes else None
+        return self._cache[name]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        return rate is None or random.random() < rate
+
+
+_exception_formatter = logging.Formatter()
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """``QueueHandler`` không bao giờ chặn: hàng đợi đầy thì bỏ bản ghi và đếm lại"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Ghép thông điệp và định dạng traceback ngay trên thread gốc: tham số và
+        # traceback có thể không an toàn khi chuyển sang thread khác. Phần định
+        # dạng còn lại (JSON, thời gian...) để thread ghi log làm.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogListener:
+    """``QueueListener`` ghi log ra stdout/file trên một thread riêng.
+
+    Thread không sống sót qua fork (gunicorn --preload) nên ``start`` tạo
+    lại listener khi chạy trong process mới.
+    """
+
+    def __init__(self, log_queue: queue.Queue, handlers):
+        self.queue = log_queue
+        self.handlers = handlers
+        self._listener: Optional[logging.handlers.QueueListener] = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._listener = logging.handlers.QueueListener(
+                self.queue, *self.handlers, respect_handler_level=True
+            )
+            self._listener.start()
+
+    def stop(self):
+        with self._lock:
+            if self._listener is not None and self._pid == os.getpid():
+                try:
+                    self._listener.stop()
+                except queue.Full:
+                    # Hàng đợi đầy, không chờ thread ghi nốt
+                    pass
+            self._listener, self._pid = None, None
+
+
+listener: Optional[LogListener] = None
+
+
+def setup_logging(app):
+    """Cấu hình logging của ứng dụng theo config.
+
+    - ``LOG_LEVEL``: mức mặc định; ``LOG_LEVELS``: mức riêng theo module
+    - ``LOG_SAMPLING``: tỉ lệ giữ lại log DEBUG/INFO theo module
+    - ``LOG_FORMAT``: ``json`` (mặc định) hoặc ``text``; ``LOG_FILE``: ghi thêm ra file
+
+    Thread xử lý request chỉ đưa bản ghi vào hàng đợi (``LOG_QUEUE_SIZE``),
+    việc định dạng và ghi ra stdout/file do thread của ``QueueListener`` làm.
+    """
+    global listener
+    config = app.config
+    if listener is not None:
+        listener.stop()
+
+    if config['LOG_FORMAT'] == 'text':
+        formatter = logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s')
+    else:
+        formatter = JsonFormatter()
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if config['LOG_FILE']:
+        handlers.append(logging.handlers.WatchedFileHandler(config['LOG_FILE'], encoding='utf-8'))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(maxsize=config['LOG_QUEUE_SIZE'])
+    queue_handler = DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(config['LOG_SAMPLING']))
+    queue_handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, DroppingQueueHandler):
+            root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(config['LOG_LEVEL'])
+    for name, level in config['LOG_LEVELS'].items():
+        logging.getLogger(name).setLevel(level)
+
+    # Log của Flask (app.logger) đi qua root như mọi logger khác
+    app.logger.removeHandler(default_handler)
+
+    listener = LogListener(log_queue, handlers)
+    listener.start()
+
+    @app.before_request
+    def start_log_listener():
+        listener.start()
+
+
+@atexit.register
+def _flush_logs():
+    if listener is not None:
+        listener.stop()
@@ -0,0 +1,126 @@
+import hmac
+import os
+import time
+from typing import Dict, List, Tuple
+
+from flask import Response, abort, current_app, request
+
+from ..storage import COLLECTIONS, data_file_path, get_metrics_store
+from ..storage.metrics import MetricsFlusher, Sample, metrics
+from .client_ip import client_ip, ip_allowed
+
+metrics.counter('dsc_http_requests_total', 'Số request theo namespace, resource, method và mã trạng thái')
+metrics.histogram('dsc_http_request_duration_seconds', 'Thời gian xử lý request theo namespace và resource')
+
+flusher = None
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def _family(sample_name: str) -> str:
+    for suffix in ('_bucket', '_sum', '_count'):
+        if sample_name.endswith(suffix) and sample_name[:-len(suffix)] in metrics.families:
+            return sample_name[:-len(suffix)]
+    return sample_name
+
+
+def _file_sizes() -> List[Sample]:
+    """Kích thước hiện tại của các file JSON (cùng nhật ký append-only), đọc bằng stat lúc scrape"""
+    samples = []
+    for name in COLLECTIONS:
+        path = data_file_path(name)
+        for file_path in (path, os.path.splitext(path)[0] + '.log.jsonl'):
+            try:
+                size = os.stat(file_path).st_size
+            except FileNotFoundError:
+                continue
+            samples.append(('dsc_json_file_bytes', (('file', os.path.basename(file_path)),), size))
+    return samples
+
+
+def scrape_allowed() -> bool:
+    """``/metrics`` chỉ dành cho máy trong ``METRICS_ALLOW_FROM`` hoặc request có ``METRICS_TOKEN``.
+
+    IP được xác định qua ``client_ip``: request đi qua tunnel cloudflared có
+    header của Cloudflare nên không được tính là loopback.
+    """
+    config = current_app.config
+    token = config['METRICS_TOKEN']
+    if token:
+        scheme, _, value = request.headers.get('Authorization', '').partition(' ')
+        if scheme.lower() == 'bearer' and hmac.compare_digest(value.strip().encode(), token.encode()):
+            return True
+    return ip_allowed(client_ip(), config['METRICS_ALLOW_FROM'])
+
+
+def render(samples: List[Sample]) -> str:
+    """Định dạng text exposition của Prometheus (0.0.4)"""
+    families: Dict[str, List[Sample]] = {}
+    for sample in samples:
+        families.setdefault(_family(sample[0]), []).append(sample)
+
+    lines = []
+    for family in sorted(families):
+        kind, help = metrics.families.get(family, ('untyped', ''))
+        lines.append(f'# HELP {family} {help}')
+        lines.append(f'# TYPE {family} {kind}')
+        for name, labels, value in families[family]:
+            label_text = ','.join(f'{key}="{_escape(str(val))}"' for key, val in labels)
+            lines.append(f'{name}{{{label_text}}} {_format_value(value)}' if label_text else f'{name} {_format_value(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+def init_metrics(app, api):
+    """Đo số request và thời gian xử lý của mọi route, phục vụ tổng hợp mọi worker ở ``/metrics``"""
+    global flusher
+    if flusher is None:
+        flusher = MetricsFlusher(metrics, app.config['METRICS_FLUSH_INTERVAL'])
+    metrics.families['dsc_json_file_bytes'] = ('gauge', 'Kích thước hiện tại của file dữ liệu JSON')
+
+    # Resource class -> tên namespace flask-restx (auth, members, events...)
+    namespaces: Dict[type, str] = {}
+    for namespace in api.namespaces:
+        for route in namespace.resources:
+            namespaces[route.resource] = namespace.name
+
+    def route_labels() -> Tuple[str, str]:
+        if request.url_rule is None:
+            # Không gộp theo URL để số nhãn không tăng theo request 404
+            return 'none', 'unmatched'
+        view = app.view_functions.get(request.url_rule.endpoint)
+        resource = getattr(view, 'view_class', None)
+        if resource in namespaces:
+            return namespaces[resource], resource.__name__
+        return 'app', request.url_rule.endpoint
+
+    @app.before_request
+    def start_timer():
+        flusher.start(get_metrics_store())
+        request.environ['dsc.started'] = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        started = request.environ.get('dsc.started')
+        if started is None:
+            return response
+        namespace, resource = route_labels()
+        labels = {'namespace': namespace, 'resource': resource, 'method': request.method}
+        metrics.observe('dsc_http_request_duration_seconds', labels, time.perf_counter() - started)
+        metrics.inc('dsc_http_requests_total', dict(labels, status=str(response.status_code)))
+        return response
+
+    @app.route('/metrics')
+    def metrics_endpoint():
+        if not scrape_allowed():
+            abort(403)
+        # Ghi số liệu của worker đang phục vụ trước, các worker khác đã ghi trong lần flush gần nhất
+        flusher.start(get_metrics_store())
+        flusher.flush()
+        body = render(get_metrics_store().collect() + _file_sizes())
+        return Response(body, content_type='text/plain; version=0.0.4; charset=utf-8')
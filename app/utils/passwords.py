@@ -0,0 +1,65 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import bcrypt
+from flask import current_app
+
+
+class PasswordCheckBusy(Exception):
+    """Pool kiểm tra mật khẩu đã đầy - nên trả 503 thay vì xếp hàng thêm"""
+
+
+class PasswordHasher:
+    """Chạy bcrypt trong một pool thread có giới hạn, tách khỏi thread xử lý request.
+
+    bcrypt nhả GIL trong lúc băm nên các thread của pool chạy song song thật
+    trên nhiều CPU mà không phải fork worker gunicorn (đang có thread nền).
+    Tối đa ``workers`` phép băm chạy cùng lúc và ``queue_size`` phép chờ;
+    quá mức đó ``check`` báo ``PasswordCheckBusy`` ngay, nên một đợt dò mật
+    khẩu không giữ hết thread của worker và các API khác vẫn phản hồi bình thường.
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ThreadPoolExecutor:
+        # Thread không sống sót qua fork: tạo pool mới trong process mới
+        with self._lock:
+            if self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='bcrypt')
+                self._pid = os.getpid()
+            return self._executor
+
+    def check(self, password: str, password_hash: str) -> bool:
+        if not self._slots.acquire(blocking=False):
+            raise PasswordCheckBusy()
+        try:
+            future = self._pool().submit(
+                bcrypt.checkpw, password.encode('utf-8'), password_hash.encode('utf-8')
+            )
+            return future.result()
+        finally:
+            self._slots.release()
+
+
+_hasher: Optional[PasswordHasher] = None
+_hasher_lock = threading.Lock()
+
+
+def check_password(password: str, password_hash: str) -> bool:
+    """So khớp mật khẩu bằng pool bcrypt của process (``PASSWORD_HASH_WORKERS = 0`` để chạy ngay trên thread hiện tại)"""
+    global _hasher
+    workers = current_app.config['PASSWORD_HASH_WORKERS']
+    if workers <= 0:
+        return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+    if _hasher is None:
+        with _hasher_lock:
+            if _hasher is None:
+                _hasher = PasswordHasher(workers, current_app.config['PASSWORD_HASH_QUEUE'])
+    return _hasher.check(password, password_hash)
@@ -0,0 +1,110 @@
+import threading
+from collections import OrderedDict
+from functools import wraps
+from http import HTTPStatus
+from typing import Dict, Optional, Sequence
+
+from flask import Response, request
+from flask_restx.representations import output_json
+
+from ..storage.timing import timed
+from .compression import compress, encoding_for
+from .http_cache import store_version
+
+MAX_ENTRIES = 256
+
+
+class CachedBody:
+    """Body JSON đã encode của một response cùng các biến thể nén (tạo lười khi cần)"""
+
+    def __init__(self, version: str, body: bytes):
+        self.version = version
+        self.encodings: Dict[str, bytes] = {'identity': body}
+        self._lock = threading.Lock()
+
+    def encoded(self, encoding: str) -> bytes:
+        body = self.encodings.get(encoding)
+        if body is not None:
+            return body
+        with self._lock:
+            if encoding not in self.encodings:
+                with timed('encode'):
+                    self.encodings[encoding] = compress(self.encodings['identity'], encoding)
+            return self.encodings[encoding]
+
+
+class ResponseCache:
+    """Cache LRU các body đã encode, khóa theo đường dẫn + query string.
+
+    Mỗi entry ghi kèm phiên bản kho lưu trữ lúc tạo; khi dữ liệu được tạo, sửa
+    hoặc xóa thì phiên bản đổi và entry cũ bị thay ở lần đọc tiếp theo, kể cả
+    khi thay đổi đến từ một worker khác.
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, CachedBody]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, version: str) -> Optional[CachedBody]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.version != version:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: CachedBody):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+cache = ResponseCache()
+
+
+def _respond(entry: CachedBody) -> Response:
+    encoding = encoding_for(len(entry.encodings['identity']))
+    response = Response(entry.encoded(encoding), status=HTTPStatus.OK, mimetype='application/json')
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def cached_response(*collections: str, registrations: bool = False, daily: bool = False):
+    """Decorator cho ``Resource.get``: phục vụ thẳng body JSON đã encode nếu dữ liệu chưa đổi.
+
+    Lần đầu (hoặc sau khi dữ liệu đổi) vẫn chạy handler như bình thường; chỉ
+    response 200 được cache. Các lần sau bỏ qua việc dựng đối tượng model và
+    encode JSON, trả bytes có sẵn (kèm bản gzip/br nếu client chấp nhận).
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            version, _ = store_version(collections, registrations, daily)
+            key = request.full_path
+            entry = cache.get(key, version)
+            if entry is None:
+                rv = fn(*args, **kwargs)
+                if isinstance(rv, Response):
+                    return rv
+                data, status = rv[:2] if isinstance(rv, tuple) else (rv, HTTPStatus.OK)
+                # Response có header riêng (vd. X-Total-Count) hoặc lỗi thì không cache
+                if int(status) != HTTPStatus.OK or (isinstance(rv, tuple) and len(rv) > 2):
+                    return rv
+                with timed('encode'):
+                    entry = CachedBody(version, output_json(data, HTTPStatus.OK).get_data())
+                cache.put(key, entry)
+            return _respond(entry)
+        return wrapper
+    return decorator
@@ -0,0 +1,65 @@
+import time
+from functools import wraps
+
+from flask import request
+from flask_restx.representations import output_json
+
+from ..storage.timing import begin, current, end, timed
+
+# Thứ tự các giai đoạn trong header; logic là phần còn lại của handler sau khi trừ các giai đoạn khác
+PHASES = ('io', 'parse', 'construct', 'logic', 'dump', 'encode')
+NESTED_PHASES = ('io', 'parse', 'construct', 'dump', 'encode')
+
+
+def timed_view(fn):
+    """Decorator cho mọi Resource (qua ``Api(decorators=...)``): đo giai đoạn ``logic`` của handler"""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        timings = current()
+        if timings is None:
+            return fn(*args, **kwargs)
+        nested_before = sum(timings.get(phase, 0.0) for phase in NESTED_PHASES)
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            nested = sum(timings.get(phase, 0.0) for phase in NESTED_PHASES) - nested_before
+            timings['logic'] = timings.get('logic', 0.0) + max(0.0, elapsed - nested)
+    return wrapper
+
+
+def init_server_timing(app, api):
+    """Gắn header ``Server-Timing`` (io, parse, construct, logic, dump, encode, total) vào mọi response.
+
+    Phải gọi trước ``init_compression`` để thời gian nén được tính vào ``encode``.
+    """
+    if not app.config['SERVER_TIMING']:
+        return
+
+    output = api.representations.get('application/json', output_json)
+
+    @api.representation('application/json')
+    def timed_output_json(data, code, headers=None):
+        with timed('encode'):
+            return output(data, code, headers)
+
+    @app.before_request
+    def start_server_timing():
+        begin()
+        request.environ['dsc.server_timing_started'] = time.perf_counter()
+
+    @app.after_request
+    def add_server_timing(response):
+        timings = current()
+        started = request.environ.get('dsc.server_timing_started')
+        if timings is None or started is None:
+            return response
+        entries = [f'{phase};dur={timings[phase] * 1000:.2f}' for phase in PHASES if phase in timings]
+        entries.append(f'total;dur={(time.perf_counter() - started) * 1000:.2f}')
+        response.headers['Server-Timing'] = ', '.join(entries)
+        return response
+
+    @app.teardown_request
+    def stop_server_timing(exc):
+        end()
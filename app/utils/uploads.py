@@ -0,0 +1,85 @@
+from tempfile import SpooledTemporaryFile
+from typing import Optional
+
+from flask import Request, current_app
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
+
+# Chữ ký đầu file (magic bytes) của các định dạng ảnh được phép upload
+MAGIC_SIZE = 12
+SPOOL_SIZE = 512 * 1024
+
+
+def format_size(size: int) -> str:
+    """Kích thước dễ đọc cho thông báo lỗi (vd. 16MB, 1.5MB, 512KB)"""
+    if size >= 1024 * 1024:
+        return f'{size / (1024 * 1024):.1f}'.rstrip('0').rstrip('.') + 'MB'
+    if size >= 1024:
+        return f'{size / 1024:.1f}'.rstrip('0').rstrip('.') + 'KB'
+    return f'{size}B'
+
+
+def detect_image_type(head: bytes) -> Optional[str]:
+    """Nhận diện định dạng ảnh từ vài byte đầu, None nếu không phải ảnh hợp lệ"""
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'jpeg'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return 'gif'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+class UploadSpool:
+    """File tạm nhận dữ liệu upload trong lúc werkzeug đọc body multipart.
+
+    Dữ liệu được ghi theo chunk vào ``SpooledTemporaryFile`` (tràn ra đĩa khi
+    quá ``SPOOL_SIZE``) nên bộ nhớ cho mỗi upload luôn bị chặn. Magic bytes
+    được kiểm tra ngay ở chunk đầu và kích thước được đếm khi ghi, nên file
+    sai định dạng hoặc quá lớn bị từ chối trước khi đọc phần body còn lại.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.size = 0
+        self.kind = None
+        self._head = b''
+        self._file = SpooledTemporaryFile(max_size=SPOOL_SIZE, mode='w+b')
+
+    def _check_head(self):
+        self.kind = detect_image_type(self._head)
+        if self.kind is None:
+            self._file.close()
+            raise UnsupportedMediaType('Nội dung file không phải ảnh hợp lệ (png, jpg, gif, webp)')
+
+    def write(self, data: bytes) -> int:
+        self.size += len(data)
+        if self.size > self.max_size:
+            self._file.close()
+            raise RequestEntityTooLarge(f'File vượt quá giới hạn {format_size(self.max_size)}')
+        if self.kind is None:
+            self._head += data[:MAGIC_SIZE - len(self._head)]
+            if len(self._head) >= MAGIC_SIZE:
+                self._check_head()
+        return self._file.write(data)
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        # File ngắn hơn MAGIC_SIZE: kiểm tra khi werkzeug tua lại sau khi ghi xong.
+        # File rỗng (không chọn file) để route tự trả lỗi như trước
+        if self.kind is None and self.size:
+            self._check_head()
+        return self._file.seek(offset, whence)
+
+    def __iter__(self):
+        return iter(self._file)
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+
+class UploadRequest(Request):
+    """Request dùng ``UploadSpool`` cho mọi file trong body multipart"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return UploadSpool(current_app.config['MAX_UPLOAD_FILE_SIZE'])
@@ -0,0 +1,177 @@
+"""Bộ benchmark cho tầng model và các endpoint, chạy trên dữ liệu giả lập.
+
+Mỗi kích thước dữ liệu chạy trong một thư mục tạm riêng (file JSON, các
+database SQLite) với một app mới tạo từ ``create_app``. Kết quả là JSON:
+thời gian lần gọi đầu (cache còn lạnh), trung vị và p95 theo mili giây của
+từng thao tác, để so với file baseline khi review.
+"""
+import json
+import os
+import platform
+import random
+import statistics
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List
+
+from config import Config
+
+from . import synthetic
+
+# Chênh lệch tuyệt đối dưới ngưỡng này (ms) coi là nhiễu, không tính là chậm đi
+NOISE_FLOOR_MS = 1.0
+
+
+def measure(fn: Callable[[int], object], repeat: int) -> dict:
+    """Gọi ``fn(i)`` ``repeat`` lần; lần đầu được báo riêng vì thường phải đọc/parse file"""
+    samples = []
+    for i in range(repeat):
+        started = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - started) * 1000)
+    warm = sorted(samples[1:] or samples)
+    return {
+        'first_ms': round(samples[0], 3),
+        'median_ms': round(statistics.median(warm), 3),
+        'p95_ms': round(warm[min(len(warm) - 1, int(len(warm) * 0.95))], 3),
+        'runs': repeat
+    }
+
+
+def _configure(directory: str, backend: str) -> None:
+    """Trỏ mọi nơi lưu dữ liệu của app vào thư mục tạm của lần chạy"""
+    Config.STORAGE_BACKEND = backend
+    Config.DATA_DIR = directory
+    Config.SQLITE_DATABASE = os.path.join(directory, 'dsc.sqlite3')
+    Config.REVOCATIONS_DATABASE = os.path.join(directory, 'revocations.sqlite3')
+    Config.RATE_LIMITS_DATABASE = os.path.join(directory, 'ratelimits.sqlite3')
+    Config.METRICS_DATABASE = os.path.join(directory, 'metrics.sqlite3')
+    Config.JOBS_DATABASE = os.path.join(directory, 'jobs.sqlite3')
+    Config.LOCKS_DIR = os.path.join(directory, 'locks')
+    # Không chạy job nền (dọn ảnh...) song song với phép đo
+    Config.JOB_WORKERS = 0
+    Config.LOG_LEVEL = 'WARNING'
+
+
+def _model_benchmarks(size: int, repeat: int, seed: int) -> Dict[str, dict]:
+    from app.models.event import Event
+    from app.models.member import Member
+    from app.models.project import Project
+
+    rng = random.Random(seed)
+    ids = [rng.randrange(1, size + 1) for _ in range(repeat)]
+    results = {}
+    for model, factory in ((Member, synthetic.member), (Event, synthetic.event), (Project, synthetic.project)):
+        name = model.__name__
+        created: List[int] = []
+
+        def create(i):
+            data = factory(rng, 0)
+            del data['id']
+            created.append(model.create(data).id)
+
+        def update(i):
+            model.update(ids[i], factory(rng, ids[i]))
+
+        results[f'{name}.get_all'] = measure(lambda i: model.get_all(), repeat)
+        results[f'{name}.get_by_id'] = measure(lambda i: model.get_by_id(ids[i]), repeat)
+        results[f'{name}.create'] = measure(create, repeat)
+        results[f'{name}.update'] = measure(update, repeat)
+        results[f'{name}.delete'] = measure(lambda i: model.delete(created[i]), repeat)
+
+    results['Event.increment_participants'] = measure(
+        lambda i: Event.increment_participants(ids[i], f'10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}'),
+        repeat
+    )
+    return results
+
+
+def _http_benchmarks(app, size: int, repeat: int, seed: int) -> Dict[str, dict]:
+    rng = random.Random(seed)
+    ids = [rng.randrange(1, size + 1) for _ in range(repeat)]
+    client = app.test_client()
+    results = {}
+
+    def request(label: str, send: Callable[[int], object], runs: int = repeat):
+        statuses = Counter()
+
+        def call(i):
+            statuses[send(i).status_code] += 1
+
+        results[label] = measure(call, runs)
+        results[label]['status'] = {str(code): count for code, count in sorted(statuses.items())}
+
+    for namespace in ('members', 'events', 'projects', 'contacts', 'banners'):
+        request(f'GET /{namespace}', lambda i, ns=namespace: client.get(f'/{ns}'))
+        request(f'GET /{namespace}?limit=20', lambda i, ns=namespace: client.get(f'/{ns}?limit=20'))
+    for namespace in ('members', 'events', 'projects'):
+        request(f'GET /{namespace}/<id>', lambda i, ns=namespace: client.get(f'/{ns}/{ids[i]}'))
+    request('POST /contacts', lambda i: client.post('/contacts', json={
+        'name': 'Benchmark', 'email': f'bench{i}@gmail.com', 'subject': 'other', 'message': 'Tin nhắn benchmark'
+    }))
+    # Đăng nhập chạy bcrypt (~0.25s mỗi lần), đo ít lần hơn; mỗi lần một IP để không chạm giới hạn tần suất
+    request('POST /auth/login', lambda i: client.post(
+        '/auth/login', json={'username': 'admin', 'password': 'benchmark'},
+        environ_base={'REMOTE_ADDR': f'10.1.{i // 256 % 256}.{i % 256}'}
+    ), runs=min(repeat, 3))
+    return results
+
+
+def run(sizes: Iterable[int], repeat: int = 10, backend: str = 'json', seed: int = 0, log=print) -> dict:
+    """Chạy toàn bộ benchmark với từng kích thước dữ liệu, trả về kết quả dạng dict (ghi được ra JSON)"""
+    from app import create_app
+
+    report = {
+        'meta': {
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'backend': backend,
+            'repeat': repeat,
+            'seed': seed
+        },
+        'sizes': {}
+    }
+    for size in sizes:
+        with tempfile.TemporaryDirectory(prefix=f'dsc-bench-{size}-') as directory:
+            log(f'[{size}] sinh dữ liệu...')
+            files = synthetic.generate(directory, size, seed)
+            _configure(directory, backend)
+            app = create_app()
+            with app.app_context():
+                log(f'[{size}] model...')
+                model = _model_benchmarks(size, repeat, seed)
+            log(f'[{size}] endpoint...')
+            http = _http_benchmarks(app, size, repeat, seed)
+        report['sizes'][str(size)] = {'files': files, 'model': model, 'http': http}
+    return report
+
+
+def write(report: dict, path: str) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def compare(baseline: dict, report: dict, tolerance: float) -> List[str]:
+    """Các thao tác có trung vị chậm hơn baseline quá ``tolerance`` (tỉ lệ, vd. 0.25 = 25%)"""
+    regressions = []
+    for size, groups in report['sizes'].items():
+        base_groups = baseline.get('sizes', {}).get(size)
+        if base_groups is None:
+            continue
+        for group in ('model', 'http'):
+            for name, result in groups[group].items():
+                base = base_groups.get(group, {}).get(name)
+                if base is None:
+                    continue
+                before, after = base['median_ms'], result['median_ms']
+                if after > before * (1 + tolerance) and after - before > NOISE_FLOOR_MS:
+                    regressions.append(
+                        f'[{size}] {name}: {before:.3f} ms -> {after:.3f} ms (x{after / max(before, 1e-9):.2f})'
+                    )
+    return regressions
@@ -0,0 +1,145 @@
+"""Sinh dữ liệu giả lập cho benchmark: cùng cấu trúc với các file trong data/.
+
+Dữ liệu sinh từ ``random.Random(seed)`` nên cùng (kích thước, seed) luôn cho
+cùng nội dung, kết quả benchmark giữa các lần chạy so sánh được với nhau.
+"""
+import json
+import os
+import random
+from datetime import date, datetime, timedelta
+from typing import Dict
+
+FAMILY_NAMES = ['Nguyễn', 'Trần', 'Lê', 'Phạm', 'Hoàng', 'Huỳnh', 'Phan', 'Võ', 'Đặng', 'Bùi', 'Đỗ', 'Hồ']
+MIDDLE_NAMES = ['Văn', 'Thị', 'Minh', 'Ngọc', 'Thanh', 'Quốc', 'Gia', 'Hoài', 'Đức', 'Thu']
+GIVEN_NAMES = ['Anh', 'Bình', 'Châu', 'Dũng', 'Giang', 'Hà', 'Khoa', 'Linh', 'Nam', 'Phúc', 'Quân', 'Trang', 'Vy']
+TEAMS = [('lead', 'Lead Team'), ('tech', 'Technical Team'), ('media', 'Media Team'), ('event', 'Event Team')]
+SKILLS = ['Python', 'Flask', 'React', 'Node.js', 'Docker', 'Kubernetes', 'Machine Learning', 'UI/UX',
+          'Figma', 'Google Cloud', 'Firebase', 'Flutter', 'Public Speaking', 'Project Management']
+CATEGORIES = ['web', 'mobile', 'ai', 'cloud', 'iot']
+SUBJECTS = ['project', 'event', 'partnership', 'recruitment', 'other']
+LOCATIONS = ['Phòng Hội thảo A, Trường ĐH SPKT TP.HCM', 'Hội trường lớn, Trường ĐH SPKT TP.HCM', 'Online qua Google Meet']
+SENTENCES = [
+    'Chuỗi sự kiện học tập cùng các chuyên gia đến từ Google và cộng đồng lập trình viên.',
+    'Sinh viên được thực hành trực tiếp trên hạ tầng đám mây với hướng dẫn chi tiết từng bước.',
+    'Dự án tập trung vào trải nghiệm người dùng, hiệu năng và khả năng mở rộng khi số lượng người dùng tăng.',
+    'Các thành viên phối hợp theo quy trình Agile, review code chéo và triển khai tự động.',
+    'Buổi chia sẻ giúp các bạn định hướng nghề nghiệp và kết nối với doanh nghiệp trong lĩnh vực công nghệ.',
+    'Nội dung bao gồm lý thuyết nền tảng, bài tập thực hành và phần hỏi đáp cuối chương trình.'
+]
+
+# Kích thước mặc định của bộ benchmark: dữ liệu hiện tại, x100 và x1000
+SIZES = (100, 10_000, 100_000)
+
+
+def _name(rng: random.Random) -> str:
+    return f'{rng.choice(FAMILY_NAMES)} {rng.choice(MIDDLE_NAMES)} {rng.choice(GIVEN_NAMES)}'
+
+
+def _text(rng: random.Random, sentences: int) -> str:
+    return ' '.join(rng.choice(SENTENCES) for _ in range(sentences))
+
+
+def member(rng: random.Random, id: int) -> dict:
+    team, department = rng.choice(TEAMS)
+    return {
+        'id': id,
+        'name': _name(rng),
+        'role': rng.choice(['Member', 'Core Team', 'Leader', 'Mentor']),
+        'team': team,
+        'department': department,
+        'avatar': f'/static/images/members/{id:032x}_card.jpg',
+        'year': rng.choice(['2023-2024', '2024-2025']),
+        'skills': rng.sample(SKILLS, 3),
+        'links': {'facebook': 'https://facebook.com', 'github': 'https://github.com', 'email': f'member{id}@ute-dsc.edu.vn'}
+    }
+
+
+def event(rng: random.Random, id: int) -> dict:
+    day = date(2024, 1, 1) + timedelta(days=rng.randrange(0, 1000))
+    return {
+        'id': id,
+        'title': f'Google Developer Workshop #{id}',
+        'description': _text(rng, 4),
+        'date': day.isoformat(),
+        'time': '14:00 - 17:00',
+        'location': rng.choice(LOCATIONS),
+        'status': 'upcoming',
+        'image': f'/static/images/events/{id:032x}_card.jpg',
+        # Đủ chỗ cho mọi lượt đăng ký trong benchmark
+        'maxParticipants': 1_000_000,
+        'currentParticipants': 0,
+        'organizer': 'DSC UTE',
+        'googleFormUrl': 'https://forms.google.com/...'
+    }
+
+
+def project(rng: random.Random, id: int) -> dict:
+    return {
+        'id': id,
+        'title': f'Dự án cộng đồng {id}',
+        'description': _text(rng, 3),
+        'category': rng.choice(CATEGORIES),
+        'image': f'/static/images/events/{id:032x}_card.jpg',
+        'progress': rng.randrange(0, 101),
+        'teamSize': rng.randrange(2, 9),
+        'technologies': rng.sample(SKILLS, 4),
+        'links': {'github': f'https://github.com/ute-dsc/project-{id}', 'demo': ''},
+        'details': _text(rng, 6),
+        'teamMembers': [{'name': _name(rng), 'role': 'Developer', 'avatar': ''} for _ in range(3)]
+    }
+
+
+def contact(rng: random.Random, id: int) -> dict:
+    created = datetime(2024, 1, 1) + timedelta(minutes=rng.randrange(0, 1_000_000))
+    return {
+        'id': id,
+        'name': _name(rng),
+        'email': f'user{id}@gmail.com',
+        'subject': rng.choice(SUBJECTS),
+        'message': _text(rng, 2),
+        'created_at': created.isoformat()
+    }
+
+
+def banner(rng: random.Random, id: int) -> dict:
+    return {
+        'id': id,
+        'title': f'Banner {id}',
+        'description': _text(rng, 1),
+        'image': f'/static/images/banners/{id:032x}_full.jpg',
+        'order': id,
+        'active': rng.random() < 0.8,
+        'created_at': (datetime(2024, 1, 1) + timedelta(hours=id)).isoformat()
+    }
+
+
+def generate(directory: str, size: int, seed: int = 0) -> Dict[str, int]:
+    """Ghi members/events/projects/contacts/banners.json với ``size`` bản ghi mỗi file vào ``directory``.
+
+    db.json chỉ có một tài khoản admin (mật khẩu ``benchmark``). Trả về
+    tên file -> kích thước (byte).
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    files = {
+        'members.json': {'members': [member(rng, i) for i in range(1, size + 1)]},
+        'events.json': {'events': [event(rng, i) for i in range(1, size + 1)]},
+        'projects.json': {'projects': [project(rng, i) for i in range(1, size + 1)]},
+        'contacts.json': [contact(rng, i) for i in range(1, size + 1)],
+        'banners.json': [banner(rng, i) for i in range(1, size + 1)],
+        'db.json': {'users': [{
+            'id': 1,
+            'username': 'admin',
+            # bcrypt('benchmark'), cost 12 như generate_hash.py
+            'password_hash': '$2b$12$f07VuXy8NxMyoQg/0nUuOu6k44lHOCiRIx/4dX9E1kFElmG2/PnFa',
+            'role': 'admin'
+        }]}
+    }
+    sizes = {}
+    for name, data in files.items():
+        path = os.path.join(directory, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        sizes[name] = os.path.getsize(path)
+    return sizes
+
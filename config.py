@@ -1,6 +1,13 @@
 import os
 from datetime import timedelta
 
+
+def _env_mapping(name, cast=str):
+    """Đọc biến môi trường dạng ``a=x,b=y`` thành dict"""
+    items = (item.split('=', 1) for item in (os.environ.get(name) or '').split(',') if '=' in item)
+    return {key.strip(): cast(value.strip()) for key, value in items}
+
+
 class Config:
     # Cấu hình Flask
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key'
@@ -13,4 +20,67 @@ class Config:
     JWT_BLACKLIST_TOKEN_CHECKS = ['access', 'refresh']
     
     # Cấu hình CORS
-    CORS_HEADERS = 'Content-Type' 
\ No newline at end of file
+    CORS_HEADERS = 'Content-Type'
+
+    # Cấu hình lưu trữ: 'json' (file trong DATA_DIR) hoặc 'sqlite'
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND') or 'json'
+    DATA_DIR = os.environ.get('DATA_DIR') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+    SQLITE_DATABASE = os.environ.get('SQLITE_DATABASE') or os.path.join(DATA_DIR, 'dsc.sqlite3')
+    # Token đã thu hồi (đăng xuất, refresh token đã xoay vòng), dùng chung giữa các worker
+    REVOCATIONS_DATABASE = os.environ.get('REVOCATIONS_DATABASE') or os.path.join(DATA_DIR, 'revocations.sqlite3')
+    # Đăng nhập: bcrypt chạy trong pool giới hạn, số lần thử được đếm chung giữa các worker
+    RATE_LIMITS_DATABASE = os.environ.get('RATE_LIMITS_DATABASE') or os.path.join(DATA_DIR, 'ratelimits.sqlite3')
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS') or 2)
+    PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE') or 8)
+    LOGIN_RATE_LIMIT_WINDOW = int(os.environ.get('LOGIN_RATE_LIMIT_WINDOW') or 300)
+    LOGIN_RATE_LIMIT_IP = int(os.environ.get('LOGIN_RATE_LIMIT_IP') or 20)
+    LOGIN_RATE_LIMIT_USERNAME = int(os.environ.get('LOGIN_RATE_LIMIT_USERNAME') or 5)
+    # Proxy được tin header CF-Connecting-IP/X-Forwarded-For (IP hoặc dải CIDR, cách nhau bởi dấu phẩy);
+    # mặc định loopback vì cloudflared chạy cùng máy
+    TRUSTED_PROXIES = [
+        proxy.strip() for proxy in (os.environ.get('TRUSTED_PROXIES') or '127.0.0.1,::1').split(',') if proxy.strip()
+    ]
+    # Số liệu cho /metrics: mỗi worker ghi vào database chung sau mỗi METRICS_FLUSH_INTERVAL giây
+    METRICS_DATABASE = os.environ.get('METRICS_DATABASE') or os.path.join(DATA_DIR, 'metrics.sqlite3')
+    METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL') or 5)
+    # /metrics chỉ phục vụ IP trong METRICS_ALLOW_FROM (mặc định loopback, không tính request qua tunnel)
+    # hoặc request có header Authorization: Bearer <METRICS_TOKEN>
+    METRICS_ALLOW_FROM = [
+        address.strip() for address in (os.environ.get('METRICS_ALLOW_FROM') or '127.0.0.1,::1').split(',')
+        if address.strip()
+    ]
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN') or None
+    # Header Server-Timing chia thời gian xử lý theo giai đoạn (io, parse, construct, logic, dump, encode)
+    SERVER_TIMING = (os.environ.get('SERVER_TIMING') or 'true').lower() == 'true'
+    # Logging: mức mặc định, mức riêng theo module (vd. LOG_LEVELS=app.routes.contact=DEBUG,werkzeug=WARNING)
+    # và tỉ lệ giữ lại log DEBUG/INFO của module ồn ào (vd. LOG_SAMPLING=app.routes.member=0.1)
+    LOG_LEVEL = (os.environ.get('LOG_LEVEL') or 'INFO').upper()
+    LOG_LEVELS = _env_mapping('LOG_LEVELS', str.upper)
+    LOG_SAMPLING = _env_mapping('LOG_SAMPLING', float)
+    LOG_FORMAT = os.environ.get('LOG_FORMAT') or 'json'
+    LOG_FILE = os.environ.get('LOG_FILE') or None
+    LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE') or 10000)
+    # Hàng đợi công việc nền (xử lý ảnh sau upload, dọn file) và số thread xử lý mỗi worker
+    JOBS_DATABASE = os.environ.get('JOBS_DATABASE') or os.path.join(DATA_DIR, 'jobs.sqlite3')
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS') or 2)
+    # Job đã xong/thất bại được giữ lại JOB_RETENTION giây (để hỏi trạng thái), dọn mỗi JOB_PURGE_INTERVAL giây
+    JOB_RETENTION = int(os.environ.get('JOB_RETENTION') or 7 * 24 * 3600)
+    JOB_PURGE_INTERVAL = int(os.environ.get('JOB_PURGE_INTERVAL') or 3600)
+    # Chu kỳ (giây) job quét ảnh không còn bản ghi nào dùng; đặt 0 để tắt và chạy tay bằng `flask gc-images`
+    IMAGE_SWEEP_INTERVAL = int(os.environ.get('IMAGE_SWEEP_INTERVAL') or 24 * 3600)
+    # Số dòng nhật ký (contacts.log.jsonl) trước khi gộp vào snapshot
+    JOURNAL_COMPACT_EVERY = int(os.environ.get('JOURNAL_COMPACT_EVERY') or 200)
+    # File .lock của khóa ghi (dữ liệu JSON, ảnh theo mã băm), dùng chung giữa các worker
+    LOCKS_DIR = os.environ.get('LOCKS_DIR') or os.path.join(DATA_DIR, 'locks')
+
+    # Giới hạn kích thước mỗi file upload, kiểm tra trong lúc đọc body (kể cả upload chunked)
+    MAX_UPLOAD_FILE_SIZE = int(os.environ.get('MAX_UPLOAD_FILE_SIZE') or 16 * 1024 * 1024)
+
+    # Response nhỏ hơn ngưỡng này (byte) không được nén gzip/br
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE') or 1024)
+
+    STATIC_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+    # Phục vụ ảnh tĩnh: để trống thì gunicorn gửi file bằng sendfile();
+    # chạy sau nginx thì đặt tiền tố location internal (alias tới STATIC_ROOT, vd. /_static/) để dùng X-Accel-Redirect
+    X_ACCEL_REDIRECT_PREFIX = os.environ.get('X_ACCEL_REDIRECT_PREFIX') or None
+    USE_X_SENDFILE = (os.environ.get('USE_X_SENDFILE') or '').lower() == 'true'
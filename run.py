@@ -1,5 +1,17 @@
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from collections import Counter
+
+import click
+
 from app import create_app
 from app.models.user import User
+from app.storage import RegistrationStore
+from app.utils.image_gc import DEFAULT_MIN_AGE, image_folders, sweep_orphaned_images
 from config import Config
 
 app = create_app()
@@ -19,4 +31,95 @@ def init_db():
     else:
         print('Tài khoản admin đã tồn tại')
     
-    print('Khởi tạo database hoàn tất') 
\ No newline at end of file
+    print('Khởi tạo database hoàn tất')
+
+@app.cli.command("gc-images")
+@click.option('--min-age', default=DEFAULT_MIN_AGE, show_default=True, help='Chỉ xóa file cũ hơn số giây này')
+@click.option('--dry-run', is_flag=True, help='Chỉ liệt kê file sẽ bị xóa')
+def gc_images(min_age, dry_run):
+    """Xóa ảnh trong static/images không còn bản ghi nào tham chiếu"""
+    stats = sweep_orphaned_images(image_folders(app.config), min_age, dry_run)
+    for path in stats['files']:
+        print(('[dry-run] ' if dry_run else '') + path)
+    print(f"Đã quét {stats['scanned']} file, {'sẽ xóa' if dry_run else 'đã xóa'} {stats['removed']} file "
+          f"({stats['freed_bytes'] / 1024:.0f} KB)")
+
+def _register_batch(database, event_id, ips):
+    store = RegistrationStore(database)
+    return Counter(store.register(event_id, ip) for ip in ips)
+
+@app.cli.command("loadtest-registrations")
+@click.option('--workers', default=8, show_default=True, help='Số process đăng ký song song')
+@click.option('--attempts', default=5000, show_default=True, help='Tổng số lượt đăng ký')
+@click.option('--capacity', default=1000, show_default=True, help='Số chỗ của sự kiện')
+@click.option('--unique-ips', default=3000, show_default=True, help='Số IP khác nhau')
+def loadtest_registrations(workers, attempts, capacity, unique_ips):
+    """Kiểm tra tải đăng ký sự kiện: nhiều process cùng đăng ký, không được vượt số chỗ"""
+    event_id = 1
+    ips = [f'10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}' for i in range(unique_ips)]
+    plan = [ips[i % unique_ips] for i in range(attempts)]
+    random.shuffle(plan)
+    batches = [plan[i::workers] for i in range(workers)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.join(tmp, 'loadtest.sqlite3')
+        store = RegistrationStore(database)
+        store.seed(event_id, capacity, 0, [])
+
+        started = time.perf_counter()
+        with multiprocessing.get_context('fork').Pool(workers) as pool:
+            results = pool.starmap(_register_batch, [(database, event_id, batch) for batch in batches])
+        elapsed = time.perf_counter() - started
+
+        statuses = sum(results, Counter())
+        participants = store.participants(event_id)
+        registered = store.registered_ips(event_id)
+
+    expected = min(capacity, len(set(plan)))
+    print(f'{attempts} lượt đăng ký / {workers} process trong {elapsed:.2f}s '
+          f'({attempts / elapsed:.0f} lượt/s)')
+    print(f'Kết quả: {dict(statuses)}')
+    print(f'Số chỗ: {capacity}, đã đăng ký: {participants}, IP đã lưu: {len(registered)}')
+
+    if not (participants == len(registered) == len(set(registered)) == statuses['SUCCESS'] == expected):
+        raise click.ClickException(f'Sai số lượng đăng ký (mong đợi {expected})')
+    print('OK: không vượt số chỗ, không trùng IP')
+
+@app.cli.command("generate-data")
+@click.option('--size', default=10_000, show_default=True, help='Số bản ghi mỗi collection')
+@click.option('--out', required=True, help='Thư mục ghi các file JSON')
+@click.option('--seed', default=0, show_default=True)
+def generate_data(size, out, seed):
+    """Sinh dữ liệu giả lập (members, events, projects, contacts, banners) để thử tải"""
+    from benchmarks import synthetic
+
+    files = synthetic.generate(out, size, seed)
+    for name, size_bytes in files.items():
+        print(f'{name}: {size_bytes / 1024:.0f} KB')
+
+@app.cli.command("benchmark")
+@click.option('--sizes', default=None, help='Các kích thước dữ liệu, cách nhau bởi dấu phẩy (mặc định: benchmarks.synthetic.SIZES)')
+@click.option('--repeat', default=10, show_default=True, help='Số lần đo mỗi thao tác')
+@click.option('--backend', type=click.Choice(['json', 'sqlite']), default='json', show_default=True)
+@click.option('--seed', default=0, show_default=True)
+@click.option('--output', default='benchmarks/baseline.json', show_default=True, help='File ghi kết quả')
+@click.option('--compare', 'baseline_path', default=None, help='So với file kết quả cũ, báo lỗi nếu chậm đi')
+@click.option('--tolerance', default=0.25, show_default=True, help='Tỉ lệ chậm đi cho phép khi so sánh')
+def benchmark(sizes, repeat, backend, seed, output, baseline_path, tolerance):
+    """Đo thời gian các thao tác model và endpoint trên dữ liệu giả lập"""
+    from benchmarks import suite
+    from benchmarks.synthetic import SIZES
+
+    sizes = [int(size) for size in sizes.split(',')] if sizes else list(SIZES)
+    report = suite.run(sizes, repeat, backend, seed)
+    suite.write(report, output)
+    print(f'Đã ghi kết quả vào {output}')
+
+    if baseline_path:
+        with open(baseline_path, encoding='utf-8') as f:
+            regressions = suite.compare(json.load(f), report, tolerance)
+        for line in regressions:
+            print(line)
+        if regressions:
+            raise click.ClickException(f'{len(regressions)} thao tác chậm hơn baseline quá {tolerance:.0%}')
+        print('OK: không có thao tác nào chậm hơn baseline')
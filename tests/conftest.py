@@ -0,0 +1,61 @@
+import os
+import shutil
+
+import pytest
+
+from config import Config
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+
+@pytest.fixture(autouse=True)
+def locks_dir(tmp_path, monkeypatch):
+    directory = tmp_path / 'locks'
+    monkeypatch.setattr(Config, 'LOCKS_DIR', str(directory))
+    return directory
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Bản sao data/ trong thư mục tạm; mọi database SQLite cũng nằm ở đó"""
+    directory = tmp_path / 'data'
+    directory.mkdir()
+    for name in os.listdir(DATA_DIR):
+        if name.endswith('.json'):
+            shutil.copy(os.path.join(DATA_DIR, name), directory / name)
+    monkeypatch.setattr(Config, 'DATA_DIR', str(directory))
+    for setting, filename in (
+        ('SQLITE_DATABASE', 'dsc.sqlite3'),
+        ('REVOCATIONS_DATABASE', 'revocations.sqlite3'),
+        ('RATE_LIMITS_DATABASE', 'ratelimits.sqlite3'),
+        ('METRICS_DATABASE', 'metrics.sqlite3'),
+        ('JOBS_DATABASE', 'jobs.sqlite3'),
+    ):
+        monkeypatch.setattr(Config, setting, str(directory / filename))
+    monkeypatch.setattr(Config, 'JOB_WORKERS', 0)
+    monkeypatch.setattr(Config, 'LOG_LEVEL', 'WARNING')
+    return directory
+
+
+@pytest.fixture
+def app(data_dir):
+    from app import create_app
+
+    app = create_app()
+    app.config['TESTING'] = True
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def image_root(app, tmp_path):
+    """Thư mục ảnh tạm thay cho static/images"""
+    root = tmp_path / 'static' / 'images'
+    for name in ('members', 'events', 'banners'):
+        (root / name).mkdir(parents=True)
+        app.config[f'UPLOAD_FOLDER_{name.upper()}'] = str(root / name)
+    return root
@@ -0,0 +1,52 @@
+import io
+
+from PIL import Image
+
+from app.routes import banner as banner_routes
+
+
+def _jpeg():
+    buffer = io.BytesIO()
+    Image.new('RGB', (8, 8)).save(buffer, 'JPEG')
+    buffer.seek(0)
+    return buffer
+
+
+def _released(monkeypatch):
+    import app.utils.image_gc as image_gc
+
+    released = []
+    monkeypatch.setattr(image_gc, 'enqueue', lambda kind, payload: released.append(payload['images']))
+    return released
+
+
+def test_update_keeps_fields_and_releases_old_image(client, monkeypatch):
+    released = _released(monkeypatch)
+    new_image = {'image': '/static/images/banners/new.jpg', 'images': {}, 'srcset': ''}
+    monkeypatch.setattr(banner_routes, 'save_banner_image', lambda file: (new_image, None))
+
+    response = client.put('/banners/1', data={'title': 'Mới', 'image': (_jpeg(), 'a.jpg')})
+
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    assert data['title'] == 'Mới'
+    assert data['image'] == new_image['image']
+    assert data['order'] == 1
+    assert released == [[('banners', 'banner_1736114874_z6176099951065_1bfbc37350ae977638690e1613e18f18.jpg')]]
+
+
+def test_update_of_banner_deleted_meanwhile_is_not_written_back(client, monkeypatch):
+    released = _released(monkeypatch)
+    new_image = {'image': '/static/images/banners/new.jpg', 'images': {}, 'srcset': ''}
+
+    def save_while_deleted(file):
+        # Banner bị xóa trong lúc ảnh mới đang được lưu
+        assert client.delete('/banners/1').status_code == 204
+        return new_image, None
+
+    monkeypatch.setattr(banner_routes, 'save_banner_image', save_while_deleted)
+    response = client.put('/banners/1', data={'title': 'Mới', 'image': (_jpeg(), 'a.jpg')})
+
+    assert response.status_code == 404
+    assert client.put('/banners/1', data={'title': 'Mới'}).status_code == 404
+    assert ('banners', 'new.jpg') in [image for images in released for image in images]
@@ -0,0 +1,71 @@
+import gzip
+
+import pytest
+from flask import Response
+
+from app.utils import compression, response_cache
+
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    compression.cache.clear()
+    response_cache.cache.clear()
+
+
+@pytest.fixture
+def routes(app):
+    @app.route('/_test/json/<int:size>')
+    def json_body(size):
+        return Response('{"a":"' + 'x' * size + '"}', mimetype='application/json')
+
+    @app.route('/_test/stream')
+    def stream():
+        return Response((f'{{"line":{i}}}\n' for i in range(500)), mimetype='application/json')
+
+    return app
+
+
+def test_large_body_is_gzipped(routes, client):
+    response = client.get('/_test/json/5000', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.vary
+    assert gzip.decompress(response.data) == b'{"a":"' + b'x' * 5000 + b'"}'
+
+
+def test_small_body_is_not_compressed(routes, client):
+    response = client.get('/_test/json/10', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.data == b'{"a":"xxxxxxxxxx"}'
+
+
+def test_identity_when_client_does_not_accept(routes, client):
+    response = client.get('/_test/json/5000', headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_streamed_body_is_compressed_in_chunks(routes, client):
+    response = client.get('/_test/stream', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    assert gzip.decompress(response.data).decode().count('\n') == 500
+
+
+def test_compressed_response_gets_weak_etag(client, app):
+    app.config['COMPRESS_MIN_SIZE'] = 0
+    response = client.get('/banners', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['ETag'].startswith('W/')
+
+
+def test_cached_response_respects_min_size(client, app):
+    app.config['COMPRESS_MIN_SIZE'] = 1024
+    small = '/projects?category=khong-co'
+    for _ in range(2):
+        response = client.get(small, headers={'Accept-Encoding': 'gzip'})
+        assert len(response.data) < 1024
+        assert 'Content-Encoding' not in response.headers
+        assert response.get_json()['data'] == []
+
+    large = client.get('/members', headers={'Accept-Encoding': 'gzip'})
+    large = client.get('/members', headers={'Accept-Encoding': 'gzip'})
+    assert large.headers['Content-Encoding'] == 'gzip'
@@ -0,0 +1,39 @@
+import pytest
+
+
+@pytest.mark.parametrize('url', ['/members', '/events', '/projects', '/banners', '/members?limit=2'])
+def test_etag_round_trip(client, url):
+    # Request đầu tiên tới /events chuyển danh sách IP cũ sang kho đăng ký (đổi phiên bản)
+    client.get(url)
+    first = client.get(url)
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+
+    second = client.get(url, headers={'If-None-Match': etag})
+    assert second.status_code == 304
+    assert second.data == b''
+    assert second.headers['ETag'] == etag
+
+
+def test_last_modified_round_trip(client):
+    first = client.get('/projects')
+    response = client.get('/projects', headers={'If-Modified-Since': first.headers['Last-Modified']})
+    assert response.status_code == 304
+
+
+def test_etag_depends_on_query_string(client):
+    assert client.get('/members?limit=1').headers['ETag'] != client.get('/members?limit=2').headers['ETag']
+
+
+def test_write_changes_etag(client, app):
+    from app.models.project import Project
+
+    etag = client.get('/projects').headers['ETag']
+    with app.app_context():
+        project = Project.get_all()[0]
+        Project.update(project.id, dict(project.__dict__, title='Đổi tên'))
+
+    response = client.get('/projects', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.get_json()['data'][0]['title'] == 'Đổi tên'
@@ -0,0 +1,90 @@
+import io
+import os
+import threading
+import time
+
+import pytest
+from PIL import Image
+
+from app.utils.image_gc import process_release_images
+from app.utils.images import build_variants, image_files, image_lock, store_upload
+
+
+def _stored_image(folder):
+    buffer = io.BytesIO()
+    Image.new('RGB', (1000, 600), (10, 120, 200)).save(buffer, 'JPEG')
+    buffer.seek(0)
+    stem, full, _ = store_upload(buffer, folder, 'jpg')
+    build_variants(folder, stem, 'jpg')
+    return buffer, stem, full
+
+
+def _age(paths, seconds):
+    old = time.time() - seconds
+    for path in paths:
+        os.utime(path, (old, old))
+
+
+def test_release_removes_unreferenced_image(app, image_root):
+    folder = str(image_root / 'banners')
+    _, _, full = _stored_image(folder)
+    _age(image_files(folder, full), 3600)
+
+    with app.app_context():
+        result = process_release_images({'images': [['banners', full]]})
+
+    assert result['removed'] == [f'banners/{full}']
+    assert image_files(folder, full) == []
+
+
+def test_release_keeps_recently_reused_image(app, image_root):
+    folder = str(image_root / 'banners')
+    upload, _, full = _stored_image(folder)
+    _age(image_files(folder, full), 3600)
+
+    # Upload lại cùng nội dung: dùng lại file đã có và làm mới thời điểm sửa
+    upload.seek(0)
+    _, reused, variants = store_upload(upload, folder, 'jpg')
+    assert reused == full and variants is not None
+
+    with app.app_context():
+        result = process_release_images({'images': [['banners', full]]})
+
+    assert result['removed'] == []
+    assert image_files(folder, full)
+
+
+def test_release_waits_for_upload_of_same_hash(app, image_root):
+    folder = str(image_root / 'banners')
+    _, stem, full = _stored_image(folder)
+    _age(image_files(folder, full), 3600)
+    done = threading.Event()
+
+    def release():
+        with app.app_context():
+            process_release_images({'images': [['banners', full]]})
+        done.set()
+
+    with image_lock(folder, stem):
+        worker = threading.Thread(target=release)
+        worker.start()
+        assert not done.wait(0.3)
+        assert image_files(folder, full)
+    worker.join()
+    assert done.is_set()
+
+
+@pytest.mark.parametrize('interval, scheduled', [(3600, True), (0, False)])
+def test_sweep_is_scheduled_by_job_runner(app, monkeypatch, interval, scheduled):
+    from app.storage import get_job_store
+    from app.utils import jobs
+
+    monkeypatch.setattr(jobs, 'runner', None)
+    app.config['JOB_WORKERS'] = 1
+    app.config['IMAGE_SWEEP_INTERVAL'] = interval
+    jobs.init_job_workers(app)
+    store = get_job_store()
+
+    jobs.runner._enqueue_due(store)
+    kinds = [kind for kind, in store._conn().execute('SELECT kind FROM jobs')]
+    assert ('sweep_images' in kinds) == scheduled
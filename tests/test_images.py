@@ -0,0 +1,205 @@
+import io
+import json
+import os
+
+import pytest
+from PIL import Image
+
+
+def _png(size=(64, 64)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, (200, 30, 30)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def _files(directory):
+    return sorted(
+        os.path.relpath(os.path.join(base, name), directory)
+        for base, _, names in os.walk(directory) for name in names
+    )
+
+
+@pytest.mark.parametrize('url', [
+    '/static/images/members/..%2F..%2F..%2Foutside%2Fsecret.png',
+    '/static/images/members/%2E%2E/%2E%2E/%2E%2E/outside/secret.png',
+    '/static/images/banners/..%2Fmembers%2F..%2F..%2F..%2Foutside%2Fsecret.png',
+])
+def test_path_traversal_never_touches_files_outside(client, image_root, tmp_path, monkeypatch, url):
+    outside = tmp_path / 'outside'
+    outside.mkdir()
+    (outside / 'secret.png').write_bytes(_png())
+    before = _files(tmp_path)
+
+    import app.utils.images as images
+    opened = []
+    real_stat = os.stat
+    monkeypatch.setattr(images.os, 'stat', lambda path, *a, **kw: opened.append(str(path)) or real_stat(path, *a, **kw))
+    monkeypatch.setattr(images.Image, 'open', lambda *a, **kw: pytest.fail('Image.open on traversal path'))
+
+    response = client.get(url, headers={'Accept': 'image/avif,image/webp,*/*'})
+
+    assert response.status_code == 404
+    assert not any('outside' in path for path in opened)
+    assert _files(tmp_path) == before
+
+
+def test_serves_image_inside_folder(client, image_root):
+    (image_root / 'members' / 'avatar.png').write_bytes(_png())
+    response = client.get('/static/images/members/avatar.png')
+    assert response.status_code == 200
+    assert response.mimetype == 'image/png'
+
+
+def _queued_jobs(kind):
+    from app.storage import get_job_store
+
+    conn = get_job_store()._conn()
+    return [json.loads(payload) for payload, in conn.execute('SELECT payload FROM jobs WHERE kind = ?', (kind,))]
+
+
+def test_missing_alternate_is_queued_not_encoded_on_request(client, image_root, monkeypatch):
+    import app.utils.images as images
+
+    if not images.SUPPORTED_FORMATS:
+        pytest.skip('Pillow không có encoder WebP/AVIF')
+    monkeypatch.setattr(images, '_queued_alternates', {})
+    folder = image_root / 'members'
+    (folder / 'avatar.png').write_bytes(_png((256, 256)))
+    monkeypatch.setattr(images, '_encode', lambda *a, **kw: pytest.fail('encode on request thread'))
+
+    accept = {'Accept': 'image/avif,image/webp,*/*'}
+    first = client.get('/static/images/members/avatar.png', headers=accept)
+    second = client.get('/static/images/members/avatar.png', headers=accept)
+
+    assert first.status_code == second.status_code == 200
+    assert first.mimetype == 'image/png'
+    assert first.cache_control.max_age == 60
+    assert not first.cache_control.no_cache
+    assert not (folder / images.FORMATS_DIR).exists()
+    assert _queued_jobs('image_alternates') == [{'folder': str(folder), 'filename': 'avatar.png'}]
+
+
+def test_alternate_job_then_served(client, app, image_root, monkeypatch):
+    import app.utils.images as images
+
+    if not images.SUPPORTED_FORMATS:
+        pytest.skip('Pillow không có encoder WebP/AVIF')
+    monkeypatch.setattr(images, '_queued_alternates', {})
+    folder = image_root / 'members'
+    (folder / 'avatar.png').write_bytes(_png((256, 256)))
+    extension, _, mimetype = images.SUPPORTED_FORMATS[-1]
+
+    client.get('/static/images/members/avatar.png', headers={'Accept': mimetype})
+    with app.app_context():
+        result = images.process_image_alternates({'folder': str(folder), 'filename': 'avatar.png'})
+    assert result[extension]
+
+    response = client.get('/static/images/members/avatar.png', headers={'Accept': mimetype})
+    assert response.mimetype == mimetype
+    assert 'Accept' in response.vary
+
+
+def test_negotiated_format_is_never_cached_by_shared_caches(client, app, image_root, monkeypatch):
+    import app.utils.images as images
+
+    if not images.SUPPORTED_FORMATS:
+        pytest.skip('Pillow không có encoder WebP/AVIF')
+    folder = image_root / 'members'
+    filename = 'ab' * 16 + '.png'
+    (folder / filename).write_bytes(_png((256, 256)))
+    with app.app_context():
+        images.process_image_alternates({'folder': str(folder), 'filename': filename})
+    extension, _, mimetype = images.SUPPORTED_FORMATS[-1]
+
+    negotiated = client.get(f'/static/images/members/{filename}', headers={'Accept': mimetype})
+    assert negotiated.mimetype == mimetype
+    assert negotiated.cache_control.private
+    assert not negotiated.cache_control.public
+    assert not negotiated.cache_control.immutable
+    assert not negotiated.cache_control.no_cache
+
+    # Ảnh gốc dùng được cho mọi client nên vẫn được cache lâu dài ở CDN
+    original = client.get(f'/static/images/members/{filename}', headers={'Accept': 'image/png'})
+    assert original.mimetype == 'image/png'
+    assert original.cache_control.public
+    assert original.cache_control.immutable
+    assert original.cache_control.max_age == images.IMMUTABLE_MAX_AGE
+
+
+def test_failed_transcode_is_not_requeued(client, app, image_root, monkeypatch):
+    import app.utils.images as images
+
+    if not images.SUPPORTED_FORMATS:
+        pytest.skip('Pillow không có encoder WebP/AVIF')
+    monkeypatch.setattr(images, '_queued_alternates', {})
+    folder = image_root / 'members'
+    (folder / 'broken.png').write_bytes(b'\x89PNG\r\n\x1a\n' + b'\0' * 64)
+    accept = {'Accept': 'image/avif,image/webp'}
+
+    client.get('/static/images/members/broken.png', headers=accept)
+    assert len(_queued_jobs('image_alternates')) == 1
+    with app.app_context():
+        result = images.process_image_alternates({'folder': str(folder), 'filename': 'broken.png'})
+    assert not any(result.values())
+
+    # Bộ nhớ chống xếp trùng bị xóa (worker khác, hết ALTERNATE_REQUEUE_AFTER) vẫn không xếp lại
+    monkeypatch.setattr(images, '_queued_alternates', {})
+    response = client.get('/static/images/members/broken.png', headers=accept)
+    assert response.mimetype == 'image/png'
+    assert len(_queued_jobs('image_alternates')) == 1
+
+    images.remove_image_variants(str(folder), 'broken.png')
+    assert _files(folder) == []
+
+
+def _with_alternates(app, image_root, filename):
+    import app.utils.images as images
+
+    if not images.SUPPORTED_FORMATS:
+        pytest.skip('Pillow không có encoder WebP/AVIF')
+    folder = image_root / 'members'
+    (folder / filename).write_bytes(_png((256, 256)))
+    with app.app_context():
+        images.process_image_alternates({'folder': str(folder), 'filename': filename})
+    return images
+
+
+def test_wildcard_accept_gets_original(client, app, image_root):
+    _with_alternates(app, image_root, 'avatar.png')
+    response = client.get('/static/images/members/avatar.png', headers={'Accept': '*/*'})
+    assert response.mimetype == 'image/png'
+    assert 'Accept' in response.vary
+
+
+def test_smallest_accepted_format_is_served(client, app, image_root):
+    images = _with_alternates(app, image_root, 'avatar.png')
+    folder = image_root / 'members' / images.FORMATS_DIR
+    sizes = {
+        mimetype: (folder / f'avatar.png.{extension}').stat().st_size
+        for extension, _, mimetype in images.SUPPORTED_FORMATS
+    }
+    accept = ','.join(sizes)
+    response = client.get('/static/images/members/avatar.png', headers={'Accept': accept})
+    assert response.mimetype == min(sizes, key=sizes.get)
+
+
+def test_legacy_filename_is_not_cached_forever(client, image_root):
+    (image_root / 'members' / 'avatar.gif').write_bytes(_png())
+    response = client.get('/static/images/members/avatar.gif')
+    assert not response.cache_control.immutable
+    assert 'Accept' not in response.vary
+
+
+def test_x_accel_redirect_hands_file_to_nginx(client, app, image_root):
+    filename = 'cd' * 16 + '.gif'
+    (image_root / 'members' / filename).write_bytes(_png())
+    app.config['X_ACCEL_REDIRECT_PREFIX'] = '/_static/'
+    app.config['STATIC_ROOT'] = str(image_root.parent)
+
+    response = client.get(f'/static/images/members/{filename}')
+
+    assert response.status_code == 200
+    assert response.headers['X-Accel-Redirect'] == f'/_static/images/members/{filename}'
+    assert response.data == b''
+    assert response.cache_control.immutable
+    assert client.get('/static/images/members/khong-co.gif').status_code == 404
@@ -0,0 +1,86 @@
+from app.utils import jobs
+
+
+def test_workers_start_on_first_request_not_at_import(data_dir, monkeypatch):
+    from app import create_app
+    from config import Config
+
+    started = []
+    monkeypatch.setattr(Config, 'JOB_WORKERS', 2)
+    monkeypatch.setattr(jobs, 'runner', None)
+    monkeypatch.setattr(jobs.JobRunner, 'start', lambda self: started.append(self))
+
+    app = create_app()
+    assert started == []
+
+    app.test_client().get('/members')
+    assert started == [jobs.runner]
+
+
+def test_enqueue_does_not_start_workers(app, monkeypatch):
+    started = []
+    monkeypatch.setattr(jobs.JobRunner, 'start', lambda self: started.append(self))
+    monkeypatch.setattr(jobs, 'runner', jobs.JobRunner(app, 1))
+
+    with app.app_context():
+        jobs.enqueue('sweep_images', {'dry_run': True})
+    assert started == []
+
+
+def test_notified_jobs_run_without_waiting_for_poll(app, monkeypatch):
+    import threading
+
+    done = threading.Semaphore(0)
+    monkeypatch.setitem(jobs._handlers, 'test_echo', lambda payload: done.release())
+    runner = jobs.JobRunner(app, 1, poll_interval=30)
+    monkeypatch.setattr(jobs, 'runner', runner)
+    runner.start()
+
+    with app.app_context():
+        for i in range(20):
+            jobs.enqueue('test_echo', {'i': i})
+            assert done.acquire(timeout=5)
+
+
+def test_periodic_job_is_queued_once_per_interval(tmp_path):
+    from app.storage import JobStore
+
+    first, second = JobStore(str(tmp_path / 'jobs.sqlite3')), JobStore(str(tmp_path / 'jobs.sqlite3'))
+    assert first.enqueue_periodic('purge_jobs', {}, 3600) is not None
+    assert second.enqueue_periodic('purge_jobs', {}, 3600) is None
+    assert second.enqueue_periodic('sweep_images', {}, 3600) is not None
+
+
+def test_runner_schedules_purge_of_finished_jobs(app, monkeypatch):
+    import time
+
+    from app.storage import get_job_store
+
+    monkeypatch.setattr(jobs, 'runner', None)
+    app.config['JOB_WORKERS'] = 1
+    jobs.init_job_workers(app)
+    store = get_job_store()
+
+    old = store.enqueue('test_echo', {})
+    store.complete(old, None)
+    conn = store._conn()
+    with conn:
+        conn.execute('UPDATE jobs SET updated_at = ? WHERE id = ?', (time.time() - app.config['JOB_RETENTION'] - 1, old))
+    recent = store.enqueue('test_echo', {})
+    store.complete(recent, None)
+
+    jobs.runner._enqueue_due(store)
+    jobs.runner._enqueue_due(store)
+    claimed = {}
+    while True:
+        job = store.claim()
+        if job is None:
+            break
+        assert job['kind'] not in claimed
+        claimed[job['kind']] = job
+    job = claimed['purge_jobs']
+    jobs.runner.run(job)
+
+    assert store.get(job['id'])['result'] == {'purged': 1}
+    assert store.get(old) is None
+    assert store.get(recent) is not None
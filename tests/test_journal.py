@@ -0,0 +1,81 @@
+import json
+import os
+import threading
+
+from app.storage.journal import JournaledJsonCollection
+from app.storage.query import RecordIndex
+
+
+def _collection(tmp_path, records=(), compact_every=1000):
+    path = tmp_path / 'contacts.json'
+    path.write_text(json.dumps(list(records)), encoding='utf-8')
+    return JournaledJsonCollection(str(path), None, ('email',), compact_every)
+
+
+def _add(collection, email):
+    with collection.lock():
+        record = {'id': collection.next_id(), 'email': email}
+        collection.insert(record)
+    return record
+
+
+def test_append_updates_index_without_rebuild(tmp_path, monkeypatch):
+    collection = _collection(tmp_path, [{'id': i, 'email': f'{i}@x'} for i in range(1, 101)])
+    collection.next_id()
+
+    built = []
+    init = RecordIndex.__init__
+    monkeypatch.setattr(RecordIndex, '__init__', lambda self, *a, **kw: built.append(1) or init(self, *a, **kw))
+    for i in range(20):
+        _add(collection, 'new@x')
+
+    assert built == []
+    assert collection.next_id() == 121
+    assert collection.query([('email', '=', 'new@x')])[1] == 20
+
+
+def test_replace_and_remove_through_log(tmp_path):
+    collection = _collection(tmp_path, [{'id': 1, 'email': 'a@x'}, {'id': 2, 'email': 'b@x'}])
+    collection.all()
+    assert collection.replace(1, {'id': 1, 'email': 'c@x'})
+    assert collection.query([('email', '=', 'a@x')])[1] == 0
+    assert collection.get(1)['email'] == 'c@x'
+    assert collection.remove(2)
+    assert [record['id'] for record in collection.all()] == [1]
+
+
+def test_other_instance_sees_appends_and_compaction(tmp_path):
+    writer = _collection(tmp_path, [{'id': 1, 'email': 'a@x'}])
+    reader = JournaledJsonCollection(writer.path, None, ('email',), 1000)
+    assert len(reader.all()) == 1
+
+    _add(writer, 'b@x')
+    assert len(reader.all()) == 2
+    writer.compact()
+    assert not os.path.exists(writer.log_path)
+    _add(writer, 'c@x')
+    assert [record['email'] for record in reader.all()] == ['a@x', 'b@x', 'c@x']
+    assert reader.next_id() == 4
+
+
+def test_readers_never_lose_entries_during_compaction(tmp_path):
+    writer = _collection(tmp_path, [{'id': 1, 'email': 'a@x'}])
+    for i in range(50):
+        _add(writer, f'{i}@x')
+    stop = threading.Event()
+    sizes = []
+
+    def read():
+        reader = JournaledJsonCollection(writer.path, None, ('email',), 1000)
+        while not stop.is_set():
+            sizes.append(len(reader.all()))
+
+    thread = threading.Thread(target=read)
+    thread.start()
+    for _ in range(20):
+        writer.compact()
+        _add(writer, 'more@x')
+    stop.set()
+    thread.join()
+
+    assert sizes and min(sizes) >= 51
@@ -0,0 +1,82 @@
+import pytest
+
+
+@pytest.mark.parametrize('query', ['limit=abc', 'cursor=!!!', 'cursor=eDox', 'sort=password'])
+def test_invalid_list_query_is_rejected(client, query):
+    response = client.get(f'/members?{query}')
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'INVALID_QUERY'
+
+
+def test_limit_is_clamped(client):
+    body = client.get('/members?limit=0').get_json()
+    assert len(body['data']) == 1
+    assert body['pagination']['limit'] == 1
+
+    body = client.get('/members?limit=100000').get_json()
+    assert body['pagination']['limit'] == 100
+
+
+def test_cursor_walks_every_record_once(client):
+    everything = [member['id'] for member in client.get('/members?sort=id').get_json()['data']]
+    seen, url = [], '/members?sort=id&limit=2'
+    while url:
+        body = client.get(url).get_json()
+        seen += [member['id'] for member in body['data']]
+        cursor = body['pagination']['next_cursor']
+        url = f'/members?sort=id&limit=2&cursor={cursor}' if cursor else None
+    assert seen == everything
+    assert body['pagination']['total'] == len(everything)
+
+
+RECORDS = [
+    {'id': 1, 'username': '12345', 'team': '2024', 'year': 2024, 'active': True},
+    {'id': 2, 'username': 'admin', 'team': 2024, 'year': '2024', 'active': False},
+    {'id': 3, 'username': '007', 'team': 'lead', 'year': 2025, 'active': True},
+]
+
+
+@pytest.fixture
+def backends(tmp_path):
+    import json
+
+    from app.storage import JsonCollection, SqliteCollection
+
+    path = tmp_path / 'records.json'
+    path.write_text(json.dumps(RECORDS))
+    legacy = JsonCollection(str(path), None, ('team', 'active', 'username'))
+    sqlite = SqliteCollection(
+        str(tmp_path / 'dsc.sqlite3'), 'records', ('team', 'active'), ('username',), legacy=legacy
+    )
+    return legacy, sqlite
+
+
+@pytest.mark.parametrize('filters', [
+    [('username', '=', '12345')],
+    [('username', '=', '007')],
+    [('username', '=', '7')],
+    [('team', '=', '2024')],
+    [('team', '=', 'lead')],
+    [('year', '=', '2024')],
+    [('active', '=', 'true')],
+    [('active', '=', 'false')],
+])
+def test_sqlite_filters_match_json_backend(backends, filters):
+    json_backend, sqlite_backend = backends
+    expected = json_backend.query(filters, [('id', False)])
+    assert sqlite_backend.query(filters, [('id', False)]) == expected
+
+
+@pytest.mark.parametrize('sort', [
+    [('year', False)],
+    [('year', True)],
+    [('active', True), ('id', True)],
+])
+def test_sqlite_sort_matches_json_backend(backends, sort):
+    json_backend, sqlite_backend = backends
+    sqlite_backend.all()  # nhập dữ liệu cũ trước khi thêm bản ghi vào file JSON
+    for collection in backends:
+        collection.insert({'id': 4, 'username': 'khong-nam', 'team': 'lead'})
+    expected = json_backend.query([], sort)
+    assert [record['id'] for record in expected[0]][-1] == 4
+    assert sqlite_backend.query([], sort) == expected
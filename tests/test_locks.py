@@ -0,0 +1,107 @@
+import multiprocessing
+import os
+import threading
+
+from app.storage import locks
+from app.storage.locks import atomic_write, file_lock
+
+
+def _increment(path, times):
+    for _ in range(times):
+        with file_lock(path):
+            with open(path) as f:
+                value = int(f.read())
+            atomic_write(path, str(value + 1).encode())
+
+
+def test_file_lock_serializes_threads(tmp_path):
+    path = str(tmp_path / 'counter')
+    atomic_write(path, b'0')
+    threads = [threading.Thread(target=_increment, args=(path, 50)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with open(path) as f:
+        assert int(f.read()) == 400
+
+
+def test_file_lock_serializes_processes(tmp_path):
+    path = str(tmp_path / 'counter')
+    atomic_write(path, b'0')
+    context = multiprocessing.get_context('fork')
+    processes = [context.Process(target=_increment, args=(path, 50)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert all(process.exitcode == 0 for process in processes)
+    with open(path) as f:
+        assert int(f.read()) == 200
+
+
+def test_file_lock_is_reentrant(tmp_path):
+    lock = file_lock(str(tmp_path / 'data.json'))
+    with lock:
+        with file_lock(str(tmp_path / 'data.json')):
+            pass
+        with lock:
+            pass
+
+
+def test_released_locks_are_evicted(tmp_path):
+    threads = [
+        threading.Thread(target=_increment, args=(str(tmp_path / f'counter-{i % 4}'), 20))
+        for i in range(8)
+    ]
+    for i in range(4):
+        atomic_write(str(tmp_path / f'counter-{i}'), b'0')
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for i in range(50):
+        with file_lock(str(tmp_path / f'{i:032x}')):
+            pass
+
+    assert locks._locks == {}
+
+
+def test_lock_files_live_in_locks_dir(tmp_path, locks_dir):
+    folder = tmp_path / 'static' / 'images' / 'banners'
+    folder.mkdir(parents=True)
+    with file_lock(str(folder / ('a' * 32))):
+        pass
+
+    assert list(folder.iterdir()) == []
+    assert len(list(locks_dir.iterdir())) == 1
+
+
+def test_atomic_write_readers_never_see_partial_content(tmp_path):
+    path = str(tmp_path / 'data.bin')
+    bodies = [bytes([i]) * 256 * 1024 for i in range(8)]
+    atomic_write(path, bodies[0])
+    stop = threading.Event()
+    seen = []
+
+    def read():
+        while not stop.is_set():
+            with open(path, 'rb') as f:
+                seen.append(f.read())
+
+    def write(body):
+        for _ in range(10):
+            atomic_write(path, body)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    writers = [threading.Thread(target=write, args=(body,)) for body in bodies]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+    stop.set()
+    reader.join()
+
+    assert seen and all(body in bodies for body in seen)
+    assert [name for name in os.listdir(tmp_path) if name.endswith('.tmp')] == []
@@ -0,0 +1,73 @@
+import json
+import logging
+import queue
+import sys
+
+from app.utils import log
+from app.utils.log import DroppingQueueHandler, JsonFormatter, SamplingFilter
+
+
+def _record(name='app.test', level=logging.INFO, msg='hello %s', args=('world',), exc_info=None, **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, exc_info)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+def test_json_formatter_includes_extra_fields():
+    entry = json.loads(JsonFormatter().format(_record(event_id=3)))
+    assert entry['level'] == 'INFO'
+    assert entry['logger'] == 'app.test'
+    assert entry['msg'] == 'hello world'
+    assert entry['event_id'] == 3
+    assert entry['ts'].endswith('+00:00')
+
+
+def test_sampling_uses_longest_prefix_and_keeps_warnings():
+    sampling = SamplingFilter({'app.routes': 1.0, 'app.routes.member': 0.0})
+    assert sampling.filter(_record('app.routes.event'))
+    assert not sampling.filter(_record('app.routes.member'))
+    assert not sampling.filter(_record('app.routes.member.detail'))
+    assert sampling.filter(_record('app.routes.member', logging.WARNING))
+    assert sampling.filter(_record('app.storage'))
+
+
+def test_queue_handler_drops_when_full():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+    handler.handle(_record())
+    handler.handle(_record())
+    assert handler.queue.qsize() == 1
+    assert handler.dropped == 1
+
+
+def test_queue_handler_formats_message_and_traceback_on_caller_thread():
+    try:
+        raise RuntimeError('boom')
+    except RuntimeError:
+        record = _record(exc_info=sys.exc_info())
+    handler = DroppingQueueHandler(queue.Queue())
+    handler.handle(record)
+
+    queued = handler.queue.get_nowait()
+    assert (queued.msg, queued.args, queued.exc_info) == ('hello world', None, None)
+    assert 'RuntimeError: boom' in queued.exc_text
+    assert 'RuntimeError: boom' in json.loads(JsonFormatter().format(queued))['exc']
+
+
+def test_request_logs_are_written_as_json_lines(data_dir, tmp_path, monkeypatch):
+    from app import create_app
+    from config import Config
+
+    log_file = tmp_path / 'app.log'
+    monkeypatch.setattr(Config, 'LOG_FILE', str(log_file))
+    monkeypatch.setattr(Config, 'LOG_FORMAT', 'json')
+    app = create_app()
+
+    with app.test_request_context('/members', method='GET'):
+        logging.getLogger('app.test').warning('member %s', 'listed', extra={'count': 2})
+    log.listener.stop()
+
+    entries = [json.loads(line) for line in log_file.read_text(encoding='utf-8').splitlines()]
+    entry = next(entry for entry in entries if entry['logger'] == 'app.test')
+    assert entry['msg'] == 'member listed'
+    assert (entry['method'], entry['path'], entry['count']) == ('GET', '/members', 2)
@@ -0,0 +1,37 @@
+import pytest
+
+
+@pytest.fixture
+def login(client, app):
+    app.config['LOGIN_RATE_LIMIT_IP'] = 2
+
+    def login(remote_addr, headers=None, username='nobody'):
+        return client.post(
+            '/auth/login', json={'username': username, 'password': 'sai'},
+            headers=headers or {}, environ_base={'REMOTE_ADDR': remote_addr}
+        ).status_code
+    return login
+
+
+def test_forwarded_clients_have_separate_limits(login):
+    tunnel = '127.0.0.1'
+    first = {'CF-Connecting-IP': '203.0.113.1'}
+    second = {'CF-Connecting-IP': '203.0.113.2'}
+
+    assert [login(tunnel, first, f'user{i}') for i in range(3)] == [401, 401, 429]
+    assert login(tunnel, second) == 401
+
+
+def test_x_forwarded_for_from_trusted_proxy(login):
+    assert [login('127.0.0.1', {'X-Forwarded-For': '198.51.100.7, 127.0.0.1'}, f'u{i}') for i in range(3)] == [
+        401, 401, 429
+    ]
+    assert login('127.0.0.1', {'X-Forwarded-For': '198.51.100.8'}) == 401
+
+
+def test_direct_client_cannot_spoof_forwarded_headers(login):
+    statuses = [
+        login('192.0.2.10', {'CF-Connecting-IP': f'203.0.113.{i}', 'X-Forwarded-For': f'203.0.113.{i}'}, f'u{i}')
+        for i in range(3)
+    ]
+    assert statuses == [401, 401, 429]
@@ -0,0 +1,30 @@
+import pytest
+
+
+def _scrape(client, remote_addr='127.0.0.1', headers=None):
+    return client.get('/metrics', headers=headers or {}, environ_base={'REMOTE_ADDR': remote_addr})
+
+
+def test_local_scrape_is_allowed(client):
+    client.get('/members')
+    response = _scrape(client)
+    assert response.status_code == 200
+    assert 'dsc_http_requests_total' in response.get_data(as_text=True)
+
+
+@pytest.mark.parametrize('remote_addr, headers', [
+    ('203.0.113.5', {}),
+    # Request từ internet qua tunnel cloudflared: tới từ loopback nhưng có header của Cloudflare
+    ('127.0.0.1', {'CF-Connecting-IP': '203.0.113.5'}),
+    ('127.0.0.1', {'X-Forwarded-For': '203.0.113.5'}),
+])
+def test_remote_scrape_is_forbidden(client, remote_addr, headers):
+    response = _scrape(client, remote_addr, headers)
+    assert response.status_code == 403
+    assert b'dsc_' not in response.data
+
+
+def test_token_allows_remote_scrape(client, app):
+    app.config['METRICS_TOKEN'] = 's3cret'
+    assert _scrape(client, '203.0.113.5', {'Authorization': 'Bearer s3cret'}).status_code == 200
+    assert _scrape(client, '203.0.113.5', {'Authorization': 'Bearer wrong'}).status_code == 403
@@ -0,0 +1,31 @@
+import time
+
+from app.storage.ratelimits import RateLimitStore
+
+
+def test_rate_limit_blocks_after_limit(tmp_path):
+    store = RateLimitStore(str(tmp_path / 'ratelimits.sqlite3'))
+    assert [store.hit('ip:1', 3, 60) for _ in range(3)] == [0, 0, 0]
+    assert store.blocked('ip:1', 3, 60) > 0
+    retry_after = store.hit('ip:1', 3, 60)
+    assert 0 < retry_after <= 60
+    assert store.hit('ip:2', 3, 60) == 0
+
+
+def test_rate_limit_shared_between_instances_and_reset(tmp_path):
+    database = str(tmp_path / 'ratelimits.sqlite3')
+    first, second = RateLimitStore(database), RateLimitStore(database)
+    first.hit('user:admin', 2, 60)
+    first.hit('user:admin', 2, 60)
+    assert second.blocked('user:admin', 2, 60) > 0
+
+    second.reset('user:admin')
+    assert first.blocked('user:admin', 2, 60) == 0
+
+
+def test_rate_limit_window_expires(tmp_path):
+    store = RateLimitStore(str(tmp_path / 'ratelimits.sqlite3'))
+    store.hit('ip:1', 1, 0.2)
+    assert store.hit('ip:1', 1, 0.2) > 0
+    time.sleep(0.25)
+    assert store.hit('ip:1', 1, 0.2) == 0
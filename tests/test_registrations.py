@@ -0,0 +1,115 @@
+import multiprocessing
+import threading
+from collections import Counter
+
+from app.storage.registrations import RegistrationStore
+
+
+def _register(database, event_id, ips):
+    store = RegistrationStore(database)
+    return Counter(store.register(event_id, ip) for ip in ips)
+
+
+def test_register_once_per_ip(tmp_path):
+    store = RegistrationStore(str(tmp_path / 'registrations.sqlite3'))
+    assert store.register(1, '10.0.0.1') == store.NOT_SEEDED
+    store.seed(1, 10, 0, [])
+    assert store.register(1, '10.0.0.1') == store.SUCCESS
+    assert store.register(1, '10.0.0.1') == store.IP_ALREADY_REGISTERED
+    assert store.participants(1) == 1
+
+
+def test_seed_keeps_existing_registrations(tmp_path):
+    store = RegistrationStore(str(tmp_path / 'registrations.sqlite3'))
+    store.seed(1, 2, 1, ['10.0.0.1'])
+    store.seed(1, 100, 0, [])
+    assert store.register(1, '10.0.0.1') == store.IP_ALREADY_REGISTERED
+    assert store.register(1, '10.0.0.2') == store.SUCCESS
+    assert store.register(1, '10.0.0.3') == store.FULL_CAPACITY
+
+
+def test_concurrent_threads_never_overbook(tmp_path):
+    database = str(tmp_path / 'registrations.sqlite3')
+    RegistrationStore(database).seed(1, 50, 0, [])
+    ips = [f'10.0.{i // 256}.{i % 256}' for i in range(120)]
+    results = Counter()
+    lock = threading.Lock()
+
+    def run(batch):
+        counts = _register(database, 1, batch)
+        with lock:
+            results.update(counts)
+
+    # Mỗi IP được thử hai lần bởi hai thread khác nhau
+    threads = [threading.Thread(target=run, args=(ips[i::6] + ips[(i + 3) % 6::6],)) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    store = RegistrationStore(database)
+    registered = store.registered_ips(1)
+    assert results['SUCCESS'] == store.participants(1) == len(registered) == 50
+    assert len(set(registered)) == len(registered)
+
+
+def test_concurrent_processes_never_overbook(tmp_path):
+    database = str(tmp_path / 'registrations.sqlite3')
+    RegistrationStore(database).seed(1, 100, 0, [])
+    ips = [f'10.1.{i // 256}.{i % 256}' for i in range(300)]
+    plan = ips + ips[:100]
+    batches = [plan[i::4] for i in range(4)]
+
+    with multiprocessing.get_context('fork').Pool(4) as pool:
+        results = sum(pool.starmap(_register, [(database, 1, batch) for batch in batches]), Counter())
+
+    store = RegistrationStore(database)
+    registered = store.registered_ips(1)
+    assert results['SUCCESS'] == store.participants(1) == len(registered) == 100
+    assert len(set(registered)) == 100
+    assert results['SUCCESS'] + results['FULL_CAPACITY'] + results['IP_ALREADY_REGISTERED'] == len(plan)
+
+
+def _register_over_http(client, remote_addr, headers):
+    return client.post('/events/1/register', headers=headers, environ_base={'REMOTE_ADDR': remote_addr})
+
+
+def test_direct_client_cannot_spoof_forwarded_ip(client):
+    first = _register_over_http(client, '192.0.2.10', {'X-Forwarded-For': '203.0.113.1'})
+    second = _register_over_http(client, '192.0.2.10', {'X-Forwarded-For': '203.0.113.2'})
+
+    assert first.status_code == 200
+    assert second.status_code == 400
+    assert second.get_json()['error'] == 'IP_ALREADY_REGISTERED'
+
+
+def test_clients_behind_tunnel_register_separately(client):
+    tunnel = '127.0.0.1'
+    assert _register_over_http(client, tunnel, {'CF-Connecting-IP': '203.0.113.1'}).status_code == 200
+    assert _register_over_http(client, tunnel, {'CF-Connecting-IP': '203.0.113.2'}).status_code == 200
+    repeated = _register_over_http(client, tunnel, {'CF-Connecting-IP': '203.0.113.1'})
+    assert repeated.status_code == 400
+
+
+def test_participant_counts_only_for_requested_events(tmp_path):
+    store = RegistrationStore(str(tmp_path / 'registrations.sqlite3'))
+    for event_id in range(1, 6):
+        store.seed(event_id, 10, event_id, [])
+    assert store.participant_counts([2, 4, 99]) == {2: 2, 4: 4}
+    assert store.participant_counts([]) == {}
+
+
+def test_event_page_reads_counts_for_its_own_events(app, monkeypatch):
+    from app.models.event import Event
+    from app.storage import get_registration_store
+
+    store = get_registration_store()
+    requested = []
+    original = store.participant_counts
+    monkeypatch.setattr(store, 'participant_counts', lambda ids: requested.append(list(ids)) or original(ids))
+
+    with app.app_context():
+        events, total = Event.query(sort=[('id', False)], limit=2)
+    assert requested == [[event.id for event in events]]
+    assert len(events) == 2 and total == 3
+    assert events[1].currentParticipants == 5
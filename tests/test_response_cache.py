@@ -0,0 +1,68 @@
+import pytest
+
+from app.utils import response_cache
+from app.utils.response_cache import CachedBody, ResponseCache
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    response_cache.cache.clear()
+
+
+@pytest.fixture
+def member_queries(monkeypatch):
+    from app.models.member import Member
+
+    calls = []
+    query = Member.query.__func__
+    monkeypatch.setattr(Member, 'query', classmethod(lambda cls, *a, **kw: calls.append(a) or query(cls, *a, **kw)))
+    return calls
+
+
+def test_repeated_list_is_served_from_cache(client, member_queries):
+    first = client.get('/members?sort=id')
+    second = client.get('/members?sort=id')
+
+    assert first.status_code == second.status_code == 200
+    assert second.data == first.data
+    assert len(member_queries) == 1
+
+
+def test_cache_is_keyed_by_query_string(client, member_queries):
+    one = client.get('/members?limit=1').get_json()
+    two = client.get('/members?limit=2').get_json()
+    assert len(one['data']) == 1 and len(two['data']) == 2
+    assert len(member_queries) == 2
+
+
+def test_write_invalidates_cached_body(client, app, member_queries):
+    from app.models.member import Member
+
+    client.get('/members?sort=id')
+    with app.app_context():
+        member = Member.get_by_id(1)
+        Member.update(1, dict(member.__dict__, name='Tên mới'))
+
+    body = client.get('/members?sort=id').get_json()
+    assert body['data'][0]['name'] == 'Tên mới'
+    assert len(member_queries) == 2
+
+
+def test_errors_are_not_cached(client, member_queries):
+    assert client.get('/members?limit=abc').status_code == 400
+    assert client.get('/members?limit=abc').status_code == 400
+    assert len(member_queries) == 0
+    assert len(response_cache.cache._entries) == 0
+
+
+def test_lru_evicts_oldest_and_drops_stale_versions():
+    cache = ResponseCache(max_entries=2)
+    cache.put('/a', CachedBody('1', b'a'))
+    cache.put('/b', CachedBody('1', b'b'))
+    assert cache.get('/a', '1') is not None
+    cache.put('/c', CachedBody('1', b'c'))
+
+    assert cache.get('/b', '1') is None
+    assert cache.get('/a', '1').encoded('identity') == b'a'
+    assert cache.get('/c', '2') is None
+    assert cache.get('/c', '1') is None
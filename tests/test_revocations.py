@@ -0,0 +1,30 @@
+import multiprocessing
+import time
+
+from app.storage.revocations import TokenRevocationStore
+
+
+def _revoke(database, jti):
+    TokenRevocationStore(database).revoke(jti, time.time() + 60)
+
+
+def test_revocation_is_shared_between_workers(tmp_path):
+    database = str(tmp_path / 'revocations.sqlite3')
+    store = TokenRevocationStore(database)
+    assert not store.is_revoked('token-1')
+
+    # Token bị thu hồi ở worker khác
+    worker = multiprocessing.get_context('fork').Process(target=_revoke, args=(database, 'token-1'))
+    worker.start()
+    worker.join()
+
+    assert worker.exitcode == 0
+    assert store.is_revoked('token-1')
+    assert not store.is_revoked('token-2')
+
+
+def test_revoke_is_idempotent(tmp_path):
+    store = TokenRevocationStore(str(tmp_path / 'revocations.sqlite3'))
+    store.revoke('token-1', time.time() + 60)
+    store.revoke('token-1', time.time() + 60)
+    assert store.count() == 1
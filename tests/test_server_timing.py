@@ -0,0 +1,61 @@
+import re
+
+from app.storage.timing import begin, current, end, timed, timed_construction
+from app.utils import response_cache
+
+ENTRY = re.compile(r'^(\w+);dur=(\d+\.\d{2})$')
+
+
+def _phases(response):
+    entries = [ENTRY.match(entry.strip()) for entry in response.headers['Server-Timing'].split(',')]
+    assert all(entries)
+    return {match.group(1): float(match.group(2)) for match in entries}
+
+
+def test_list_request_reports_phases(client):
+    response_cache.cache.clear()
+    phases = _phases(client.get('/members'))
+
+    assert {'io', 'parse', 'construct', 'logic', 'encode', 'total'} <= set(phases)
+    assert list(phases)[-1] == 'total'
+    assert sum(duration for name, duration in phases.items() if name != 'total') <= phases['total'] + 0.1
+
+
+def test_cached_response_skips_model_phases(client):
+    client.get('/projects')
+    phases = _phases(client.get('/projects'))
+    assert 'construct' not in phases
+    assert 'total' in phases
+
+
+def test_disabled_by_config(data_dir, monkeypatch):
+    from app import create_app
+    from config import Config
+
+    monkeypatch.setattr(Config, 'SERVER_TIMING', False)
+    assert 'Server-Timing' not in create_app().test_client().get('/members').headers
+
+
+def test_timed_is_a_no_op_outside_requests():
+    assert current() is None
+    with timed('io'):
+        pass
+    assert current() is None
+
+
+def test_phases_accumulate_within_a_request():
+    @timed_construction
+    class Model:
+        def __init__(self, value):
+            self.value = value
+
+    begin()
+    with timed('io'):
+        pass
+    with timed('io'):
+        pass
+    Model(1)
+    timings = end()
+
+    assert set(timings) == {'io', 'construct'}
+    assert current() is None
@@ -0,0 +1,97 @@
+import json
+
+import pytest
+
+from app.storage import JsonCollection, SqliteCollection
+from config import Config
+
+RECORDS = [
+    {'id': 1, 'name': 'An', 'team': 'lead', 'order': 2, 'links': {'github': 'https://github.com'}},
+    {'id': 2, 'name': 'Bình', 'team': 'media', 'order': None},
+    {'id': 5, 'name': 'Chi', 'team': 'lead', 'order': 1, 'skills': ['Python']},
+]
+
+
+@pytest.fixture
+def backends(tmp_path):
+    path = tmp_path / 'records.json'
+    path.write_text(json.dumps({'records': RECORDS}))
+    json_backend = JsonCollection(str(path), 'records', ('team',))
+    sqlite_backend = SqliteCollection(
+        str(tmp_path / 'dsc.sqlite3'), 'records', ('team',), legacy=JsonCollection(str(path), 'records')
+    )
+    return json_backend, sqlite_backend
+
+
+def _both(backends, operation):
+    return [operation(collection) for collection in backends]
+
+
+def test_legacy_json_is_imported_once(backends, tmp_path):
+    json_backend, sqlite_backend = backends
+    assert sqlite_backend.all() == json_backend.all() == RECORDS
+
+    # Lần mở sau không nhập lại dữ liệu cũ dù file JSON vẫn còn
+    reopened = SqliteCollection(
+        str(tmp_path / 'dsc.sqlite3'), 'records', ('team',),
+        legacy=JsonCollection(str(tmp_path / 'records.json'), 'records')
+    )
+    sqlite_backend.remove(1)
+    assert [record['id'] for record in reopened.all()] == [2, 5]
+
+
+def test_crud_matches_json_backend(backends):
+    assert _both(backends, lambda c: c.next_id()) == [6, 6]
+    assert _both(backends, lambda c: c.get(5)) == [RECORDS[2]] * 2
+    assert _both(backends, lambda c: c.get(3)) == [None, None]
+
+    record = {'id': 6, 'name': 'Dũng', 'team': 'tech', 'order': 3}
+    for collection in backends:
+        collection.insert(record)
+    assert _both(backends, lambda c: c.get(6)) == [record] * 2
+
+    assert _both(backends, lambda c: c.replace(6, dict(record, team='lead'))) == [True, True]
+    assert _both(backends, lambda c: c.replace(99, record)) == [False, False]
+    assert _both(backends, lambda c: [r['id'] for r in c.query([('team', '=', 'lead')])[0]]) == [[1, 5, 6]] * 2
+
+    assert _both(backends, lambda c: c.remove(1)) == [True, True]
+    assert _both(backends, lambda c: c.remove(1)) == [False, False]
+    json_records, sqlite_records = _both(backends, lambda c: c.all())
+    assert json_records == sqlite_records
+
+
+@pytest.mark.parametrize('sort', [
+    [('order', False)],
+    [('order', True)],
+    [('team', False), ('name', True)],
+])
+def test_sort_and_pagination_match_json_backend(backends, sort):
+    json_page, sqlite_page = _both(backends, lambda c: c.query([], sort, limit=2, offset=1))
+    assert sqlite_page == json_page
+    assert json_page[1] == 3
+
+
+def test_version_changes_on_every_write(backends):
+    _, sqlite_backend = backends
+    before = sqlite_backend.version()
+    sqlite_backend.replace(1, dict(RECORDS[0], name='An mới'))
+    assert sqlite_backend.version()[0] != before[0]
+
+
+def test_new_index_column_is_filled_from_existing_rows(backends, tmp_path):
+    _, sqlite_backend = backends
+    sqlite_backend.all()
+    widened = SqliteCollection(str(tmp_path / 'dsc.sqlite3'), 'records', ('team', 'name'))
+    assert [record['id'] for record in widened.query([('name', '=', 'Chi')])[0]] == [5]
+
+
+def test_endpoints_serve_same_data_on_both_backends(client, monkeypatch):
+    responses = {}
+    for backend in ('json', 'sqlite'):
+        monkeypatch.setattr(Config, 'STORAGE_BACKEND', backend)
+        responses[backend] = [
+            client.get(url).get_json()
+            for url in ('/members?sort=id', '/projects', '/banners', '/members/1')
+        ]
+    assert responses['sqlite'] == responses['json']
+    assert responses['json'][3]['data']['id'] == 1
@@ -0,0 +1,48 @@
+import io
+
+import pytest
+
+from app.utils.uploads import format_size
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'\x00' * 64
+
+
+def _upload(client, body, filename='avatar.png'):
+    return client.post(
+        '/members/upload-avatar',
+        data={'avatar': (io.BytesIO(body), filename)},
+        content_type='multipart/form-data'
+    )
+
+
+def test_non_image_is_rejected_with_415(client):
+    response = _upload(client, b'<?php echo "hi"; ?>' + b' ' * 64)
+    assert response.status_code == 415
+
+
+def test_image_extension_does_not_bypass_magic_bytes(client):
+    response = _upload(client, b'GIF8' + b'not really' * 10, 'avatar.gif')
+    assert response.status_code == 415
+
+
+def test_oversized_file_is_rejected_with_413(client, app):
+    app.config['MAX_UPLOAD_FILE_SIZE'] = 1024
+    response = _upload(client, PNG + b'\x00' * 4096)
+    assert response.status_code == 413
+    assert response.get_json()['message'] == 'File vượt quá giới hạn 1KB'
+
+
+@pytest.mark.parametrize('size, text', [
+    (16 * 1024 * 1024, '16MB'),
+    (1536 * 1024, '1.5MB'),
+    (512 * 1024, '512KB'),
+    (1000, '1000B'),
+])
+def test_format_size(size, text):
+    assert format_size(size) == text
+
+
+def test_valid_upload_passes_validation(client):
+    # Qua kiểm tra định dạng và kích thước, tới route (chưa đăng nhập nên 401)
+    response = _upload(client, PNG)
+    assert response.status_code == 401
@@ -0,0 +1,31 @@
+import json
+
+import bcrypt
+import pytest
+
+from config import Config
+
+
+@pytest.fixture(params=['json', 'sqlite'])
+def backend(request, data_dir, monkeypatch):
+    monkeypatch.setattr(Config, 'STORAGE_BACKEND', request.param)
+    password_hash = bcrypt.hashpw(b'mat-khau', bcrypt.gensalt(4)).decode()
+    (data_dir / 'db.json').write_text(json.dumps({'users': [
+        {'id': 1, 'username': 'admin', 'password_hash': password_hash, 'role': 'admin'},
+        {'id': 2, 'username': '12345', 'password_hash': password_hash, 'role': 'user'},
+    ]}))
+    return request.param
+
+
+def test_get_by_username_is_exact(backend):
+    from app.models.user import User
+
+    assert User.get_by_username('12345').id == 2
+    assert User.get_by_username('admin').id == 1
+    assert User.get_by_username('012345') is None
+    assert User.get_by_username('Admin') is None
+
+
+def test_numeric_username_can_log_in(backend, client):
+    response = client.post('/auth/login', json={'username': '12345', 'password': 'mat-khau'})
+    assert response.status_code == 200